@@ -0,0 +1,223 @@
+from typing import Dict, Any, Optional, List, Tuple
+import csv
+from io import StringIO
+import numpy as np
+
+# Minimalna i domyślna maksymalna stawka CPC na Amazon (EUR)
+MIN_BID = 0.02
+MAX_BID = 100.0
+
+# Siła ściągania do średniej grupy reklam / kampanii / konta (pseudo-kliknięcia / pseudo-zamówienia)
+DEFAULT_CLICK_PRIOR = 50.0
+DEFAULT_ORDER_PRIOR = 5.0
+
+# Nagłówek pliku bulk upload Sponsored Products - Amazon dopasowuje aktualizowane wiersze po ID,
+# a słowa kluczowe bez ID po kampanii, grupie, tekście i typie dopasowania
+BULK_HEADER = (
+    "Product", "Entity", "Operation", "Campaign ID", "Ad Group ID", "Keyword ID", "Product Targeting ID",
+    "Campaign Name", "Ad Group Name", "Keyword Text", "Match Type", "Product Targeting Expression", "Bid"
+)
+
+# Typy dopasowania słów kluczowych z ustawianą stawką
+KEYWORD_MATCH_TYPES = ("EXACT", "PHRASE", "BROAD")
+# Targetowanie produktów / automatyczne: typy dopasowania w raportach i prefiksy wyrażeń
+TARGETING_MATCH_TYPES = ("TARGETING_EXPRESSION", "TARGETING_EXPRESSION_PREDEFINED")
+TARGETING_PREFIXES = ("asin=", "asin-expanded=", "category=", "brand=", "close-match", "loose-match", "substitutes", "complements")
+
+
+def bulk_entity(keyword: str, match_type: str) -> Optional[str]:
+    """
+    Encja bulk upload dla wiersza raportu.
+
+    Returns:
+        Optional[str]: "Keyword", "Product Targeting" lub None, gdy wiersza nie da się zaktualizować
+            (pusty tekst, "*" z kampanii automatycznych, nieznany typ dopasowania)
+    """
+    text = keyword.strip().lower()
+    if not text or text == "*":
+        return None
+    if match_type.upper() in TARGETING_MATCH_TYPES or text.startswith(TARGETING_PREFIXES):
+        return "Product Targeting"
+    if match_type.upper() in KEYWORD_MATCH_TYPES:
+        return "Keyword"
+    return None
+
+
+def _group_ids(campaigns: np.ndarray, ad_groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Numer kampanii i grupy (kampania, grupa reklam) dla każdego wiersza - z nazw lub kodów słownika."""
+    _, campaign_ids = np.unique(np.asarray(campaigns), return_inverse=True)
+    _, ad_group_ids = np.unique(np.asarray(ad_groups), return_inverse=True)
+    campaign_ids = campaign_ids.ravel()
+    pair = campaign_ids.astype(np.int64) * (int(ad_group_ids.max(initial=0)) + 1) + ad_group_ids.ravel()
+    _, group_ids = np.unique(pair, return_inverse=True)
+    return campaign_ids, group_ids.ravel()
+
+
+def _shrunk_means(group_ids: np.ndarray, numerator: np.ndarray, denominator: np.ndarray, prior: Any, strength: float) -> np.ndarray:
+    """Iloraz sum numerator/denominator w grupie wiersza, ściągany do prior wagą strength (pseudo-obserwacje)."""
+    num = np.bincount(group_ids, weights=numerator)[group_ids]
+    den = np.bincount(group_ids, weights=denominator)[group_ids]
+    return (num + strength * prior) / (den + strength)
+
+
+def _prior_means(campaign_ids: np.ndarray, group_ids: np.ndarray, numerator: np.ndarray, denominator: np.ndarray, strength: float) -> np.ndarray:
+    """
+    Średnia grupy reklam ściągana do średniej kampanii, a ta do średniej konta (ta sama siła ściągania).
+
+    Grupa bez danych dostaje średnią kampanii, kampania bez danych - średnią konta.
+    """
+    total = denominator.sum()
+    account = numerator.sum() / total if total > 0 else 0.0
+    campaign = _shrunk_means(campaign_ids, numerator, denominator, account, strength)
+    return _shrunk_means(group_ids, numerator, denominator, campaign, strength)
+
+
+def recommend_bids(
+    campaigns: np.ndarray,
+    ad_groups: np.ndarray,
+    clicks: np.ndarray,
+    orders: np.ndarray,
+    sales: np.ndarray,
+    target_acos: Optional[float] = None,
+    target_profit_per_order: Optional[float] = None,
+    gross_margin: Optional[float] = None,
+    click_prior: float = DEFAULT_CLICK_PRIOR,
+    order_prior: float = DEFAULT_ORDER_PRIOR,
+    min_bid: float = MIN_BID,
+    max_bid: float = MAX_BID
+) -> Dict[str, np.ndarray]:
+    """
+    Wylicza maksymalną opłacalną stawkę CPC dla każdego słowa kluczowego w jednym przebiegu wektorowym.
+
+    Odwraca zależność ACOS = CPC / (CVR × AOV):
+    - przy docelowym ACOS: CPC = ACOS% × CVR × AOV
+    - przy docelowym zysku na zamówienie: CPC = CVR × (AOV × marża% − zysk)
+
+    CVR i AOV słów kluczowych z małą liczbą danych są ściągane do średniej grupy reklam
+    (estymator bayesowski: (zamówienia + k × CVR_grupy) / (kliknięcia + k)). Średnie grup są
+    w ten sam sposób ściągane do średniej kampanii, a te do średniej konta - grupa bez zamówień
+    nie ma AOV 0, tylko AOV kampanii.
+
+    Args:
+        campaigns (np.ndarray): Nazwy kampanii (lub ich kody słownika)
+        ad_groups (np.ndarray): Nazwy grup reklam (lub ich kody słownika)
+        clicks (np.ndarray): Kliknięcia per słowo kluczowe
+        orders (np.ndarray): Zamówienia per słowo kluczowe
+        sales (np.ndarray): Sprzedaż per słowo kluczowe w EUR
+        target_acos (Optional[float]): Docelowy ACOS w procentach
+        target_profit_per_order (Optional[float]): Docelowy zysk na zamówienie w EUR (wymaga gross_margin)
+        gross_margin (Optional[float]): Marża brutto w procentach
+        click_prior (float): Waga średniej nadrzędnej dla CVR (w kliknięciach)
+        order_prior (float): Waga średniej nadrzędnej dla AOV (w zamówieniach)
+        min_bid (float): Minimalna stawka
+        max_bid (float): Maksymalna stawka
+
+    Returns:
+        Dict[str, np.ndarray]: Wygładzone CVR (%), AOV oraz rekomendowane stawki
+    """
+    if (target_acos is None) == (target_profit_per_order is None):
+        raise ValueError("Podaj dokładnie jeden cel: target_acos albo target_profit_per_order")
+    if target_profit_per_order is not None and gross_margin is None:
+        raise ValueError("Cel zysku na zamówienie wymaga podania marży brutto")
+
+    clicks = np.asarray(clicks, dtype=np.float64)
+    orders = np.asarray(orders, dtype=np.float64)
+    sales = np.asarray(sales, dtype=np.float64)
+
+    campaign_ids, group_ids = _group_ids(campaigns, ad_groups)
+
+    group_cvr = _prior_means(campaign_ids, group_ids, orders, clicks, click_prior)
+    group_aov = _prior_means(campaign_ids, group_ids, sales, orders, order_prior)
+
+    cvr = (orders + click_prior * group_cvr) / (clicks + click_prior)
+    aov = (sales + order_prior * group_aov) / (orders + order_prior)
+
+    if target_acos is not None:
+        bids = (target_acos / 100) * cvr * aov
+    else:
+        bids = cvr * (aov * (gross_margin / 100) - target_profit_per_order)
+
+    bids = np.round(np.clip(bids, min_bid, max_bid), 2)
+
+    return {
+        "cvr": np.round(cvr * 100, 4),
+        "aov": np.round(aov, 2),
+        "bid": bids,
+    }
+
+
+def bids_to_bulk_csv(
+    campaigns: List[str],
+    ad_groups: List[str],
+    keywords: List[str],
+    match_types: List[str],
+    bids: np.ndarray,
+    campaign_ids: Optional[List[str]] = None,
+    ad_group_ids: Optional[List[str]] = None,
+    target_ids: Optional[List[str]] = None
+) -> str:
+    """
+    Tworzy plik CSV w formacie bulk upload Sponsored Products (aktualizacja stawek).
+
+    Słowa kluczowe trafiają do wierszy "Keyword" z typem dopasowania, targety produktowe
+    i automatyczne do "Product Targeting" z wyrażeniem; wiersze bez encji (bulk_entity) są pomijane.
+
+    Args:
+        campaigns (List[str]): Nazwy kampanii
+        ad_groups (List[str]): Nazwy grup reklam
+        keywords (List[str]): Teksty słów kluczowych / wyrażenia targetowania
+        match_types (List[str]): Typy dopasowania z raportu
+        bids (np.ndarray): Rekomendowane stawki
+        campaign_ids (Optional[List[str]]): ID kampanii (puste, gdy raport ich nie zawiera)
+        ad_group_ids (Optional[List[str]]): ID grup reklam
+        target_ids (Optional[List[str]]): ID słów kluczowych / targetów
+
+    Returns:
+        str: Zawartość pliku CSV
+    """
+    size = len(campaigns)
+    campaign_ids = campaign_ids or [""] * size
+    ad_group_ids = ad_group_ids or [""] * size
+    target_ids = target_ids or [""] * size
+
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(BULK_HEADER)
+    for campaign, ad_group, keyword, match_type, bid, campaign_id, ad_group_id, target_id in zip(
+        campaigns, ad_groups, keywords, match_types, bids.tolist(), campaign_ids, ad_group_ids, target_ids
+    ):
+        entity = bulk_entity(keyword, match_type)
+        if entity is None:
+            continue
+        is_keyword = entity == "Keyword"
+        writer.writerow((
+            "Sponsored Products", entity, "Update", campaign_id, ad_group_id,
+            target_id if is_keyword else "", "" if is_keyword else target_id,
+            campaign, ad_group,
+            keyword if is_keyword else "", match_type.lower() if is_keyword else "", "" if is_keyword else keyword,
+            f"{bid:.2f}"
+        ))
+    return buffer.getvalue()
+
+
+def recommend_bids_for_report(columns: Dict[str, Any], **kwargs: Any) -> str:
+    """
+    Rekomendacje stawek dla raportu z cache'u, zwracane jako CSV bulk upload.
+
+    Args:
+        columns (Dict[str, Any]): Kolumny raportu (load_report / load_cached_report)
+        **kwargs: Parametry przekazywane do recommend_bids
+
+    Returns:
+        str: Zawartość pliku CSV
+    """
+    result = recommend_bids(
+        columns["campaign"].codes, columns["ad_group"].codes,
+        columns["clicks"], columns["orders"], columns["sales"],
+        **kwargs
+    )
+    return bids_to_bulk_csv(
+        columns["campaign"].tolist(), columns["ad_group"].tolist(), columns["keyword"].tolist(),
+        columns["match_type"].tolist(), result["bid"],
+        columns["campaign_id"].tolist(), columns["ad_group_id"].tolist(), columns["target_id"].tolist()
+    )
@@ -0,0 +1,585 @@
+"""
+Wspólny cache z wymiennymi backendami.
+
+Backend wybiera zmienna CACHE_URL:
+    memory://                      - LRU w pamięci procesu (domyślnie)
+    sqlite:///ścieżka/do/cache.db  - plik SQLite współdzielony przez procesy na jednym hoście
+                                     (np. sqlite:////dev/shm/acos_cache.db w pamięci współdzielonej)
+    redis://host:6379/0            - serwer zgodny z protokołem Redis (RESP), wspólny dla wielu instancji
+
+Dane o innym profilu (np. wykresy) mogą mieć osobny magazyn: create_backend z własną
+przestrzenią nazw i limitem rozmiaru, więc nie wypychają kursów walut ze wspólnego LRU.
+
+Wartości są serializowane do JSON (lub zapisywane jako surowe bajty, np. obrazy),
+bez pickle - dane z cache nie mogą wykonać kodu i są czytelne dla innych procesów.
+"""
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse, unquote
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+CACHE_MAX_MB = float(os.environ.get("CACHE_MAX_MB", "64"))
+# Prefiks kluczy - oddziela dane aplikacji we wspólnym Redisie
+CACHE_PREFIX = os.environ.get("CACHE_PREFIX", "acos:")
+
+# Blokada przeciw "stampede": jak długo inne procesy czekają na liczącego wartość.
+# Posiadacz przedłuża blokadę co LOCK_TTL / 3, więc wygasa ona tylko po jego awarii.
+LOCK_TTL = 30.0
+LOCK_POLL_INTERVAL = 0.05
+# Co ile zapisów SQLite usuwa przeterminowane wpisy
+SQLITE_PURGE_EVERY = 1000
+REDIS_TIMEOUT = 2.0
+
+
+class CacheBackend:
+    """Interfejs backendu: bajty pod kluczem z opcjonalnym czasem życia (TTL w sekundach)."""
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl: Optional[float] = None) -> None:
+        for key, value in items:
+            self.set(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Zapisuje wartość tylko gdy klucza nie ma (atomowo); zwraca True jeśli zapisano."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        """Usuwa klucz tylko gdy ma daną wartość (atomowo); zwraca True jeśli usunięto."""
+        raise NotImplementedError
+
+    def touch(self, key: str, value: bytes, ttl: float) -> bool:
+        """Ustawia nowy TTL żyjącego klucza tylko gdy ma daną wartość (atomowo); zwraca True jeśli przedłużono."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[0]
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl is not None else None
+
+
+class MemoryBackend(CacheBackend):
+    """LRU w pamięci procesu ograniczony łącznym rozmiarem wartości."""
+
+    def __init__(self, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._items.pop(key)
+        self.size -= len(value)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        now = time.time()
+        with self._lock:
+            return [self._live(key, now) for key in keys]
+
+    def _store(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        if key in self._items:
+            self._remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self._items[key] = (value, _expires_at(ttl))
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._items)))
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key, time.time()) is not None:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        with self._lock:
+            if self._live(key, time.time()) != value:
+                return False
+            self._remove(key)
+            return True
+
+    def touch(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._lock:
+            if self._live(key, time.time()) != value:
+                return False
+            self._items[key] = (value, _expires_at(ttl))
+            return True
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache w pliku SQLite (tryb WAL) współdzielony przez procesy robocze na jednym hoście.
+
+    Plik w /dev/shm daje cache w pamięci współdzielonej bez dodatkowej usługi.
+    Każda przestrzeń nazw ma własną tabelę; z limitem max_bytes po zapisie usuwane są
+    wpisy wygasające najwcześniej (przy jednym TTL - najstarsze).
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires_at REAL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_{table}_expires ON {table} (expires_at);
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_bytes: Optional[int] = None):
+        if not table.isidentifier():
+            raise ValueError(f"Nieprawidłowa nazwa tabeli cache: {table}")
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.executescript(self._SCHEMA.format(table=table))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        found: Dict[str, bytes] = {}
+        # Limit parametrów zapytania SQLite - klucze w porcjach
+        for start in range(0, len(keys), 500):
+            batch = list(keys[start:start + 500])
+            rows = self._connection().execute(
+                f"SELECT key, value FROM {self.table} WHERE key IN ({', '.join('?' * len(batch))}) "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                batch + [time.time()]
+            )
+            found.update(rows)
+        return [found.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.set_many([(key, value)], ttl)
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl: Optional[float] = None) -> None:
+        conn = self._connection()
+        expires_at = _expires_at(ttl)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                             [(key, value, expires_at) for key, value in items])
+            if self.max_bytes is not None:
+                # Suma narastająca od wpisów żyjących najdłużej - nadmiarowe (najstarsze) są usuwane
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM ("
+                    f"SELECT key, SUM(length(value)) OVER (ORDER BY expires_at IS NULL DESC, expires_at DESC, key) AS total "
+                    f"FROM {self.table}) WHERE total > ?)",
+                    (self.max_bytes,)
+                )
+        previous = self._writes
+        self._writes += len(items)
+        if self._writes // SQLITE_PURGE_EVERY != previous // SQLITE_PURGE_EVERY:
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        # Nadpisuje tylko wpis przeterminowany - zapis atomowy w jednej instrukcji
+        cursor = self._connection().execute(
+            f"INSERT INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            f"WHERE {self.table}.expires_at IS NOT NULL AND {self.table}.expires_at <= ?",
+            (key, value, _expires_at(ttl), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        cursor = self._connection().execute(f"DELETE FROM {self.table} WHERE key = ? AND value = ?", (key, value))
+        return cursor.rowcount == 1
+
+    def touch(self, key: str, value: bytes, ttl: float) -> bool:
+        cursor = self._connection().execute(
+            f"UPDATE {self.table} SET expires_at = ? WHERE key = ? AND value = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (_expires_at(ttl), key, value, time.time())
+        )
+        return cursor.rowcount == 1
+
+
+class RedisError(Exception):
+    """Błąd zwrócony przez serwer Redis."""
+
+
+# Porównanie i zmiana w jednym skrypcie - atomowe po stronie serwera
+_REDIS_DELETE_IF = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+_REDIS_TOUCH = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end return 0"
+
+
+class RedisBackend(CacheBackend):
+    """
+    Minimalny klient protokołu Redis (RESP): GET/MGET/SET/DEL i skrypty EVAL.
+
+    Działa z Redisem, Valkey, KeyDB i każdym serwerem zgodnym z RESP,
+    bez dodatkowych zależności. Osobne połączenie na wątek.
+
+    Z limitem max_bytes klucze przestrzeni nazw są rejestrowane w zbiorze sortowanym
+    (kolejność zapisu) i haszu rozmiarów; po zapisie najstarsze wpisy ponad limit są usuwane.
+    """
+
+    def __init__(self, url: str, namespace: str = "cache", max_bytes: Optional[int] = None):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.max_bytes = max_bytes
+        self._index_key = f"{CACHE_PREFIX}{namespace}:index"
+        self._sizes_key = f"{CACHE_PREFIX}{namespace}:sizes"
+        self._local = threading.local()
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        sock = socket.create_connection((self.host, self.port), timeout=REDIS_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        self._local.conn = conn
+        if self.password:
+            auth = (self.username, self.password) if self.username else (self.password,)
+            self._send(conn, "AUTH", *auth)
+        if self.db:
+            self._send(conn, "SELECT", str(self.db))
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    @staticmethod
+    def _encode(args: Sequence[Union[str, bytes]]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read(self, reader: Any) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Serwer Redis zamknął połączenie")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read(reader) for _ in range(length)]
+        raise ConnectionError(f"Nieznana odpowiedź serwera Redis: {line!r}")
+
+    def _send(self, conn: Tuple[socket.socket, Any], *args: Union[str, bytes]) -> Any:
+        conn[0].sendall(self._encode(args))
+        return self._read(conn[1])
+
+    def command(self, *args: Union[str, bytes], idempotent: bool = False) -> Any:
+        """
+        Wysyła polecenie; polecenie idempotentne po zerwanym połączeniu jest ponawiane raz na nowym.
+
+        Pozostałe (np. SET NX, ZPOPMIN) mogły zostać wykonane przed zerwaniem - błąd trafia do wywołującego.
+        """
+        conn = getattr(self._local, "conn", None)
+        try:
+            return self._send(conn or self._connect(), *args)
+        except (OSError, ConnectionError):
+            self._close()
+            if conn is None or not idempotent:
+                raise
+            return self._send(self._connect(), *args)
+
+    @staticmethod
+    def _ttl_args(ttl: Optional[float]) -> List[str]:
+        return ["PX", str(max(1, int(ttl * 1000)))] if ttl is not None else []
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return list(self.command("MGET", *keys, idempotent=True)) if keys else []
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if self.max_bytes is not None:
+            self.set_many([(key, value)], ttl)
+            return
+        self.command("SET", key, value, *self._ttl_args(ttl), idempotent=True)
+
+    def set_many(self, items: Sequence[Tuple[str, bytes]], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        # Potokowo: wszystkie polecenia w jednym zapisie, potem odpowiedzi
+        ttl_args = self._ttl_args(ttl)
+        commands = [["SET", key, value, *ttl_args] for key, value in items]
+        if self.max_bytes is not None:
+            now = repr(time.time())
+            commands += [["ZADD", self._index_key, now, key] for key, _ in items]
+            commands += [["HSET", self._sizes_key, key, str(len(value))] for key, value in items]
+        payload = b"".join(self._encode(args) for args in commands)
+        self.command_pipeline(payload, len(commands))
+        if self.max_bytes is not None:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Usuwa najstarsze klucze przestrzeni nazw, aż suma rozmiarów zmieści się w limicie."""
+        total = sum(int(size) for size in self.command("HVALS", self._sizes_key, idempotent=True))
+        while total > self.max_bytes:
+            # ZPOPMIN nie jest ponawiany - każdy zdjęty klucz jest usuwany dokładnie raz
+            popped = self.command("ZPOPMIN", self._index_key)
+            if not popped:
+                break
+            key = popped[0]
+            size, _, _ = self.command_pipeline(
+                self._encode(["HGET", self._sizes_key, key]) + self._encode(["HDEL", self._sizes_key, key])
+                + self._encode(["DEL", key]),
+                3
+            )
+            total -= int(size or 0)
+
+    def command_pipeline(self, payload: bytes, replies: int) -> List[Any]:
+        conn = getattr(self._local, "conn", None) or self._connect()
+        try:
+            conn[0].sendall(payload)
+            return [self._read(conn[1]) for _ in range(replies)]
+        except (OSError, ConnectionError):
+            self._close()
+            raise
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return self.command("SET", key, value, *self._ttl_args(ttl), "NX") == "OK"
+
+    def delete(self, key: str) -> None:
+        if self.max_bytes is not None:
+            payload = b"".join(self._encode(args) for args in (
+                ["DEL", key], ["ZREM", self._index_key, key], ["HDEL", self._sizes_key, key]
+            ))
+            self.command_pipeline(payload, 3)
+            return
+        self.command("DEL", key, idempotent=True)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        return self.command("EVAL", _REDIS_DELETE_IF, "1", key, value, idempotent=True) == 1
+
+    def touch(self, key: str, value: bytes, ttl: float) -> bool:
+        return self.command("EVAL", _REDIS_TOUCH, "1", key, value, self._ttl_args(ttl)[1], idempotent=True) == 1
+
+
+def create_backend(url: str, namespace: str = "cache", max_bytes: Optional[int] = None) -> CacheBackend:
+    """
+    Tworzy backend na podstawie adresu (memory://, sqlite:///plik, redis://host:port/db).
+
+    Args:
+        url (str): Adres backendu
+        namespace (str): Przestrzeń nazw (tabela SQLite / indeks kluczy w Redisie) z własnym limitem
+        max_bytes (Optional[int]): Limit łącznego rozmiaru wartości; None = CACHE_MAX_MB dla pamięci,
+            bez limitu dla SQLite i Redisa
+
+    Returns:
+        CacheBackend: Backend cache
+    """
+    scheme = urlparse(url).scheme
+    if scheme in ("", "memory"):
+        return MemoryBackend() if max_bytes is None else MemoryBackend(max_bytes)
+    if scheme == "sqlite":
+        return SQLiteBackend(url[len("sqlite:///"):] or "cache.db", namespace, max_bytes)
+    if scheme in ("redis", "valkey"):
+        return RedisBackend(url, namespace, max_bytes)
+    raise ValueError(f"Nieobsługiwany backend cache: {url}")
+
+
+# Kodeki wartości: JSON dla danych, surowe bajty dla plików (np. wykresy PNG)
+Codec = Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+JSON_CODEC: Codec = (
+    lambda value: json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+    lambda data: json.loads(data),
+)
+RAW_CODEC: Codec = (bytes, bytes)
+
+
+class Cache:
+    """
+    Cache aplikacji nad wybranym backendem.
+
+    Błędy backendu (np. niedostępny Redis) nie przerywają obliczeń - są traktowane jak brak wpisu.
+    get_or_compute chroni przed "stampede": w procesie wartość liczy jeden wątek,
+    a między procesami jeden posiadacz blokady zapisanej w backendzie.
+    """
+
+    def __init__(self, backend: CacheBackend, prefix: str = CACHE_PREFIX):
+        self.backend = backend
+        self.prefix = prefix
+        # Blokady w procesie: klucz -> [blokada, liczba wątków trzymających lub czekających]
+        self._locks: Dict[str, List[Any]] = {}
+        self._locks_guard = threading.Lock()
+
+    def _safe(self, call: Callable[[], Any], default: Any) -> Any:
+        try:
+            return call()
+        except (OSError, ConnectionError, RedisError, sqlite3.Error) as e:
+            print(f"Błąd cache ({type(self.backend).__name__}): {e}")
+            return default
+
+    def get_many(self, keys: Sequence[str], codec: Codec = JSON_CODEC) -> List[Any]:
+        """Wartości kluczy (None dla brakujących) - jedno zapytanie do backendu."""
+        values = self._safe(lambda: self.backend.get_many([self.prefix + key for key in keys]), [None] * len(keys))
+        return [codec[1](value) if value is not None else None for value in values]
+
+    def get(self, key: str, codec: Codec = JSON_CODEC) -> Any:
+        return self.get_many([key], codec)[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, codec: Codec = JSON_CODEC) -> None:
+        data = codec[0](value)
+        self._safe(lambda: self.backend.set(self.prefix + key, data, ttl), None)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None, codec: Codec = JSON_CODEC) -> None:
+        """Zapisuje wiele wartości z tym samym TTL (potokowo / w jednej transakcji)."""
+        data = [(self.prefix + key, codec[0](value)) for key, value in items.items()]
+        self._safe(lambda: self.backend.set_many(data, ttl), None)
+
+    def delete(self, key: str) -> None:
+        self._safe(lambda: self.backend.delete(self.prefix + key), None)
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = LOCK_TTL) -> Iterator[bool]:
+        """
+        Blokada na czas liczenia wartości: najpierw w procesie, potem w backendzie.
+
+        Blokada backendu ma unikalny token i TTL równy timeout, przedłużany w tle co timeout / 3,
+        dopóki posiadacz liczy. Zwolnienie usuwa klucz tylko z własnym tokenem - jeśli blokada
+        wygasła (np. wstrzymany proces) i przejął ją ktoś inny, jego blokada zostaje.
+
+        Zwraca True jeśli blokada backendu została przejęta; False jeśli minął czas
+        oczekiwania (posiadacz mógł zginąć) - wtedy wywołujący liczy wartość sam.
+        """
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                lock_key = f"{self.prefix}lock:{key}"
+                token = uuid.uuid4().hex.encode()
+                deadline = time.time() + timeout
+                acquired = self._safe(lambda: self.backend.add(lock_key, token, timeout), True)
+                while not acquired and time.time() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    acquired = self._safe(lambda: self.backend.add(lock_key, token, timeout), True)
+                stop = threading.Event()
+                if acquired:
+                    threading.Thread(target=self._renew, args=(lock_key, token, timeout, stop), daemon=True).start()
+                try:
+                    yield acquired
+                finally:
+                    stop.set()
+                    if acquired:
+                        self._safe(lambda: self.backend.delete_if(lock_key, token), None)
+        finally:
+            # Blokada jest usuwana dopiero, gdy nikt jej nie trzyma ani na nią nie czeka
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def _renew(self, lock_key: str, token: bytes, ttl: float, stop: threading.Event) -> None:
+        """Przedłuża blokadę backendu, dopóki posiadacz jej nie zwolni albo nie utraci."""
+        while not stop.wait(ttl / 3):
+            if not self._safe(lambda: self.backend.touch(lock_key, token, ttl), True):
+                return
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Union[None, float, Callable[[Any], Optional[float]]] = None,
+        codec: Codec = JSON_CODEC
+    ) -> Any:
+        """
+        Zwraca wartość z cache lub liczy ją dokładnie raz i zapisuje.
+
+        Args:
+            key (str): Klucz (bez prefiksu)
+            compute (Callable[[], Any]): Funkcja licząca wartość
+            ttl (Union[None, float, Callable]): Czas życia w sekundach, None = bez wygasania,
+                albo funkcja wartość -> TTL (np. krótszy dla wartości awaryjnych)
+            codec (Codec): JSON_CODEC lub RAW_CODEC
+
+        Returns:
+            Any: Wartość z cache lub świeżo policzona
+        """
+        value = self.get(key, codec)
+        if value is not None:
+            return value
+        with self.lock(key):
+            # Inny wątek lub proces mógł policzyć wartość w czasie oczekiwania na blokadę
+            value = self.get(key, codec)
+            if value is None:
+                value = compute()
+                self.set(key, value, ttl(value) if callable(ttl) else ttl, codec)
+        return value
+
+
+_cache: Optional[Cache] = None
+_cache_guard = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Zwraca współdzieloną instancję cache (backend z CACHE_URL, tworzony przy pierwszym użyciu)."""
+    global _cache
+    with _cache_guard:
+        if _cache is None:
+            _cache = Cache(create_backend(CACHE_URL))
+    return _cache
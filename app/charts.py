@@ -0,0 +1,422 @@
+"""
+Wykresy prognozy renderowane po stronie serwera (PNG przez Pillow lub SVG).
+
+Obraz zależy wyłącznie od wejść kalkulatora prognoz, więc jest adresowany skrótem
+tych wejść: identyczne scenariusze trafiają we wspólny cache i nie są renderowane ponownie.
+"""
+from typing import Dict, Any, Callable, List, Mapping, Optional, Sequence, Tuple
+from io import BytesIO
+from urllib.parse import urlencode
+from xml.sax.saxutils import escape
+import hashlib
+import json
+import math
+import os
+import threading
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .metrics import FORECAST_GRAPH, FORECAST_INPUTS
+from .cache import CACHE_URL, RAW_CODEC, Cache, create_backend
+
+# Zmiana wyglądu wykresów wymaga podbicia wersji (unieważnia stare adresy i wpisy cache)
+CHART_VERSION = 1
+CHART_WIDTH = 640
+CHART_HEIGHT = 360
+# Czas życia wykresu w cache'u (wpisy są niezmienne, TTL tylko zwalnia miejsce)
+CHART_CACHE_TTL = 7 * 24 * 3600
+# Wykresy mają osobny magazyn z własnym limitem - nie wypychają kursów walut ze wspólnego cache'u
+CHART_CACHE_URL = os.environ.get("CHART_CACHE_URL", CACHE_URL)
+CHART_CACHE_MAX_MB = float(os.environ.get("CHART_CACHE_MAX_MB", "32"))
+# Obrazy są niezmienne dla danego adresu - przeglądarka może je trzymać rok
+CHART_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CHART_FORMATS: Dict[str, str] = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+# Precyzja wejść w adresie i kluczu wykresu (procenty, EUR, sztuki) - drobniejsze różnice
+# nie zmieniają obrazu, a bez zaokrąglenia każda wartość tworzyłaby osobny wpis cache
+CHART_PARAM_DECIMALS: Dict[str, int] = {
+    "gross_margin": 2,
+    "target_aov": 2,
+    "target_ctr": 3,
+    "target_cpc": 2,
+    "target_cvr": 2,
+    "impressions": 0,
+}
+
+# Mnożniki CPC / CVR dla krzywych ACOS i mapy wrażliwości
+ACOS_CPC_STEPS = 60
+CVR_VARIANTS = (0.75, 1.0, 1.25)
+SENSITIVITY_STEPS = (0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4)
+
+# Kolory firmowe (jak w raporcie Excel)
+ORANGE = "#f39c12"
+BLUE = "#667eea"
+GREEN = "#27ae60"
+RED = "#e74c3c"
+TEXT = "#2c3e50"
+MUTED = "#7f8c8d"
+GRID = "#e5e8ec"
+LINE_COLORS = ("#95a5a6", BLUE, GREEN)
+
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 70, 20, 45, 55
+
+_forecast_batch = FORECAST_GRAPH.compile(
+    ["acos", "sales", "spend", "gross_profit", "profit"], FORECAST_INPUTS + ("eur_rate",)
+)
+
+
+# Czcionki TrueType szukane kolejno w katalogach systemowych (Dockerfile instaluje DejaVu)
+FONT_FILES = {
+    False: ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"),
+    True: ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf"),
+}
+FONT_DIRS = ("", "/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/truetype/liberation", "/Library/Fonts")
+
+_ASCII_FALLBACK = str.maketrans({
+    "ą": "a", "ć": "c", "ę": "e", "ł": "l", "ń": "n", "ó": "o", "ś": "s", "ź": "z", "ż": "z",
+    "Ą": "A", "Ć": "C", "Ę": "E", "Ł": "L", "Ń": "N", "Ó": "O", "Ś": "S", "Ź": "Z", "Ż": "Z",
+    "€": "EUR ", "→": "->",
+})
+
+
+def _load_font(size: int, bold: bool) -> Any:
+    """Czcionka TrueType z polskimi znakami lub wbudowana czcionka Pillow."""
+    for name in FONT_FILES[bold]:
+        for directory in FONT_DIRS:
+            try:
+                return ImageFont.truetype(os.path.join(directory, name), size)
+            except OSError:
+                continue
+    return ImageFont.load_default()
+
+
+def _hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+class _PngCanvas:
+    """Płótno rastrowe (Pillow)."""
+
+    def __init__(self, width: int, height: int):
+        self.image = Image.new("RGB", (width, height), "white")
+        self.draw = ImageDraw.Draw(self.image)
+        self._fonts: Dict[Tuple[int, bool], Any] = {}
+
+    def _font(self, size: int, bold: bool) -> Any:
+        if (size, bold) not in self._fonts:
+            self._fonts[(size, bold)] = _load_font(size, bold)
+        return self._fonts[(size, bold)]
+
+    def line(self, points: Sequence[Tuple[float, float]], color: str, width: int = 1, dashed: bool = False) -> None:
+        if not dashed:
+            self.draw.line([tuple(p) for p in points], fill=color, width=width)
+            return
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            length = math.hypot(x1 - x0, y1 - y0)
+            for start in np.arange(0, length, 10):
+                a, b = start / length, min(start + 6, length) / length
+                self.draw.line([(x0 + (x1 - x0) * a, y0 + (y1 - y0) * a), (x0 + (x1 - x0) * b, y0 + (y1 - y0) * b)],
+                               fill=color, width=width)
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str) -> None:
+        self.draw.rectangle([min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)], fill=fill)
+
+    def circle(self, x: float, y: float, radius: float, fill: str) -> None:
+        self.draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=fill)
+
+    def text(self, x: float, y: float, text: str, color: str = TEXT, size: int = 11, align: str = "left", bold: bool = False) -> None:
+        font = self._font(size, bold)
+        if not isinstance(font, ImageFont.FreeTypeFont) or font.path is None:
+            # Wbudowana czcionka Pillow nie ma polskich znaków ani symbolu euro
+            text = text.translate(_ASCII_FALLBACK)
+        left, top, right, bottom = self.draw.textbbox((0, 0), text, font=font)
+        width = right - left
+        dx = {"left": 0, "center": -width / 2, "right": -width}[align]
+        self.draw.text((x + dx, y - (bottom + top) / 2), text, fill=color, font=font)
+
+    def to_bytes(self) -> bytes:
+        buffer = BytesIO()
+        self.image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+
+class _SvgCanvas:
+    """Płótno wektorowe (SVG jako tekst)."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.elements: List[str] = [f'<rect width="{width}" height="{height}" fill="white"/>']
+
+    def line(self, points: Sequence[Tuple[float, float]], color: str, width: int = 1, dashed: bool = False) -> None:
+        coords = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        dash = ' stroke-dasharray="6 4"' if dashed else ""
+        self.elements.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="{width}"{dash}/>')
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str) -> None:
+        self.elements.append(
+            f'<rect x="{min(x0, x1):.1f}" y="{min(y0, y1):.1f}" width="{abs(x1 - x0):.1f}" '
+            f'height="{abs(y1 - y0):.1f}" fill="{fill}"/>'
+        )
+
+    def circle(self, x: float, y: float, radius: float, fill: str) -> None:
+        self.elements.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{radius}" fill="{fill}"/>')
+
+    def text(self, x: float, y: float, text: str, color: str = TEXT, size: int = 11, align: str = "left", bold: bool = False) -> None:
+        anchor = {"left": "start", "center": "middle", "right": "end"}[align]
+        weight = ' font-weight="bold"' if bold else ""
+        self.elements.append(
+            f'<text x="{x:.1f}" y="{y:.1f}" fill="{color}" font-size="{size}" text-anchor="{anchor}" '
+            f'dominant-baseline="middle"{weight}>{escape(text)}</text>'
+        )
+
+    def to_bytes(self) -> bytes:
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+            f'viewBox="0 0 {self.width} {self.height}" font-family="Arial, sans-serif">'
+            + "".join(self.elements) + "</svg>"
+        ).encode("utf-8")
+
+
+def _format_number(value: float) -> str:
+    if abs(value) >= 10000:
+        return f"{value / 1000:.0f}k"
+    if abs(value) >= 1000:
+        return f"{value / 1000:.1f}k"
+    if abs(value) < 0.005:
+        return "0"
+    if abs(value) >= 10:
+        return f"{value:.0f}"
+    return f"{value:.2f}"
+
+
+def _nice_ticks(lo: float, hi: float, count: int = 5) -> np.ndarray:
+    """Okrągłe wartości podziałki osi obejmujące przedział [lo, hi]."""
+    span = hi - lo if hi > lo else 1.0
+    raw = span / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    return np.arange(math.floor(lo / step) * step, math.ceil(hi / step) * step + step * 0.5, step)
+
+
+def _axes(canvas: Any, title: str, x_range: Tuple[float, float], y_range: Tuple[float, float],
+          x_label: str, y_label: str, x_suffix: str = "", y_suffix: str = "") -> Tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    """Rysuje tytuł, siatkę i opisy osi; zwraca funkcje przeliczające dane na piksele."""
+    left, right = MARGIN_LEFT, CHART_WIDTH - MARGIN_RIGHT
+    top, bottom = MARGIN_TOP, CHART_HEIGHT - MARGIN_BOTTOM
+    x_ticks = _nice_ticks(*x_range)
+    y_ticks = _nice_ticks(*y_range)
+    x_lo, x_hi = x_ticks[0], x_ticks[-1]
+    y_lo, y_hi = y_ticks[0], y_ticks[-1]
+
+    def sx(x: Any) -> Any:
+        return left + (np.asarray(x) - x_lo) / (x_hi - x_lo) * (right - left)
+
+    def sy(y: Any) -> Any:
+        return bottom - (np.asarray(y) - y_lo) / (y_hi - y_lo) * (bottom - top)
+
+    canvas.text(CHART_WIDTH / 2, 20, title, size=14, align="center", bold=True)
+    for tick in y_ticks:
+        y = float(sy(tick))
+        canvas.line([(left, y), (right, y)], GRID)
+        canvas.text(left - 6, y, _format_number(tick) + y_suffix, color=MUTED, align="right")
+    for tick in x_ticks:
+        x = float(sx(tick))
+        canvas.line([(x, bottom), (x, bottom + 4)], MUTED)
+        canvas.text(x, bottom + 14, _format_number(tick) + x_suffix, color=MUTED, align="center")
+    canvas.line([(left, top), (left, bottom), (right, bottom)], MUTED)
+    canvas.text((left + right) / 2, CHART_HEIGHT - 14, x_label, align="center")
+    canvas.text(8, top - 16, y_label, align="left")
+    return sx, sy
+
+
+def _evaluate(params: Dict[str, float], **overrides: Any) -> Dict[str, np.ndarray]:
+    """Wskaźniki prognozy dla siatki wejść (nadpisane wejścia jako tablice)."""
+    inputs = {name: np.asarray(overrides.get(name, params[name]), dtype=np.float64) for name in FORECAST_INPUTS}
+    return _forecast_batch(**inputs, eur_rate=np.float64(1.0))
+
+
+def draw_acos_cpc(canvas: Any, params: Dict[str, float]) -> None:
+    """Krzywe ACOS w funkcji CPC dla trzech wariantów CVR na tle break-even ACOS."""
+    cpc = params["target_cpc"] if params["target_cpc"] > 0 else 1.0
+    grid = np.linspace(0.25, 2.0, ACOS_CPC_STEPS) * cpc
+    curves = [
+        (variant, np.broadcast_to(_evaluate(params, target_cpc=grid, target_cvr=params["target_cvr"] * variant)["acos"], grid.shape))
+        for variant in CVR_VARIANTS
+    ]
+    break_even = params["gross_margin"]
+    current = float(np.asarray(_evaluate(params)["acos"]))
+    # Oś ACOS obejmuje break-even i bieżący punkt, wyższe fragmenty krzywych są ucinane
+    y_max = _nice_ticks(0.0, max(break_even * 1.5, current * 1.3, 10.0))[-1]
+
+    sx, sy = _axes(canvas, "ACOS vs CPC", (float(grid[0]), float(grid[-1])), (0.0, y_max), "CPC (EUR)", "ACOS", y_suffix="%")
+    y_top = float(sy(y_max))
+    for (variant, curve), color in zip(curves, LINE_COLORS):
+        visible = curve <= y_max
+        points = list(zip(sx(grid[visible]).tolist(), sy(curve[visible]).tolist()))
+        if len(points) > 1:
+            canvas.line(points, color, width=2)
+    be_y = float(sy(break_even))
+    if be_y >= y_top:
+        canvas.line([(MARGIN_LEFT, be_y), (CHART_WIDTH - MARGIN_RIGHT, be_y)], RED, width=2, dashed=True)
+        canvas.text(CHART_WIDTH - MARGIN_RIGHT - 4, be_y - 9, f"Break-even {break_even:.0f}%", color=RED, align="right")
+
+    if current <= y_max:
+        canvas.circle(float(sx(params["target_cpc"])), float(sy(current)), 5, ORANGE)
+
+    # Legenda w lewym górnym rogu - przy niskim CPC krzywe leżą nisko
+    for i, (variant, color) in enumerate(zip(CVR_VARIANTS, LINE_COLORS)):
+        x, y = MARGIN_LEFT + 12, MARGIN_TOP + 10 + i * 16
+        canvas.line([(x, y), (x + 18, y)], color, width=3)
+        canvas.text(x + 24, y, f"CVR {params['target_cvr'] * variant:.1f}%", color=MUTED)
+
+
+def draw_profit_waterfall(canvas: Any, params: Dict[str, float]) -> None:
+    """Kaskada zysku: sprzedaż → koszt produktu → wydatki reklamowe → zysk."""
+    m = {name: float(np.asarray(value)) for name, value in _evaluate(params).items()}
+    steps = [
+        ("Sprzedaż", 0.0, m["sales"], BLUE),
+        ("Koszt produktu", m["gross_profit"], m["sales"], MUTED),
+        ("Reklama", m["profit"], m["gross_profit"], ORANGE),
+        ("Zysk", 0.0, m["profit"], GREEN if m["profit"] >= 0 else RED),
+    ]
+    lows = [min(a, b) for _, a, b, _ in steps]
+    highs = [max(a, b) for _, a, b, _ in steps]
+    sx, sy = _axes(canvas, "Kaskada zysku", (0.0, float(len(steps))), (min(0.0, *lows), max(1.0, *highs)), "", "EUR")
+
+    slot = (CHART_WIDTH - MARGIN_LEFT - MARGIN_RIGHT) / len(steps)
+    for i, (label, start, end, color) in enumerate(steps):
+        x0 = MARGIN_LEFT + slot * i + slot * 0.2
+        x1 = MARGIN_LEFT + slot * (i + 1) - slot * 0.2
+        canvas.rect(x0, float(sy(start)), x1, float(sy(end)), color)
+        value = end - start if i in (1, 2) else end
+        value = -value if i in (1, 2) else value
+        sign = "-" if value < 0 else ""
+        canvas.text((x0 + x1) / 2, float(sy(max(start, end))) - 10, f"{sign}€{_format_number(abs(value))}", align="center", bold=True)
+        if i < len(steps) - 1:
+            level = float(sy(end if i == 0 else start))
+            canvas.line([(x1, level), (x1 + slot * 0.4, level)], MUTED, dashed=True)
+    # Opisy kategorii zamiast liczbowej osi X
+    canvas.rect(MARGIN_LEFT - 2, CHART_HEIGHT - MARGIN_BOTTOM + 2, CHART_WIDTH, CHART_HEIGHT, "white")
+    for i, (label, *_rest) in enumerate(steps):
+        canvas.text(MARGIN_LEFT + slot * (i + 0.5), CHART_HEIGHT - MARGIN_BOTTOM + 16, label, align="center")
+
+
+def _heat_color(value: float, limit: float) -> str:
+    """Kolor komórki: czerwony dla straty, zielony dla zysku, nasycenie wg wartości."""
+    share = min(abs(value) / limit, 1.0) if limit > 0 else 0.0
+    r, g, b = _hex_to_rgb(GREEN if value >= 0 else RED)
+    mix = lambda c: round(255 + (c - 255) * (0.15 + 0.85 * share))
+    return f"#{mix(r):02x}{mix(g):02x}{mix(b):02x}"
+
+
+def draw_sensitivity(canvas: Any, params: Dict[str, float]) -> None:
+    """Mapa wrażliwości zysku na zmiany CPC (oś X) i CVR (oś Y)."""
+    steps = np.array(SENSITIVITY_STEPS)
+    cpc = params["target_cpc"] * steps[None, :]
+    cvr = params["target_cvr"] * steps[::-1, None]
+    profit = np.broadcast_to(_evaluate(params, target_cpc=cpc, target_cvr=cvr)["profit"], (len(steps), len(steps)))
+    limit = float(np.abs(profit).max())
+
+    left, top = MARGIN_LEFT + 10, MARGIN_TOP
+    cell_w = (CHART_WIDTH - left - MARGIN_RIGHT) / len(steps)
+    cell_h = (CHART_HEIGHT - top - MARGIN_BOTTOM) / len(steps)
+    canvas.text(CHART_WIDTH / 2, 20, "Wrażliwość zysku (EUR)", size=14, align="center", bold=True)
+    for row in range(len(steps)):
+        for col in range(len(steps)):
+            x0, y0 = left + col * cell_w, top + row * cell_h
+            value = float(profit[row, col])
+            canvas.rect(x0 + 1, y0 + 1, x0 + cell_w - 1, y0 + cell_h - 1, _heat_color(value, limit))
+            is_current = steps[col] == 1.0 and steps[::-1][row] == 1.0
+            canvas.text(x0 + cell_w / 2, y0 + cell_h / 2, _format_number(value), size=10, align="center", bold=is_current)
+    for col, step in enumerate(steps):
+        canvas.text(left + (col + 0.5) * cell_w, CHART_HEIGHT - MARGIN_BOTTOM + 14,
+                    f"{params['target_cpc'] * step:.2f}", color=MUTED, size=10, align="center")
+    for row, step in enumerate(steps[::-1]):
+        canvas.text(left - 6, top + (row + 0.5) * cell_h, f"{params['target_cvr'] * step:.1f}%", color=MUTED, size=10, align="right")
+    canvas.text((left + CHART_WIDTH - MARGIN_RIGHT) / 2, CHART_HEIGHT - 14, "CPC (EUR)", align="center")
+    canvas.text(8, top - 16, "CVR", align="left")
+
+
+CHART_KINDS: Dict[str, Callable[[Any, Dict[str, float]], None]] = {
+    "acos_cpc": draw_acos_cpc,
+    "profit_waterfall": draw_profit_waterfall,
+    "sensitivity": draw_sensitivity,
+}
+
+
+def chart_params(source: Mapping[str, Any]) -> Dict[str, float]:
+    """
+    Wejścia prognozy, od których zależy wykres (znormalizowane do skrótu i adresu).
+
+    Brane są tylko pola FORECAST_INPUTS, zaokrąglone do CHART_PARAM_DECIMALS.
+
+    Args:
+        source (Mapping[str, Any]): Wyniki kalkulatora lub parametry zapytania
+
+    Returns:
+        Dict[str, float]: Wejścia w kolejności FORECAST_INPUTS
+    """
+    missing = [name for name in FORECAST_INPUTS if source.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Brak parametrów wykresu: {', '.join(missing)}")
+    # + 0.0 zamienia -0.0 na 0.0 (inaczej ten sam wykres miałby dwa klucze)
+    params = {name: round(float(source[name]), CHART_PARAM_DECIMALS[name]) + 0.0 for name in FORECAST_INPUTS}
+    if any(not math.isfinite(value) or value < 0 for value in params.values()):
+        raise ValueError("Wszystkie wartości muszą być dodatnie!")
+    return params
+
+
+def chart_key(kind: str, fmt: str, params: Dict[str, float]) -> str:
+    """Skrót SHA-256 opisu wykresu - adres w cache i ETag."""
+    payload = json.dumps({"kind": kind, "format": fmt, "version": CHART_VERSION, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_chart(kind: str, fmt: str, params: Dict[str, float]) -> Tuple[str, bytes]:
+    """
+    Zwraca wykres z cache lub renderuje go przy pierwszym żądaniu.
+
+    Args:
+        kind (str): Rodzaj wykresu (klucz CHART_KINDS)
+        fmt (str): "png" lub "svg"
+        params (Dict[str, float]): Wejścia z chart_params
+
+    Returns:
+        Tuple[str, bytes]: Skrót wykresu i zawartość pliku
+    """
+    if kind not in CHART_KINDS:
+        raise ValueError(f"Nieznany wykres: {kind}")
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Nieobsługiwany format wykresu: {fmt}")
+    key = chart_key(kind, fmt, params)
+
+    def render() -> bytes:
+        canvas = _PngCanvas(CHART_WIDTH, CHART_HEIGHT) if fmt == "png" else _SvgCanvas(CHART_WIDTH, CHART_HEIGHT)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            CHART_KINDS[kind](canvas, params)
+        return canvas.to_bytes()
+
+    return key, get_chart_cache().get_or_compute(f"chart:{key}", render, ttl=CHART_CACHE_TTL, codec=RAW_CODEC)
+
+
+_chart_cache: Optional[Cache] = None
+_chart_cache_guard = threading.Lock()
+
+
+def get_chart_cache() -> Cache:
+    """Zwraca magazyn wykresów (backend z CHART_CACHE_URL ograniczony do CHART_CACHE_MAX_MB)."""
+    global _chart_cache
+    with _chart_cache_guard:
+        if _chart_cache is None:
+            _chart_cache = Cache(create_backend(CHART_CACHE_URL, "charts", int(CHART_CACHE_MAX_MB * 1024 * 1024)))
+    return _chart_cache
+
+
+def chart_url(kind: str, results: Mapping[str, Any], fmt: str = "svg") -> str:
+    """Adres wykresu dla wyników prognozy (do użycia w szablonach)."""
+    return f"/charts/{kind}.{fmt}?{urlencode(chart_params(results))}"
@@ -0,0 +1,276 @@
+"""
+Wsadowy kalkulator prognoz uruchamiany z linii poleceń (bez serwera WWW).
+
+Przykład:
+    python -m app.cli scenariusze.csv -o wyniki.csv --mode forecast
+    python -m app.cli budzety.jsonl -o wyniki.xlsx --mode budget --workers 8
+
+Plik wejściowy (CSV / JSONL / XLSX) zawiera kolumny wejść kalkulatora
+(np. gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions)
+i opcjonalnie kolumnę as_of z datą kursu EUR/PLN.
+
+Wiersze są przetwarzane paczkami w puli procesów: proces główny tylko czyta plik,
+a procesy robocze zamieniają wiersze na kolumny, ustalają kursy i liczą wskaźniki.
+Każda paczka trafia do osobnego pliku częściowego, więc przerwane zadanie po ponownym
+uruchomieniu pomija gotowe paczki.
+"""
+from typing import Dict, Any, Iterator, List, Optional
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+import openpyxl
+from openpyxl import Workbook
+
+from .metrics import BATCH_MODES, evaluate_batch
+from .utils import get_eur_rate_from_nbp, resolve_eur_rates
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Limit wierszy arkusza Excel (bez nagłówka)
+XLSX_MAX_ROWS = 1_048_575
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Czyta scenariusze z pliku CSV, JSONL lub XLSX wiersz po wierszu.
+
+    Args:
+        path (str): Ścieżka do pliku wejściowego
+
+    Returns:
+        Iterator[Dict[str, Any]]: Kolejne wiersze jako słowniki
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == ".xlsx":
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            if ws is None:
+                return
+            rows = ws.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+            for row in rows:
+                if row and any(cell is not None for cell in row):
+                    yield dict(zip(header, row))
+        finally:
+            wb.close()
+    else:
+        raise ValueError(f"Nieobsługiwany format pliku: {extension} (dozwolone: .csv, .jsonl, .xlsx)")
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Dzieli strumień wierszy na paczki po chunk_size wierszy."""
+    chunk: List[Dict[str, Any]] = []
+    for row in read_rows(path):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _part_path(parts_dir: str, index: int) -> str:
+    return os.path.join(parts_dir, f"chunk_{index:06d}.csv")
+
+
+def _check_manifest(parts_dir: str, input_path: str, mode: str, chunk_size: int) -> None:
+    """Pilnuje, aby wznawiane zadanie miało ten sam plik wejściowy, tryb i rozmiar paczek."""
+    stat = os.stat(input_path)
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "mode": mode,
+        "chunk_size": chunk_size,
+    }
+    manifest_path = os.path.join(parts_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            if json.load(f) != manifest:
+                raise ValueError(f"Katalog {parts_dir} pochodzi z innego zadania - uruchom ponownie z --restart")
+    else:
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+
+def process_chunk(mode: str, index: int, chunk: List[Dict[str, Any]], current_rate: float, parts_dir: str) -> int:
+    """
+    Liczy wskaźniki dla paczki w procesie roboczym i zapisuje ją do pliku częściowego.
+
+    Kursy historyczne (kolumna as_of) są ustalane tutaj - zapytania do NBP i cache kursów
+    nie blokują procesu głównego czytającego kolejne paczki.
+
+    Args:
+        mode (str): "forecast" lub "budget"
+        index (int): Numer paczki
+        chunk (List[Dict[str, Any]]): Wiersze paczki z pliku wejściowego
+        current_rate (float): Kurs EUR/PLN dla wierszy bez as_of
+        parts_dir (str): Katalog plików częściowych
+
+    Returns:
+        int: Liczba przetworzonych wierszy
+    """
+    _, inputs, _ = BATCH_MODES[mode]
+    columns = {name: [row.get(name) for row in chunk] for name in inputs}
+    columns["as_of"] = [row.get("as_of") or "" for row in chunk]
+    eur_rates = resolve_eur_rates(chunk, current_rate)
+    values = evaluate_batch(mode, {name: columns[name] for name in inputs}, eur_rates)
+
+    out_columns: List[List[Any]] = [columns[name] for name in inputs]
+    out_columns.append(columns["as_of"])
+    out_columns.extend(values.values())
+
+    path = _part_path(parts_dir, index)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(zip(*out_columns))
+    os.replace(tmp_path, path)
+    return len(eur_rates)
+
+
+def merge_parts(parts_dir: str, output: str, header: List[str], chunk_count: int) -> None:
+    """Łączy pliki częściowe w plik wynikowy CSV lub XLSX."""
+    parts = [_part_path(parts_dir, i) for i in range(chunk_count)]
+    if output.lower().endswith(".xlsx"):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Prognozy")
+        ws.append(header)
+        for part in parts:
+            with open(part, newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    ws.append([_cell_value(cell) for cell in row])
+        wb.save(output)
+    else:
+        with open(output, "w", newline="", encoding="utf-8") as out:
+            csv.writer(out).writerow(header)
+            for part in parts:
+                with open(part, newline="", encoding="utf-8") as f:
+                    shutil.copyfileobj(f, out)
+
+
+def _cell_value(text: str) -> Any:
+    """Zamienia tekst z pliku częściowego na liczbę dla arkusza Excel (jeśli to możliwe)."""
+    if text in ("True", "False"):
+        return text == "True"
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    mode: str = "forecast",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    restart: bool = False
+) -> int:
+    """
+    Przelicza wszystkie scenariusze z pliku wejściowego w puli procesów.
+
+    Args:
+        input_path (str): Plik wejściowy (CSV / JSONL / XLSX)
+        output_path (str): Plik wynikowy (CSV / XLSX)
+        mode (str): "forecast" (calculate_forecast_from_metrics) lub "budget" (calculate_budget_from_tacos)
+        chunk_size (int): Liczba wierszy w paczce
+        workers (Optional[int]): Liczba procesów (domyślnie liczba rdzeni)
+        restart (bool): Ignoruje paczki z poprzedniego, przerwanego uruchomienia
+
+    Returns:
+        int: Liczba przetworzonych wierszy
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"Nieznany tryb: {mode}")
+    _, inputs, output_columns = BATCH_MODES[mode]
+    workers = workers or os.cpu_count() or 1
+    parts_dir = output_path + ".parts"
+    if restart and os.path.isdir(parts_dir):
+        shutil.rmtree(parts_dir)
+    os.makedirs(parts_dir, exist_ok=True)
+    _check_manifest(parts_dir, input_path, mode, chunk_size)
+
+    current_rate = get_eur_rate_from_nbp()
+    started = time.time()
+    total_rows = 0
+    rows_read = 0
+    chunk_count = 0
+    skipped = 0
+    pending: List[Future] = []
+    max_rows = XLSX_MAX_ROWS if output_path.lower().endswith(".xlsx") else None
+
+    def collect(block: bool, keep: int = 0) -> None:
+        """Odbiera gotowe paczki (block - czeka, aż w kolejce zostanie najwyżej keep paczek)."""
+        nonlocal total_rows
+        while len(pending) > keep and (block or pending[0].done()):
+            total_rows += pending.pop(0).result()
+            elapsed = max(time.time() - started, 1e-9)
+            print(f"\rPrzetworzono {total_rows:,} wierszy ({total_rows / elapsed:,.0f} wierszy/s)".replace(",", " "),
+                  end="", file=sys.stderr, flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, chunk in enumerate(read_chunks(input_path, chunk_size)):
+            chunk_count = index + 1
+            rows_read += len(chunk)
+            # Limit arkusza sprawdzany w trakcie czytania - bez liczenia paczek, których nie da się zapisać
+            if max_rows is not None and rows_read > max_rows:
+                for future in pending:
+                    future.cancel()
+                raise ValueError(f"Wynik ma ponad {max_rows} wierszy - za dużo dla XLSX, użyj formatu CSV")
+            if os.path.exists(_part_path(parts_dir, index)):
+                # Paczka gotowa w poprzednim uruchomieniu
+                total_rows += len(chunk)
+                skipped += 1
+                continue
+            missing = [name for name in inputs if name not in chunk[0]]
+            if missing:
+                raise ValueError(f"Brak kolumn w pliku wejściowym: {', '.join(missing)}")
+            pending.append(executor.submit(process_chunk, mode, index, chunk, current_rate, parts_dir))
+            # Ograniczenie liczby paczek w pamięci
+            if len(pending) >= workers * 2:
+                collect(block=False)
+                collect(block=True, keep=workers * 2 - 1)
+        collect(block=True)
+    print(file=sys.stderr)
+
+    header = list(inputs) + ["as_of"] + [name for name, _, _ in output_columns]
+    merge_parts(parts_dir, output_path, header, chunk_count)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    if skipped:
+        print(f"Wznowiono: pominięto {skipped} gotowych paczek", file=sys.stderr)
+    return total_rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Wsadowy kalkulator prognoz ACOS / budżetu TACOS")
+    parser.add_argument("input", help="Plik ze scenariuszami (.csv, .jsonl, .xlsx)")
+    parser.add_argument("-o", "--output", required=True, help="Plik wynikowy (.csv lub .xlsx)")
+    parser.add_argument("--mode", choices=sorted(BATCH_MODES), default="forecast", help="Rodzaj kalkulacji")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Liczba wierszy w paczce")
+    parser.add_argument("--workers", type=int, default=None, help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--restart", action="store_true", help="Nie wznawiaj przerwanego zadania, licz od początku")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = run_batch(args.input, args.output, args.mode, args.chunk_size, args.workers, args.restart)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    print(f"Zapisano {rows} wierszy do {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
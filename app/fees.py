@@ -0,0 +1,416 @@
+"""
+Model opłat Amazon (prowizja od sprzedaży, FBA, magazynowanie) i marża brutto per ASIN.
+
+Tabele opłat są przeliczane przy starcie do posortowanych tablic progów (kwoty w stałym
+przecinku z app.money i gramy) osobno dla każdego marketplace'u. Stawki wyszukiwane są jednym
+np.searchsorted dla całej partii ASIN-ów - klucz łączy indeks kategorii / progu
+rozmiaru z ceną / wagą, więc wszystkie kategorie i progi mieszczą się w jednej tablicy.
+
+Stawki są orientacyjne (cennik Amazon EU 2024) - aktualizuj je z cennikiem
+marketplace'u przed wyceną.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .money import MICRO_UNITS, to_micro, money_mul, to_output
+from .metrics import BATCH_MODES, evaluate_batch
+
+# Prowizja od sprzedaży (od ceny z VAT): kategoria -> (krańcowa, progi (od ceny EUR, %), minimalna opłata EUR).
+# Krańcowa: stawka dotyczy części ceny powyżej progu; inaczej stawka progu dotyczy całej ceny.
+REFERRAL_FEES: Dict[str, Tuple[bool, Tuple[Tuple[float, float], ...], float]] = {
+    "default": (False, ((0, 15.0),), 0.30),
+    "baby": (False, ((0, 8.0), (10, 15.0)), 0.30),
+    "beauty": (False, ((0, 8.0), (10, 15.0)), 0.30),
+    "books": (False, ((0, 15.0),), 0.0),
+    "clothing": (False, ((0, 5.0), (15, 10.0), (20, 15.0)), 0.30),
+    "computers": (False, ((0, 7.0),), 0.30),
+    "electronics": (False, ((0, 7.0),), 0.30),
+    "electronics_accessories": (True, ((0, 15.0), (100, 8.0)), 0.30),
+    "furniture": (True, ((0, 15.0), (200, 10.0)), 0.30),
+    "garden": (False, ((0, 15.0),), 0.30),
+    "grocery": (False, ((0, 8.0), (10, 15.0)), 0.0),
+    "health": (False, ((0, 8.0), (10, 15.0)), 0.30),
+    "home": (False, ((0, 15.0),), 0.30),
+    "jewellery": (True, ((0, 20.0), (250, 5.0)), 0.30),
+    "kitchen": (False, ((0, 15.0),), 0.30),
+    "large_appliances": (False, ((0, 7.0),), 0.30),
+    "pet_supplies": (False, ((0, 15.0),), 0.30),
+    "shoes": (False, ((0, 15.0),), 0.30),
+    "sports": (False, ((0, 15.0),), 0.30),
+    "tools": (False, ((0, 13.0),), 0.30),
+    "toys": (False, ((0, 15.0),), 0.30),
+    "watches": (True, ((0, 15.0), (250, 5.0)), 0.30),
+}
+
+# Progi rozmiaru FBA od najmniejszego: (nazwa, najdłuższy, środkowy, najkrótszy bok cm, maks. waga g,
+# opakowanie g, waga wymiarowa, gabaryt). Pierwszy próg, w którym mieści się produkt, wyznacza opłatę.
+SIZE_TIERS: Tuple[Tuple[str, float, float, float, int, int, bool, bool], ...] = (
+    ("small_envelope", 20, 15, 1, 80, 20, False, False),
+    ("standard_envelope", 33, 23, 2.5, 460, 40, False, False),
+    ("large_envelope", 33, 23, 4, 960, 40, False, False),
+    ("extra_large_envelope", 33, 23, 6, 960, 40, False, False),
+    ("small_parcel", 35, 25, 12, 3900, 100, True, False),
+    ("standard_parcel", 45, 34, 26, 11900, 100, True, False),
+    ("small_oversize", 61, 46, 46, 1760, 240, True, True),
+    ("standard_oversize", 120, 60, 60, 29760, 240, True, True),
+    ("bulky_oversize", 175, 120, 120, 31500, 240, True, True),
+)
+
+# Opłata FBA za sztukę (Amazon.de): próg rozmiaru -> (górna granica wagi wysyłkowej g, opłata EUR)
+FBA_WEIGHT_BANDS: Dict[str, Tuple[Tuple[int, float], ...]] = {
+    "small_envelope": ((20, 1.86), (40, 1.89), (60, 1.92), (80, 1.95)),
+    "standard_envelope": ((60, 2.10), (210, 2.29), (460, 2.52)),
+    "large_envelope": ((960, 2.99),),
+    "extra_large_envelope": ((960, 3.49),),
+    "small_parcel": ((150, 3.45), (400, 3.69), (900, 4.07), (1400, 4.46), (1900, 4.80), (3900, 6.05)),
+    "standard_parcel": ((150, 3.58), (400, 3.95), (900, 4.45), (1400, 4.98), (1900, 5.43), (2900, 6.13),
+                        (3900, 6.54), (5900, 7.21), (8900, 8.41), (11900, 9.00)),
+    "small_oversize": ((760, 6.37), (1010, 6.60), (1260, 6.63), (1510, 6.67), (1760, 6.86)),
+    "standard_oversize": ((760, 7.02), (1760, 7.62), (2760, 8.26), (3760, 8.33), (4760, 8.43), (9760, 9.34),
+                          (14760, 10.02), (19760, 10.64), (24760, 11.83), (29760, 12.02)),
+    "bulky_oversize": ((4760, 11.06), (9760, 12.86), (14760, 13.73), (19760, 14.45), (24760, 15.94), (31500, 16.71)),
+}
+
+# Waga wymiarowa: objętość cm³ / DIMENSIONAL_DIVISOR = kg
+DIMENSIONAL_DIVISOR = 5000
+PEAK_MONTHS = (10, 11, 12)
+
+# Marketplace -> VAT %, mnożnik opłat FBA względem Amazon.de, magazynowanie EUR/m³ miesięcznie
+# (standard poza sezonem, standard X-XII, gabaryt poza sezonem, gabaryt X-XII)
+MARKETPLACES: Dict[str, Dict[str, Any]] = {
+    "de": {"vat": 19.0, "fba_factor": 1.00, "storage": (27.54, 42.14, 19.80, 29.40)},
+    "fr": {"vat": 20.0, "fba_factor": 1.09, "storage": (26.00, 36.00, 19.50, 26.00)},
+    "it": {"vat": 22.0, "fba_factor": 1.07, "storage": (26.00, 36.00, 19.50, 26.00)},
+    "es": {"vat": 21.0, "fba_factor": 1.00, "storage": (26.00, 36.00, 19.50, 26.00)},
+    "nl": {"vat": 21.0, "fba_factor": 1.02, "storage": (26.00, 36.00, 19.50, 26.00)},
+}
+
+CATEGORY_NAMES: Tuple[str, ...] = tuple(sorted(REFERRAL_FEES))
+TIER_NAMES: Tuple[str, ...] = tuple(tier[0] for tier in SIZE_TIERS)
+# Odstęp kluczy między kategoriami / progami - większy od każdej ceny (10^-6 EUR, poniżej MAX_PRICE) i wagi w gramach
+_KEY_STRIDE = 10 ** 12
+# Najwyższa obsługiwana cena (EUR) - wyższa nachodziłaby na klucze następnej kategorii
+MAX_PRICE = _KEY_STRIDE // MICRO_UNITS
+
+
+class FeeTable:
+    """
+    Indeksowane tabele opłat jednego marketplace'u.
+
+    Wszystkie kwoty w milionowych częściach EUR (int64), progi posortowane - stawki dla partii ASIN-ów
+    wyznaczane są wyszukiwaniem binarnym (np.searchsorted) bez pętli po wierszach.
+    """
+
+    def __init__(self, marketplace: str):
+        if marketplace not in MARKETPLACES:
+            raise ValueError(f"Nieznany marketplace: {marketplace}")
+        config = MARKETPLACES[marketplace]
+        self.marketplace = marketplace
+        self.vat = config["vat"]
+
+        # Prowizja: klucz = kategoria × _KEY_STRIDE + dolny próg ceny (to_micro)
+        keys, rates, anchors, bases, minimums = [], [], [], [], []
+        for index, name in enumerate(CATEGORY_NAMES):
+            marginal, tiers, minimum = REFERRAL_FEES[name]
+            base = 0.0
+            for j, (lower, rate) in enumerate(tiers):
+                lower_micro = int(to_micro(lower))
+                keys.append(index * _KEY_STRIDE + lower_micro)
+                rates.append(rate)
+                # Stawka krańcowa: opłata za niższe progi + stawka od nadwyżki ponad próg
+                anchors.append(lower_micro if marginal else 0)
+                bases.append(base if marginal else 0.0)
+                if marginal and j + 1 < len(tiers):
+                    base += (to_micro(tiers[j + 1][0]) - lower_micro) * rate / 100
+            minimums.append(int(to_micro(minimum)))
+        self._referral_keys = np.array(keys, dtype=np.int64)
+        self._referral_rates = np.array(rates)
+        self._referral_anchors = np.array(anchors, dtype=np.int64)
+        self._referral_bases = np.array(bases)
+        self._referral_minimums = np.array(minimums, dtype=np.int64)
+
+        # Progi rozmiaru: limity (najdłuższy, środkowy, najkrótszy, waga)
+        self._tier_limits = np.array([tier[1:5] for tier in SIZE_TIERS], dtype=np.float64)
+        self._tier_packaging = np.array([tier[5] for tier in SIZE_TIERS], dtype=np.float64)
+        self._tier_dimensional = np.array([tier[6] for tier in SIZE_TIERS])
+        self._tier_oversize = np.array([tier[7] for tier in SIZE_TIERS])
+
+        # Opłata FBA: klucz = próg rozmiaru × _KEY_STRIDE + górna granica wagi (g)
+        fba_keys, fba_fees, tier_max_weight = [], [], []
+        for index, name in enumerate(TIER_NAMES):
+            bands = FBA_WEIGHT_BANDS[name]
+            for upper, fee in bands:
+                fba_keys.append(index * _KEY_STRIDE + upper)
+                fba_fees.append(fee)
+            tier_max_weight.append(bands[-1][0])
+        self._fba_keys = np.array(fba_keys, dtype=np.int64)
+        self._fba_fees = to_micro(np.array(fba_fees) * config["fba_factor"])
+        self._tier_max_weight = np.array(tier_max_weight, dtype=np.float64)
+
+        standard_off, standard_peak, oversize_off, oversize_peak = config["storage"]
+        self._storage_rates = {
+            "off": np.array([standard_off, oversize_off]),
+            "peak": np.array([standard_peak, oversize_peak]),
+        }
+
+    def category_indices(self, categories: Sequence[str]) -> np.ndarray:
+        """Nazwy kategorii -> indeksy w tabeli prowizji (błąd dla nieznanych kategorii)."""
+        names, inverse = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        unknown = [name for name in names if name not in REFERRAL_FEES]
+        if unknown:
+            raise ValueError(f"Nieznane kategorie: {', '.join(unknown)}")
+        lookup = np.array([CATEGORY_NAMES.index(name) for name in names], dtype=np.int64)
+        return lookup[inverse]
+
+    def referral_fees(self, price_micro: np.ndarray, category: np.ndarray) -> np.ndarray:
+        """Prowizja od sprzedaży dla cen i indeksów kategorii (kwoty z to_micro)."""
+        tier = np.searchsorted(self._referral_keys, category * _KEY_STRIDE + price_micro, side="right") - 1
+        fee = self._referral_bases[tier] + (price_micro - self._referral_anchors[tier]) * self._referral_rates[tier] / 100
+        return np.maximum(money_mul(1, fee), self._referral_minimums[category])
+
+    def size_tiers(self, length: Any, width: Any, height: Any, weight: Any) -> np.ndarray:
+        """
+        Próg rozmiaru FBA dla wymiarów (cm) i wagi (g).
+
+        Returns:
+            np.ndarray: Indeks w SIZE_TIERS lub -1 dla produktów ponadgabarytowych (poza tabelą)
+        """
+        dims = np.sort(np.stack(np.broadcast_arrays(
+            np.asarray(length, dtype=np.float64), np.asarray(width, dtype=np.float64), np.asarray(height, dtype=np.float64)
+        ), axis=-1), axis=-1)[..., ::-1]
+        fits = (dims[:, None, :] <= self._tier_limits[None, :, :3]).all(axis=-1)
+        fits &= np.asarray(weight, dtype=np.float64)[:, None] <= self._tier_limits[None, :, 3]
+        return np.where(fits.any(axis=1), fits.argmax(axis=1), -1)
+
+    def shipping_weights(self, tier: np.ndarray, length: Any, width: Any, height: Any, weight: Any) -> np.ndarray:
+        """Waga wysyłkowa (g): waga jednostkowa lub wymiarowa (paczki i gabaryty) + opakowanie progu."""
+        weight = np.asarray(weight, dtype=np.float64)
+        dimensional = np.asarray(length, dtype=np.float64) * width * height / DIMENSIONAL_DIVISOR * 1000
+        shipping = np.where(self._tier_dimensional[tier], np.maximum(weight, dimensional), weight)
+        return shipping + self._tier_packaging[tier]
+
+    def fulfilment_fees(self, tier: np.ndarray, shipping_weight: np.ndarray) -> np.ndarray:
+        """Opłata FBA (to_micro) - pasmo wagi w obrębie progu rozmiaru (waga ponad pasma liczona jak ostatnie)."""
+        grams = np.ceil(np.minimum(shipping_weight, self._tier_max_weight[tier])).astype(np.int64)
+        band = np.searchsorted(self._fba_keys, tier * _KEY_STRIDE + grams, side="left")
+        return self._fba_fees[band]
+
+    def storage_fees(self, tier: np.ndarray, length: Any, width: Any, height: Any, months: Any, month: Optional[int]) -> np.ndarray:
+        """
+        Opłata magazynowa na sztukę (to_micro).
+
+        Args:
+            months (Any): Średni czas składowania sztuki w miesiącach
+            month (Optional[int]): Miesiąc stawki (1-12); None - średnia roczna (9 miesięcy poza sezonem, 3 w sezonie)
+        """
+        volume = np.asarray(length, dtype=np.float64) * width * height / 1e6
+        oversize = self._tier_oversize[tier].astype(np.int64)
+        if month is None:
+            rates = (self._storage_rates["off"] * (12 - len(PEAK_MONTHS)) + self._storage_rates["peak"] * len(PEAK_MONTHS)) / 12
+        else:
+            rates = self._storage_rates["peak" if month in PEAK_MONTHS else "off"]
+        return money_mul(MICRO_UNITS, volume * rates[oversize] * months)
+
+    def compute(
+        self,
+        price: Any,
+        length: Any,
+        width: Any,
+        height: Any,
+        weight: Any,
+        category: Sequence[str],
+        unit_cost: Any,
+        storage_months: Any = 1.0,
+        month: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Opłaty i marża brutto dla partii ASIN-ów jednym przebiegiem na tablicach.
+
+        Args:
+            price (Any): Cena sprzedaży z VAT w EUR
+            length (Any): Wymiary opakowania w cm (kolejność boków dowolna)
+            width (Any): Wymiary opakowania w cm
+            height (Any): Wymiary opakowania w cm
+            weight (Any): Waga jednostkowa w gramach
+            category (Sequence[str]): Kategoria prowizji (klucz REFERRAL_FEES)
+            unit_cost (Any): Koszt jednostkowy (zakup + transport do FBA) w EUR netto
+            storage_months (Any): Średni czas składowania sztuki w miesiącach
+            month (Optional[int]): Miesiąc stawki magazynowej (None - średnia roczna)
+
+        Returns:
+            Dict[str, np.ndarray]: Kwoty w stałym przecinku (*_micro), próg rozmiaru i gross_margin w procentach
+                (-1 / NaN dla produktów poza tabelą FBA)
+        """
+        price_micro = np.atleast_1d(to_micro(price))
+        size = price_micro.size
+        length, width, height, weight = (
+            np.broadcast_to(np.asarray(value, dtype=np.float64), (size,)) for value in (length, width, height, weight)
+        )
+        if any((value <= 0).any() for value in (length, width, height, weight)) or (price_micro <= 0).any():
+            raise ValueError("Cena, wymiary i waga muszą być dodatnie!")
+        if (price_micro >= _KEY_STRIDE).any():
+            raise ValueError(f"Cena musi być niższa niż {MAX_PRICE} EUR")
+        category_index = self.category_indices(np.broadcast_to(np.asarray(category, dtype=str), (size,)))
+
+        tier = self.size_tiers(length, width, height, weight)
+        supported = tier >= 0
+        known_tier = np.where(supported, tier, 0)
+        referral = self.referral_fees(price_micro, category_index)
+        fulfilment = self.fulfilment_fees(known_tier, self.shipping_weights(known_tier, length, width, height, weight))
+        storage = self.storage_fees(known_tier, length, width, height, storage_months, month)
+        fees = referral + fulfilment + storage
+
+        # Przychód netto: cena bez VAT; marża względem ceny (AOV) - sprzedaż × marża% = zysk brutto
+        net_price = money_mul(price_micro, 100 / (100 + self.vat))
+        profit = net_price - np.broadcast_to(to_micro(unit_cost), (size,)) - fees
+        margin = profit * 100 / price_micro
+        return {
+            "size_tier": tier,
+            "referral_fee_micro": referral,
+            "fba_fee_micro": fulfilment,
+            "storage_fee_micro": storage,
+            "total_fees_micro": fees,
+            "net_price_micro": net_price,
+            "profit_per_unit_micro": profit,
+            "gross_margin": np.where(supported, margin, np.nan),
+        }
+
+
+_fee_tables: Dict[str, FeeTable] = {}
+
+
+def get_fee_table(marketplace: str = "de") -> FeeTable:
+    """Zwraca tabelę opłat marketplace'u (budowaną przy pierwszym użyciu)."""
+    if marketplace not in _fee_tables:
+        _fee_tables[marketplace] = FeeTable(marketplace)
+    return _fee_tables[marketplace]
+
+
+def compute_gross_margins(items: Dict[str, Any], marketplace: str = "de", storage_months: float = 1.0, month: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Marża brutto dla wielu ASIN-ów (kolumny) - wynik "gross_margin" można podać wprost
+    do calculate_forecast_from_metrics / calculate_budget_from_tacos lub evaluate_batch.
+
+    Args:
+        items (Dict[str, Any]): Kolumny price, length, width, height, weight, category, unit_cost
+        marketplace (str): Marketplace (klucz MARKETPLACES)
+        storage_months (float): Średni czas składowania sztuki w miesiącach
+        month (Optional[int]): Miesiąc stawki magazynowej (None - średnia roczna)
+
+    Returns:
+        Dict[str, np.ndarray]: Wynik FeeTable.compute
+    """
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError("Miesiąc musi być z zakresu 1-12")
+    if storage_months < 0:
+        raise ValueError("Czas składowania nie może być ujemny")
+    missing = [name for name in ("price", "length", "width", "height", "weight", "unit_cost") if name not in items]
+    if missing:
+        raise ValueError(f"Brak kolumn: {', '.join(missing)}")
+    return get_fee_table(marketplace).compute(
+        items["price"], items["length"], items["width"], items["height"], items["weight"],
+        items.get("category", "default"), items["unit_cost"], storage_months, month
+    )
+
+
+def margin_rows(columns: Dict[str, np.ndarray], ids: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Wyniki compute_gross_margins jako lista słowników (do odpowiedzi JSON)."""
+    tiers = columns["size_tier"].tolist()
+    margins = np.round(columns["gross_margin"], 2).tolist()
+    amounts = {
+        name[:-len("_micro")]: to_output(columns[name]).tolist()
+        for name in ("referral_fee_micro", "fba_fee_micro", "storage_fee_micro", "total_fees_micro", "profit_per_unit_micro")
+    }
+    rows = []
+    for i, item_id in enumerate(ids):
+        supported = tiers[i] >= 0
+        rows.append({
+            "id": item_id,
+            "size_tier": TIER_NAMES[tiers[i]] if supported else "unsupported",
+            "gross_margin": margins[i] if supported else None,
+            **{name: values[i] if supported or name == "referral_fee" else None for name, values in amounts.items()},
+        })
+    return rows
+
+
+def item_error(item: Dict[str, Any]) -> Optional[str]:
+    """Błąd danych pojedynczego ASIN-u (cena, wymiary, waga) albo None - jak walidacja FeeTable.compute."""
+    price = item["price"]
+    if not price > 0:
+        return "Cena musi być dodatnia!"
+    if price >= MAX_PRICE:
+        return f"Cena musi być niższa niż {MAX_PRICE} EUR"
+    if not all(item[name] > 0 for name in ("length_cm", "width_cm", "height_cm", "weight_g")):
+        return "Wymiary i waga muszą być dodatnie!"
+    return None
+
+
+def asin_margin_report(
+    items: List[Dict[str, Any]],
+    marketplace: str = "de",
+    storage_months: float = 1.0,
+    month: Optional[int] = None,
+    forecast: Optional[Dict[str, float]] = None,
+    budget: Optional[Dict[str, float]] = None,
+    eur_rate: float = 4.30
+) -> Dict[str, Any]:
+    """
+    Marża per ASIN i opcjonalnie prognoza / budżet TACOS z wyliczoną marżą (AOV = cena).
+
+    Args:
+        items (List[Dict[str, Any]]): ASIN-y: asin, price, length_cm, width_cm, height_cm, weight_g, category, unit_cost
+        marketplace (str): Marketplace (klucz MARKETPLACES)
+        storage_months (float): Średni czas składowania sztuki w miesiącach
+        month (Optional[int]): Miesiąc stawki magazynowej (None - średnia roczna)
+        forecast (Optional[Dict[str, float]]): target_ctr, target_cpc, target_cvr, impressions - wspólne dla ASIN-ów
+        budget (Optional[Dict[str, float]]): target_sales, target_tacos - wspólne dla ASIN-ów
+        eur_rate (float): Kurs EUR/PLN
+
+    Returns:
+        Dict[str, Any]: Wiersze per ASIN (opłaty, gross_margin, forecast / budget);
+            ASIN-y z błędnymi danymi (item_error) mają pole "error" zamiast opłat
+    """
+    # Błędny ASIN dostaje błąd w swoim wierszu, pozostałe są wyceniane
+    errors = [item_error(item) for item in items]
+    priced = [i for i, error in enumerate(errors) if error is None]
+    rows: List[Dict[str, Any]] = [
+        {"id": item.get("asin"), "size_tier": None, "gross_margin": None, "error": error,
+         **{name: None for name in ("referral_fee", "fba_fee", "storage_fee", "total_fees", "profit_per_unit")}}
+        for item, error in zip(items, errors)
+    ]
+    if not priced:
+        return {"marketplace": marketplace, "currency": "EUR", "items": rows}
+    columns = compute_gross_margins({
+        "price": [items[i]["price"] for i in priced],
+        "length": [items[i]["length_cm"] for i in priced],
+        "width": [items[i]["width_cm"] for i in priced],
+        "height": [items[i]["height_cm"] for i in priced],
+        "weight": [items[i]["weight_g"] for i in priced],
+        "category": [items[i].get("category", "default") for i in priced],
+        "unit_cost": [items[i].get("unit_cost", 0.0) for i in priced],
+    }, marketplace, storage_months, month)
+    for index, row in zip(priced, margin_rows(columns, [items[i].get("asin") for i in priced])):
+        rows[index] = row
+
+    # Prognozy tylko dla ASIN-ów z wyliczoną marżą (w tabeli FBA), z marżą jak w odpowiedzi -
+    # wynik jest równy wywołaniu kalkulatora z tą marżą
+    tier_supported = np.flatnonzero(columns["size_tier"] >= 0)
+    supported = np.asarray(priced)[tier_supported]
+    margins = np.round(columns["gross_margin"][tier_supported], 2)
+    prices = np.asarray([items[i]["price"] for i in supported], dtype=np.float64)
+    for mode, params, extra in (("forecast", forecast, {"target_aov": prices}), ("budget", budget, {})):
+        if params is None or not supported.size:
+            continue
+        _, input_names, _ = BATCH_MODES[mode]
+        inputs = {**params, **extra, "gross_margin": margins}
+        missing = [name for name in input_names if name not in inputs]
+        if missing:
+            raise ValueError(f"Brak parametrów {mode}: {', '.join(missing)}")
+        if any(np.any(np.asarray(inputs[name]) < 0) for name in input_names if name != "gross_margin"):
+            raise ValueError("Wszystkie wartości muszą być dodatnie!")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results = evaluate_batch(mode, inputs, eur_rate)
+        for position, index in enumerate(supported):
+            rows[index][mode] = {name: values[position] for name, values in results.items()}
+
+    return {"marketplace": marketplace, "currency": "EUR", "items": rows}
@@ -1,12 +1,22 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Dict
+from pydantic import BaseModel
 import os
-from .utils import calculate_acos, calculate_forecast_from_metrics, calculate_budget_from_tacos, generate_export_data, get_eur_rate_from_nbp, create_excel_report
+from .utils import calculate_acos, calculate_forecast_from_metrics, calculate_budget_from_tacos, generate_export_data, get_eur_rate_info, create_excel_report
+from .bids import recommend_bids_for_report
+from .solver import solve_goals
+from .scenarios import get_scenario_store
+from .pacing import run_pacing, DAYS_IN_MONTH
+from .streaming import DuplexStreamingResponse, NDJSON_MEDIA_TYPE, stream_forecasts
+from .charts import CHART_KINDS, CHART_FORMATS, CHART_CACHE_CONTROL, chart_params, chart_key, chart_url, render_chart
+from .reports import load_report, load_cached_report, forecast_from_report
+from .fees import asin_margin_report
 import json
-from datetime import datetime
+from datetime import datetime, date
 
 # Inicjalizacja aplikacji FastAPI
 app = FastAPI(title="ACOS Forecast Calculator", description="Kalkulator prognoz ACOS")
@@ -14,6 +24,68 @@ app = FastAPI(title="ACOS Forecast Calculator", description="Kalkulator prognoz
 # Konfiguracja statycznych plików i szablonów
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["chart_url"] = chart_url
+
+class GoalSeekRequest(BaseModel):
+    """Pojedynczy cel solvera: ustal wskaźnik `output` = `target` zmieniając wejście `solve_for`"""
+    model: str = "forecast"
+    output: str
+    target: float
+    solve_for: str
+    inputs: Dict[str, float] = {}
+    bounds: Optional[List[float]] = None
+
+class SolveRequest(BaseModel):
+    goals: List[GoalSeekRequest]
+
+class ScenarioIn(BaseModel):
+    """Scenariusz do zapisania: wejścia kalkulatora `mode` ("forecast" lub "budget")"""
+    owner: str
+    name: str = ""
+    mode: str = "forecast"
+    inputs: Dict[str, float]
+    tags: List[str] = []
+
+class SaveScenariosRequest(BaseModel):
+    scenarios: List[ScenarioIn]
+
+class CompareScenariosRequest(BaseModel):
+    ids: List[int]
+
+class PacingCampaign(BaseModel):
+    """Kampania do symulacji tempa wydatków (budżet np. z kalkulatora budżetu TACOS)"""
+    name: str = ""
+    monthly_budget: float
+    monthly_impressions: float
+    ctr: float
+    cpc: float
+
+class PacingRequest(BaseModel):
+    campaigns: List[PacingCampaign]
+    hourly_traffic: Optional[List[float]] = None
+    dow_traffic: Optional[List[float]] = None
+    cpc_by_hour: Optional[List[float]] = None
+    days: int = DAYS_IN_MONTH
+    start_weekday: int = 0
+
+class AsinItem(BaseModel):
+    """Produkt do wyceny marży: cena z VAT (EUR), wymiary opakowania (cm), waga (g), koszt jednostkowy netto (EUR)"""
+    asin: str = ""
+    price: float
+    length_cm: float
+    width_cm: float
+    height_cm: float
+    weight_g: float
+    category: str = "default"
+    unit_cost: float = 0.0
+
+class AsinMarginRequest(BaseModel):
+    items: List[AsinItem]
+    marketplace: str = "de"
+    storage_months: float = 1.0
+    month: Optional[int] = None
+    forecast: Optional[Dict[str, float]] = None
+    budget: Optional[Dict[str, float]] = None
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -59,7 +131,8 @@ async def calculate_forecast(
     target_ctr: float = Form(..., description="Docelowy CTR w procentach"),
     target_cpc: float = Form(..., description="Docelowy koszt za kliknięcie"),
     target_cvr: float = Form(..., description="Docelowy współczynnik konwersji w procentach"),
-    impressions: int = Form(..., description="Liczba wyświetleń")
+    impressions: int = Form(..., description="Liczba wyświetleń"),
+    as_of: Optional[date] = Form(None, description="Dzień kursu EUR/PLN (domyślnie bieżący)")
 ):
     """Obliczanie prognoz na podstawie zaawansowanych metryk kampanii"""
     
@@ -74,12 +147,13 @@ async def calculate_forecast(
             "target_ctr": target_ctr,
             "target_cpc": target_cpc,
             "target_cvr": target_cvr,
-            "impressions": impressions
+            "impressions": impressions,
+            "as_of": as_of
         })
     
     # Obliczenie prognoz
     results = calculate_forecast_from_metrics(
-        gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions
+        gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions, as_of=as_of
     )
     
     return templates.TemplateResponse("index.html", {
@@ -91,7 +165,8 @@ async def calculate_forecast(
         "target_ctr": target_ctr,
         "target_cpc": target_cpc,
         "target_cvr": target_cvr,
-        "impressions": impressions
+        "impressions": impressions,
+        "as_of": as_of
     })
 
 @app.get("/budget", response_class=HTMLResponse)
@@ -104,7 +179,8 @@ async def calculate_budget(
     request: Request,
     target_sales: float = Form(..., description="Docelowa wartość sprzedaży w EUR"),
     target_tacos: float = Form(..., description="Zakładany TACOS w procentach"),
-    gross_margin: float = Form(..., description="Marża brutto w procentach")
+    gross_margin: float = Form(..., description="Marża brutto w procentach"),
+    as_of: Optional[date] = Form(None, description="Dzień kursu EUR/PLN (domyślnie bieżący)")
 ):
     """Obliczanie budżetu marketingowego na podstawie zakładanego TACOS"""
     if any(val < 0 for val in [target_sales, target_tacos, gross_margin]):
@@ -114,40 +190,113 @@ async def calculate_budget(
             "error": error_message,
             "target_sales": target_sales,
             "target_tacos": target_tacos,
-            "gross_margin": gross_margin
+            "gross_margin": gross_margin,
+            "as_of": as_of
         })
-    results = calculate_budget_from_tacos(target_sales, target_tacos, gross_margin)
+    results = calculate_budget_from_tacos(target_sales, target_tacos, gross_margin, as_of=as_of)
     return templates.TemplateResponse("budget.html", {
         "request": request,
         "results": results,
         "target_sales": target_sales,
         "target_tacos": target_tacos,
-        "gross_margin": gross_margin
+        "gross_margin": gross_margin,
+        "as_of": as_of
     })
 
 @app.post("/upload", response_class=HTMLResponse)
 async def upload_file(
     request: Request,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    gross_margin: float = Form(30, description="Marża brutto w procentach")
 ):
-    """Szablon funkcji do uploadu pliku CSV z metrykami"""
+    """Import raportu Amazon Sponsored Products (.xlsx) jako bazy prognozy"""
     
-    if not file.filename or not file.filename.endswith('.csv'):
-        error_message = "Proszę przesłać plik CSV!"
+    if not file.filename or not file.filename.lower().endswith('.xlsx'):
+        error_message = "Proszę przesłać raport Amazon Ads w formacie XLSX!"
         return templates.TemplateResponse("index.html", {
             "request": request,
             "error": error_message
         })
     
-    # Tutaj można dodać logikę przetwarzania pliku CSV
-    # Na razie zwracamy komunikat o pomyślnym przesłaniu
-    success_message = f"Plik {file.filename} został pomyślnie przesłany. Funkcja w trakcie rozwoju."
+    # Parsowanie strumieniowe w wątku, aby duży raport nie blokował pętli zdarzeń
+    try:
+        report = await run_in_threadpool(load_report, file.file, file.filename)
+    except Exception as e:
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": f"Nie udało się odczytać raportu: {e}"
+        })
+    
+    totals = report["totals"]
+    results = forecast_from_report(totals, gross_margin)
+    success_message = (
+        f"Wczytano raport {file.filename}: {report['meta']['rows']} wierszy, "
+        f"{report['meta']['groups']} słów kluczowych. Prognoza bazuje na rzeczywistych wskaźnikach. "
+        f"ID raportu: {report['report_id']}"
+    )
     
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "success": success_message
+        "success": success_message,
+        "results": results,
+        "forecast_mode": True,
+        "gross_margin": gross_margin,
+        "target_aov": results["target_aov"],
+        "target_ctr": results["target_ctr"],
+        "target_cpc": results["target_cpc"],
+        "target_cvr": results["target_cvr"],
+        "impressions": results["impressions"]
     })
 
+@app.get("/reports/{report_id}")
+async def report_forecast(report_id: str, gross_margin: float = 30, impressions: Optional[int] = None):
+    """Prognoza dla wcześniej przesłanego raportu (odczyt z cache'u kolumnowego)"""
+    try:
+        report = load_cached_report(report_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Raport nie istnieje w cache - prześlij plik ponownie")
+    return {
+        "report_id": report["report_id"],
+        "meta": report["meta"],
+        "totals": report["totals"],
+        "forecast": forecast_from_report(report["totals"], gross_margin, impressions)
+    }
+
+@app.get("/reports/{report_id}/bids")
+async def report_bids(
+    report_id: str,
+    target_acos: Optional[float] = None,
+    target_profit_per_order: Optional[float] = None,
+    gross_margin: Optional[float] = None
+):
+    """Rekomendowane stawki CPC per słowo kluczowe jako plik CSV do bulk upload"""
+    try:
+        report = load_cached_report(report_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Raport nie istnieje w cache - prześlij plik ponownie")
+    try:
+        content = await run_in_threadpool(
+            recommend_bids_for_report, report["columns"],
+            target_acos=target_acos,
+            target_profit_per_order=target_profit_per_order,
+            gross_margin=gross_margin
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"stawki_bulk_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return StreamingResponse(
+        iter([content]),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
 @app.post("/export-results")
 async def export_results(
     request: Request,
@@ -156,17 +305,18 @@ async def export_results(
     target_ctr: float = Form(...),
     target_cpc: float = Form(...),
     target_cvr: float = Form(...),
-    impressions: int = Form(...)
+    impressions: int = Form(...),
+    as_of: Optional[date] = Form(None)
 ):
     """Endpoint do eksportu wyników obliczeń w formacie Excel"""
     
     # Oblicz wyniki
     results = calculate_forecast_from_metrics(
-        gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions
+        gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions, as_of=as_of
     )
     
     # Wygeneruj raport Excel
-    excel_buffer = create_excel_report(results)
+    excel_buffer = create_excel_report(results, as_of=as_of)
     
     # Generuj nazwę pliku z datą
     filename = f"prognoza_acos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -180,15 +330,172 @@ async def export_results(
         }
     )
 
+@app.get("/charts/{kind}.{fmt}")
+async def chart(request: Request, kind: str, fmt: str):
+    """Wykres prognozy (PNG / SVG) adresowany wejściami - renderowany raz, potem z cache"""
+    try:
+        if kind not in CHART_KINDS:
+            raise HTTPException(status_code=404, detail="Nieznany wykres")
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Nieobsługiwany format wykresu: {fmt}")
+        params = chart_params(request.query_params)
+        etag = f'"{chart_key(kind, fmt, params)}"'
+        headers = {"Cache-Control": CHART_CACHE_CONTROL, "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        _, content = await run_in_threadpool(render_chart, kind, fmt, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=content, media_type=CHART_FORMATS[fmt], headers=headers)
+
+@app.post("/forecast/stream")
+async def forecast_stream(request: Request):
+    """Prognozy wsadowe NDJSON: scenariusze strumieniem w ciele żądania, wyniki strumieniem w odpowiedzi"""
+    current_rate = await run_in_threadpool(get_eur_rate_info)
+    return DuplexStreamingResponse(stream_forecasts(request.stream(), current_rate), media_type=NDJSON_MEDIA_TYPE)
+
+@app.post("/solve")
+async def solve(payload: SolveRequest):
+    """Solver odwrotny: wyznacza wartości wejść dla zadanych wskaźników (partia celów w jednym wywołaniu)"""
+    # Partia celów może być duża - solver poza pętlą zdarzeń
+    results = await run_in_threadpool(solve_goals, [goal.model_dump() for goal in payload.goals])
+    return {"results": results}
+
+@app.post("/budget-pacing")
+async def budget_pacing(payload: PacingRequest):
+    """Symulacja godzinowego tempa wydatków budżetu w miesiącu i rekomendowane limity dzienne"""
+    try:
+        return await run_in_threadpool(
+            run_pacing,
+            [campaign.model_dump() for campaign in payload.campaigns],
+            payload.hourly_traffic,
+            payload.dow_traffic,
+            payload.cpc_by_hour,
+            payload.days,
+            payload.start_weekday % 7
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/asin-margins")
+async def asin_margins(payload: AsinMarginRequest):
+    """Marża brutto per ASIN z tabel opłat Amazon (prowizja, FBA, magazynowanie) i opcjonalnie prognoza / budżet"""
+    eur_rate = (await run_in_threadpool(get_eur_rate_info))["rate"]
+    try:
+        return await run_in_threadpool(
+            asin_margin_report,
+            [item.model_dump() for item in payload.items],
+            payload.marketplace,
+            payload.storage_months,
+            payload.month,
+            payload.forecast,
+            payload.budget,
+            eur_rate
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/save-scenario", response_class=HTMLResponse)
+async def save_scenario(
+    request: Request,
+    owner: str = Form(..., description="Właściciel scenariusza"),
+    name: str = Form("", description="Nazwa scenariusza"),
+    tags: str = Form("", description="Tagi oddzielone przecinkami"),
+    gross_margin: float = Form(...),
+    target_aov: float = Form(...),
+    target_ctr: float = Form(...),
+    target_cpc: float = Form(...),
+    target_cvr: float = Form(...),
+    impressions: int = Form(...)
+):
+    """Zapisuje bieżącą prognozę z formularza jako scenariusz"""
+    inputs = {
+        "gross_margin": gross_margin,
+        "target_aov": target_aov,
+        "target_ctr": target_ctr,
+        "target_cpc": target_cpc,
+        "target_cvr": target_cvr,
+        "impressions": impressions
+    }
+    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    # Zapis w SQLite i kurs NBP (zapytanie przy pustym cache'u) poza pętlą zdarzeń
+    try:
+        scenario_id = await run_in_threadpool(get_scenario_store().save, owner, inputs, name=name, tags=tag_list)
+    except ValueError as e:
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": str(e),
+            "owner": owner,
+            **inputs
+        })
+    results = await run_in_threadpool(
+        calculate_forecast_from_metrics, gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions
+    )
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "success": f"Scenariusz zapisany (ID {scenario_id}). Otwórz go ponownie pod adresem /scenarios/{scenario_id}",
+        "results": results,
+        "forecast_mode": True,
+        "owner": owner,
+        **inputs
+    })
+
+@app.post("/scenarios")
+async def create_scenarios(payload: SaveScenariosRequest):
+    """Zapis partii scenariuszy w jednej transakcji"""
+    try:
+        ids = await run_in_threadpool(get_scenario_store().save_many, [scenario.model_dump() for scenario in payload.scenarios])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ids": ids}
+
+@app.get("/scenarios")
+async def list_scenarios(owner: str, tag: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50):
+    """Lista scenariuszy właściciela (od najnowszych) ze stronicowaniem kursorem"""
+    try:
+        return await run_in_threadpool(get_scenario_store().list, owner, tag=tag, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/scenarios/compare")
+async def compare_scenarios(payload: CompareScenariosRequest):
+    """Porównanie zapisanych scenariuszy przeliczonych jednym wsadowym przebiegiem"""
+    eur_rate = (await run_in_threadpool(get_eur_rate_info))["rate"]
+    return {"scenarios": await run_in_threadpool(get_scenario_store().compare, payload.ids, eur_rate)}
+
+@app.get("/scenarios/{scenario_id}", response_class=HTMLResponse)
+async def open_scenario(request: Request, scenario_id: int):
+    """Otwiera zapisany scenariusz w kalkulatorze"""
+    scenarios = await run_in_threadpool(get_scenario_store().get_many, [scenario_id])
+    if not scenarios:
+        raise HTTPException(status_code=404, detail="Scenariusz nie istnieje")
+    scenario = scenarios[0]
+    inputs = scenario["inputs"]
+    if scenario["mode"] == "budget":
+        results = await run_in_threadpool(
+            calculate_budget_from_tacos, inputs["target_sales"], inputs["target_tacos"], inputs["gross_margin"]
+        )
+        return templates.TemplateResponse("budget.html", {"request": request, "results": results, **inputs})
+    inputs["impressions"] = int(inputs["impressions"])
+    results = await run_in_threadpool(calculate_forecast_from_metrics, **inputs)
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "results": results,
+        "forecast_mode": True,
+        "owner": scenario["owner"],
+        **inputs
+    })
+
 @app.get("/currency-info")
-async def get_currency_info():
-    """Endpoint do pobierania informacji o kursie EUR/PLN"""
-    eur_rate = get_eur_rate_from_nbp()
+async def get_currency_info(as_of: Optional[date] = None):
+    """Endpoint do pobierania informacji o kursie EUR/PLN (bieżącym lub z podanego dnia)"""
+    eur_rate_info = get_eur_rate_info(as_of)
     return {
         "currency": "EUR",
-        "eur_pln_rate": eur_rate,
+        "eur_pln_rate": eur_rate_info["rate"],
         "source": "NBP API",
-        "last_updated": "cache"
+        "as_of": as_of.isoformat() if as_of else None,
+        "last_updated": eur_rate_info["effective_date"]
     }
 
 @app.get("/health")
@@ -0,0 +1,388 @@
+from typing import Dict, Any, Callable, List, Iterable, NamedTuple, Optional, Sequence, Set, Tuple
+import numpy as np
+
+from .money import OUTPUT_DECIMALS, to_micro, rate_to_scaled, money_mul, percent_of, money_div, apply_rate, to_output
+
+
+class Metric(NamedTuple):
+    """Węzeł grafu wskaźników: nazwa, zależności i funkcja liczona z wartości zależności."""
+    name: str
+    deps: Tuple[str, ...]
+    func: Callable[..., Any]
+    # False dla węzłów tekstowych (komunikaty) - w trybie wsadowym liczone element po elemencie
+    vectorized: bool = True
+
+
+def _ratio(num: Any, den: Any, scale: float = 1) -> Any:
+    """(num / den) × scale, a 0 gdy mianownik nie jest dodatni. Działa dla liczb i tablic NumPy."""
+    if isinstance(num, np.ndarray) or isinstance(den, np.ndarray):
+        num, den = np.broadcast_arrays(np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64))
+        result = np.zeros(num.shape, dtype=np.float64)
+        np.divide(num, den, out=result, where=den > 0)
+        if scale != 1:
+            result *= scale
+        return result
+    return (num / den) * scale if den > 0 else 0
+
+
+def _select(condition: Any, if_true: Any, if_false: Any) -> Any:
+    """Odpowiednik `if_true if condition else if_false` działający także na tablicach."""
+    if isinstance(condition, np.ndarray):
+        return np.where(condition, if_true, if_false)
+    return if_true if condition else if_false
+
+
+class MetricGraph:
+    """
+    Deklaratywny graf wskaźników z leniwym liczeniem.
+
+    Węzły bez definicji są wejściami. Ten sam graf można liczyć:
+    - pojedynczo i przyrostowo (evaluate / MetricEvaluation.update),
+    - wsadowo na tablicach NumPy (compile).
+    """
+
+    def __init__(self, metrics: Iterable[Metric]):
+        self.metrics: Dict[str, Metric] = {}
+        for metric in metrics:
+            self.metrics[metric.name] = metric
+        self._dependents: Dict[str, Set[str]] = {}
+        for metric in self.metrics.values():
+            for dep in metric.deps:
+                self._dependents.setdefault(dep, set()).add(metric.name)
+        self._downstream_cache: Dict[str, Set[str]] = {}
+
+    def downstream(self, name: str) -> Set[str]:
+        """Zwraca wszystkie węzły zależne (bezpośrednio lub pośrednio) od podanego."""
+        if name not in self._downstream_cache:
+            seen: Set[str] = set()
+            stack = list(self._dependents.get(name, ()))
+            while stack:
+                node = stack.pop()
+                if node not in seen:
+                    seen.add(node)
+                    stack.extend(self._dependents.get(node, ()))
+            self._downstream_cache[name] = seen
+        return self._downstream_cache[name]
+
+    def plan(self, outputs: Sequence[str], inputs: Iterable[str]) -> List[Metric]:
+        """
+        Kolejność topologiczna węzłów potrzebnych do policzenia `outputs`.
+
+        Args:
+            outputs (Sequence[str]): Wskaźniki do policzenia
+            inputs (Iterable[str]): Nazwy podanych wartości (wejścia lub nadpisane węzły)
+
+        Returns:
+            List[Metric]: Węzły do policzenia w kolejności zależności
+        """
+        given = set(inputs)
+        order: List[Metric] = []
+        visited: Set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in visited or name in given:
+                return
+            metric = self.metrics.get(name)
+            if metric is None:
+                raise KeyError(f"Brak wartości wejściowej: {name}")
+            visited.add(name)
+            for dep in metric.deps:
+                visit(dep)
+            order.append(metric)
+
+        for name in outputs:
+            visit(name)
+        return order
+
+    def evaluate(self, **inputs: Any) -> "MetricEvaluation":
+        """Tworzy leniwą ewaluację grafu dla podanych wejść."""
+        return MetricEvaluation(self, inputs)
+
+    def compile(self, outputs: Sequence[str], inputs: Sequence[str]) -> Callable[..., Dict[str, Any]]:
+        """
+        Kompiluje graf do funkcji wsadowej liczącej `outputs` na tablicach NumPy.
+
+        Args:
+            outputs (Sequence[str]): Wskaźniki do policzenia
+            inputs (Sequence[str]): Nazwy wejść przekazywanych do skompilowanej funkcji
+
+        Returns:
+            Callable[..., Dict[str, Any]]: Funkcja przyjmująca tablice wejść (keyword args)
+        """
+        steps = self.plan(outputs, inputs)
+        outputs = tuple(outputs)
+
+        def run(**arrays: Any) -> Dict[str, Any]:
+            values: Dict[str, Any] = {name: np.asarray(value) for name, value in arrays.items()}
+            size = max((v.size for v in values.values()), default=0)
+            for metric in steps:
+                args = [values[dep] for dep in metric.deps]
+                if metric.vectorized:
+                    values[metric.name] = metric.func(*args)
+                else:
+                    columns = [np.broadcast_to(arg, (size,)).tolist() for arg in args]
+                    values[metric.name] = np.array([metric.func(*row) for row in zip(*columns)], dtype=object)
+            return {name: values[name] for name in outputs}
+
+        return run
+
+
+class MetricEvaluation:
+    """
+    Stan ewaluacji grafu: wartości liczone na żądanie i zapamiętywane.
+
+    Zmiana wejścia przez update() unieważnia tylko węzły od niego zależne.
+    """
+
+    def __init__(self, graph: MetricGraph, inputs: Dict[str, Any]):
+        self.graph = graph
+        self._inputs: Set[str] = set(inputs)
+        self._values: Dict[str, Any] = dict(inputs)
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        for metric in self.graph.plan([name], self._values):
+            self._values[metric.name] = metric.func(*(self._values[dep] for dep in metric.deps))
+        return self._values[name]
+
+    def get(self, names: Iterable[str]) -> Dict[str, Any]:
+        return {name: self[name] for name in names}
+
+    def update(self, **changes: Any) -> "MetricEvaluation":
+        """Zmienia wejścia i usuwa z pamięci tylko wartości zależne od nich."""
+        for name, value in changes.items():
+            self._inputs.add(name)
+            self._values[name] = value
+            for node in self.graph.downstream(name):
+                if node not in self._inputs:
+                    self._values.pop(node, None)
+        return self
+
+
+def _pln(name: str) -> Metric:
+    """Węzeł przeliczenia wskaźnika EUR na PLN (kurs NBP jako wejście `eur_rate`)."""
+    return Metric(f"{name}_pln", (name, "eur_rate"), lambda value, eur_rate: value * eur_rate)
+
+
+def _pln_micro(name: str) -> Metric:
+    """Węzeł przeliczenia kwoty EUR na PLN w stałym przecinku (kurs `rate_scaled`)."""
+    return Metric(f"{name}_pln_micro", (f"{name}_micro", "rate_scaled"), apply_rate)
+
+
+def _currency_info(eur_rate: float, eur_rate_date: Optional[str]) -> str:
+    if eur_rate_date:
+        return f"Kurs EUR/PLN: {eur_rate:.4f} (NBP, {eur_rate_date})"
+    return f"Kurs EUR/PLN: {eur_rate:.4f} (NBP)"
+
+
+# Wskaźniki wspólne dla wszystkich kalkulatorów (sprzedaż `sales` i wydatki `spend` w EUR).
+# Węzły *_micro to kwoty int64 w milionowych częściach EUR / PLN - z nich pochodzą kwoty w wynikach;
+# węzły zmiennoprzecinkowe służą wskaźnikom względnym i solverowi (funkcje ciągłe).
+COMMON_METRICS: Tuple[Metric, ...] = (
+    Metric("acos", ("spend", "sales"), lambda spend, sales: _ratio(spend, sales, 100)),
+    Metric("roi", ("sales", "spend"), lambda sales, spend: _ratio(sales - spend, spend, 100)),
+    Metric("roas", ("sales", "spend"), lambda sales, spend: _ratio(sales, spend)),
+    Metric("gross_profit", ("sales", "gross_margin"), lambda sales, gross_margin: sales * (gross_margin / 100)),
+    Metric("profit", ("gross_profit", "spend"), lambda gross_profit, spend: gross_profit - spend),
+    Metric("break_even_acos", ("gross_margin",), lambda gross_margin: gross_margin),
+    Metric("profitability_status", ("is_profitable",), lambda is_profitable: _select(is_profitable, "profitable", "unprofitable")),
+    Metric("currency_info", ("eur_rate", "eur_rate_date"), _currency_info, vectorized=False),
+    _pln("sales"),
+    _pln("spend"),
+    _pln("profit"),
+    _pln("gross_profit"),
+    Metric("rate_scaled", ("eur_rate",), rate_to_scaled),
+    Metric("gross_profit_micro", ("sales_micro", "gross_margin"), percent_of),
+    Metric("profit_micro", ("gross_profit_micro", "spend_micro"), lambda gross_profit_micro, spend_micro: gross_profit_micro - spend_micro),
+    _pln_micro("sales"),
+    _pln_micro("spend"),
+    _pln_micro("gross_profit"),
+    # Zysk w PLN jako różnica kwot w PLN - wyniki w obu walutach sumują się bez rozjazdów
+    Metric("profit_pln_micro", ("gross_profit_pln_micro", "spend_pln_micro"),
+           lambda gross_profit_pln_micro, spend_pln_micro: gross_profit_pln_micro - spend_pln_micro),
+)
+
+
+def _acos_message(acos: float, is_profitable: bool, gross_margin: float) -> str:
+    if not is_profitable and acos > 0:
+        return f"⚠️ UWAGA: Kampania jest nierentowna! ACOS ({acos:.2f}%) przekracza marżę ({gross_margin:.2f}%)"
+    if is_profitable and acos > 0:
+        return f"✅ Kampania jest rentowna! ACOS ({acos:.2f}%) mieści się w marży ({gross_margin:.2f}%)"
+    return ""
+
+
+def _forecast_message(acos: float, is_profitable: bool, gross_margin: float) -> str:
+    if acos > 0:
+        if not is_profitable:
+            return (
+                f"⚠️ Nierentowna kampania: ACOS {acos:.0f}% przekracza marżę {gross_margin:.0f}%. "
+                f"Rozważ poprawę współczynnika konwersji, obniżenie CPC lub zwiększenie marży produktu."
+            )
+        return f"✅ Rentowna kampania: ACOS {acos:.0f}% mieści się w marży {gross_margin:.0f}%"
+    return ""
+
+
+def _budget_message(target_tacos: float, is_profitable: bool, gross_margin: float) -> str:
+    if target_tacos > 0:
+        if not is_profitable:
+            return (
+                f"⚠️ UWAGA: Zakładany TACOS {target_tacos:.1f}% przekracza marżę {gross_margin:.1f}%. "
+                f"Kampania może być nierentowna przy takim poziomie wydatków marketingowych."
+            )
+        return f"✅ Rentowna kampania: TACOS {target_tacos:.1f}% mieści się w marży {gross_margin:.1f}%"
+    return ""
+
+
+# Prosty kalkulator ACOS - wejścia: sales, spend, gross_margin
+ACOS_GRAPH = MetricGraph(COMMON_METRICS + (
+    Metric("sales_micro", ("sales",), to_micro),
+    Metric("spend_micro", ("spend",), to_micro),
+    Metric("is_profitable", ("acos", "gross_margin"), lambda acos, gross_margin: (acos <= gross_margin) & (gross_margin > 0)),
+    Metric("profitability_message", ("acos", "is_profitable", "gross_margin"), _acos_message, vectorized=False),
+))
+
+# Prognoza z metryk - wejścia: gross_margin, target_aov, target_ctr, target_cpc, target_cvr, impressions, eur_rate, eur_rate_date
+FORECAST_GRAPH = MetricGraph(COMMON_METRICS + (
+    Metric("clicks", ("impressions", "target_ctr"), lambda impressions, target_ctr: impressions * (target_ctr / 100)),
+    Metric("orders", ("clicks", "target_cvr"), lambda clicks, target_cvr: clicks * (target_cvr / 100)),
+    Metric("spend", ("clicks", "target_cpc"), lambda clicks, target_cpc: clicks * target_cpc),
+    Metric("sales", ("orders", "target_aov"), lambda orders, target_aov: orders * target_aov),
+    Metric("profit_per_sale", ("profit", "orders"), lambda profit, orders: _ratio(profit, orders)),
+    Metric("cpm", ("spend", "impressions"), lambda spend, impressions: _ratio(spend, impressions, 1000)),
+    Metric("cost_per_conversion", ("spend", "orders"), lambda spend, orders: _ratio(spend, orders)),
+    Metric("is_profitable", ("acos", "gross_margin"),
+           lambda acos, gross_margin: (acos <= gross_margin) & (gross_margin > 0) & (acos > 0)),
+    Metric("profitability_message", ("acos", "is_profitable", "gross_margin"), _forecast_message, vectorized=False),
+    _pln("profit_per_sale"),
+    _pln("target_aov"),
+    _pln("target_cpc"),
+    Metric("target_aov_micro", ("target_aov",), to_micro),
+    Metric("target_cpc_micro", ("target_cpc",), to_micro),
+    Metric("spend_micro", ("target_cpc_micro", "clicks"), money_mul),
+    Metric("sales_micro", ("target_aov_micro", "orders"), money_mul),
+    Metric("profit_per_sale_micro", ("profit_micro", "orders"), money_div),
+    Metric("cpm_micro", ("spend_micro", "impressions"), lambda spend_micro, impressions: money_div(spend_micro * 1000, impressions)),
+    Metric("cost_per_conversion_micro", ("spend_micro", "orders"), money_div),
+    _pln_micro("profit_per_sale"),
+    _pln_micro("target_aov"),
+    _pln_micro("target_cpc"),
+))
+
+# Budżet z TACOS - wejścia: target_sales, target_tacos, gross_margin, eur_rate, eur_rate_date
+BUDGET_GRAPH = MetricGraph(COMMON_METRICS + (
+    Metric("sales", ("target_sales",), lambda target_sales: target_sales),
+    Metric("spend", ("target_tacos", "sales"), lambda target_tacos, sales: (target_tacos * sales) / 100),
+    Metric("profit_margin", ("profit", "sales"), lambda profit, sales: _ratio(profit, sales, 100)),
+    Metric("marketing_to_profit_ratio", ("spend", "profit"), lambda spend, profit: _ratio(spend, profit, 100)),
+    Metric("is_profitable", ("target_tacos", "gross_margin"),
+           lambda target_tacos, gross_margin: (target_tacos <= gross_margin) & (gross_margin > 0)),
+    Metric("profitability_message", ("target_tacos", "is_profitable", "gross_margin"), _budget_message, vectorized=False),
+    Metric("sales_micro", ("target_sales",), to_micro),
+    Metric("spend_micro", ("sales_micro", "target_tacos"), percent_of),
+))
+
+FORECAST_INPUTS: Tuple[str, ...] = ("gross_margin", "target_aov", "target_ctr", "target_cpc", "target_cvr", "impressions")
+BUDGET_INPUTS: Tuple[str, ...] = ("target_sales", "target_tacos", "gross_margin")
+
+# Kolumny wyników wsadowych: (nazwa kolumny, węzeł grafu, miejsca po przecinku lub None bez zaokrąglania)
+FORECAST_OUTPUT_COLUMNS: Tuple[Tuple[str, str, Optional[int]], ...] = (
+    ("acos", "acos", 0),
+    ("roi", "roi", 0),
+    ("profit", "profit_micro", 0),
+    ("profit_per_sale", "profit_per_sale_micro", 0),
+    ("clicks", "clicks", 0),
+    ("orders", "orders", 0),
+    ("projected_sales", "sales_micro", 0),
+    ("projected_spend", "spend_micro", 0),
+    ("roas", "roas", 2),
+    ("cpm", "cpm_micro", 2),
+    ("cost_per_conversion", "cost_per_conversion_micro", 2),
+    ("is_profitable", "is_profitable", None),
+    ("projected_sales_pln", "sales_pln_micro", 0),
+    ("projected_spend_pln", "spend_pln_micro", 0),
+    ("profit_pln", "profit_pln_micro", 0),
+    ("eur_rate", "eur_rate", 4),
+)
+
+BUDGET_OUTPUT_COLUMNS: Tuple[Tuple[str, str, Optional[int]], ...] = (
+    ("marketing_budget", "spend_micro", 0),
+    ("gross_profit", "gross_profit_micro", 0),
+    ("net_profit", "profit_micro", 0),
+    ("roi", "roi", 1),
+    ("profit_margin", "profit_margin", 1),
+    ("marketing_to_profit_ratio", "marketing_to_profit_ratio", 1),
+    ("is_profitable", "is_profitable", None),
+    ("target_sales_pln", "sales_pln_micro", 0),
+    ("marketing_budget_pln", "spend_pln_micro", 0),
+    ("net_profit_pln", "profit_pln_micro", 0),
+    ("eur_rate", "eur_rate", 4),
+)
+
+# Tryb -> (graf, wejścia, kolumny wyników) dla obliczeń wsadowych
+BATCH_MODES: Dict[str, Tuple[MetricGraph, Tuple[str, ...], Tuple[Tuple[str, str, Optional[int]], ...]]] = {
+    "forecast": (FORECAST_GRAPH, FORECAST_INPUTS, FORECAST_OUTPUT_COLUMNS),
+    "budget": (BUDGET_GRAPH, BUDGET_INPUTS, BUDGET_OUTPUT_COLUMNS),
+}
+
+_compiled_batch: Dict[str, Callable[..., Dict[str, Any]]] = {}
+
+
+def round_value(value: Any, decimals: int) -> Any:
+    """
+    Zaokrągla wskaźnik (liczbę lub tablicę) do `decimals` miejsc - ta sama reguła w kalkulatorach i obliczeniach wsadowych.
+
+    Po przeskalowaniu usuwany jest błąd reprezentacji (zaokrąglenie do 6 miejsc, jak w to_micro),
+    więc wartości dziesiętne typu 0.085 zaokrąglają się tak, jak są zapisane, a połówki - do parzystej.
+
+    Returns:
+        Any: float (dla liczby) lub tablica float64
+    """
+    scale = 10.0 ** decimals
+    scaled = np.asarray(value, dtype=np.float64) * scale
+    if scaled.ndim == 0:
+        return float(np.rint(np.round(scaled, 6)) / scale)
+    np.round(scaled, 6, out=scaled)
+    np.rint(scaled, out=scaled)
+    scaled /= scale
+    return scaled
+
+
+def round_output(node: str, value: Any, decimals: Optional[int]) -> Any:
+    """
+    Zaokrągla wynik węzła do wyświetlanej precyzji.
+
+    Kwoty (węzły *_micro) są zaokrąglane bankiersko przez to_output (None - do centów),
+    pozostałe wskaźniki przez round_value; None oznacza wartość bez zaokrąglania.
+    Kalkulatory i evaluate_batch używają tej samej reguły zaokrąglania.
+    """
+    if node.endswith("_micro"):
+        return to_output(value, OUTPUT_DECIMALS if decimals is None else decimals)
+    return round_value(value, decimals) if decimals is not None else value
+
+
+def evaluate_batch(mode: str, inputs: Dict[str, Any], eur_rate: Any) -> Dict[str, List[Any]]:
+    """
+    Liczy wskaźniki dla wielu scenariuszy naraz skompilowanym grafem.
+
+    Args:
+        mode (str): "forecast" lub "budget"
+        inputs (Dict[str, Any]): Kolumny wejść trybu (listy lub tablice)
+        eur_rate (Any): Kurs EUR/PLN (liczba lub tablica per scenariusz)
+
+    Returns:
+        Dict[str, List[Any]]: Kolumny wyników (zaokrąglone jak w kalkulatorach)
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"Nieznany tryb: {mode}")
+    graph, input_names, output_columns = BATCH_MODES[mode]
+    if mode not in _compiled_batch:
+        _compiled_batch[mode] = graph.compile([node for _, node, _ in output_columns], input_names + ("eur_rate",))
+    arrays = {name: np.asarray(inputs[name], dtype=np.float64) for name in input_names}
+    size = max(array.size for array in arrays.values())
+    values = _compiled_batch[mode](**arrays, eur_rate=np.asarray(eur_rate, dtype=np.float64))
+
+    columns: Dict[str, List[Any]] = {}
+    for name, node, decimals in output_columns:
+        columns[name] = round_output(node, np.broadcast_to(values[node], (size,)), decimals).tolist()
+    return columns
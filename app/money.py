@@ -0,0 +1,134 @@
+"""
+Kwoty pieniężne w stałym przecinku: liczby całkowite int64 w milionowych częściach EUR / PLN.
+
+Iloczyny (cena × ilość, procent kwoty, przeliczenie kursem) są zaokrąglane bankiersko
+do 10^-6 jednostki, a dodawanie, odejmowanie i sumy są dokładne. Do centów / groszy
+(lub innej precyzji wyświetlania) kwota jest zaokrąglana raz, na wyjściu (to_output),
+więc pośrednie zaokrąglenia do centa nie kumulują się w wyniku.
+Przeliczenie na PLN używa kursu NBP przeskalowanego do liczby całkowitej
+(4 miejsca po przecinku, jak w tabeli A).
+
+Funkcje obsługują pojedyncze liczby i tablice NumPy.
+"""
+from typing import Any
+import numpy as np
+
+# Jednostek obliczeń w euro / złotym (10^-6 - cztery cyfry poniżej centa)
+MICRO_UNITS = 1_000_000
+MICRO_DECIMALS = 6
+# Domyślna precyzja wyjścia: centy / grosze
+OUTPUT_DECIMALS = 2
+# Kurs EUR/PLN jako liczba całkowita (kurs × RATE_SCALE)
+RATE_SCALE = 10_000
+
+
+def _rint(values: Any) -> Any:
+    """Zaokrąglenie bankierskie (np.rint: połówki do parzystej) do int64 w jednym przebiegu."""
+    if isinstance(values, np.ndarray) and values.ndim:
+        return np.rint(values, out=np.empty(values.shape, dtype=np.int64), casting="unsafe")
+    return np.rint(values).astype(np.int64)
+
+
+def to_micro(amount: Any) -> Any:
+    """Kwota w EUR/PLN (liczba lub tablica) -> int64 w milionowych częściach."""
+    scaled = np.asarray(amount, dtype=np.float64) * MICRO_UNITS
+    # Zaokrąglenie do 6 miejsc usuwa błąd reprezentacji wartości wpisanych dziesiętnie (0.29 × 10^6 = 289999.99999999994)
+    return _rint(np.round(scaled, 6, out=scaled) if scaled.ndim else np.round(scaled, 6))
+
+
+def rate_to_scaled(rate: Any) -> Any:
+    """Kurs EUR/PLN -> int64 (kurs × RATE_SCALE; kursy NBP mają 4 miejsca po przecinku)."""
+    return _rint(np.asarray(rate, dtype=np.float64) * RATE_SCALE)
+
+
+def _div_half_even(amount: Any, factor: Any, denominator: Any) -> Any:
+    """(amount × factor) / denominator dla liczb całkowitych z zaokrągleniem bankierskim (mianownik dodatni)."""
+    amount = np.asarray(amount, dtype=np.int64)
+    factor = np.asarray(factor, dtype=np.int64)
+    estimate = np.abs(amount.astype(np.float64) * factor)
+    if estimate.size == 0 or np.max(estimate) < 2 ** 52:
+        # Dla |licznik| < 2^52 iloraz float jest dokładny w połówkach i nie przekracza ich
+        # błędem zaokrąglenia, więc rint daje ten sam wynik co dzielenie całkowite (a szybciej)
+        return _rint(amount * factor / denominator)
+    # amount = q × d + r, więc amount × factor = (q × factor + q2) × d + r2 - bez przepełnienia int64
+    quotient, remainder = np.divmod(amount, denominator)
+    extra, remainder = np.divmod(remainder * factor, denominator)
+    quotient = quotient * factor + extra
+    twice = remainder * 2
+    return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+
+
+def money_mul(amount_micro: Any, factor: Any) -> Any:
+    """
+    Kwota × ilość lub współczynnik (np. CPC × kliknięcia, AOV × zamówienia).
+
+    Args:
+        amount_micro (Any): Kwota w milionowych częściach (int64)
+        factor (Any): Mnożnik (liczba lub tablica)
+
+    Returns:
+        Any: Kwota w milionowych częściach (int64) zaokrąglona bankiersko
+    """
+    return _rint(amount_micro * np.asarray(factor, dtype=np.float64))
+
+
+def percent_of(amount_micro: Any, percent: Any) -> Any:
+    """Procent kwoty (np. zysk brutto = sprzedaż × marża%) w milionowych częściach, zaokrąglony bankiersko."""
+    product = amount_micro * np.asarray(percent, dtype=np.float64)
+    if isinstance(product, np.ndarray) and product.ndim:
+        product /= 100
+        return _rint(product)
+    return _rint(product / 100)
+
+
+def money_div(amount_micro: Any, divisor: Any) -> Any:
+    """Kwota / ilość (np. zysk na zamówienie) w milionowych częściach, a 0 gdy dzielnik nie jest dodatni."""
+    divisor = np.asarray(divisor, dtype=np.float64)
+    result = np.zeros(np.broadcast(np.asarray(amount_micro), divisor).shape, dtype=np.float64)
+    np.divide(amount_micro, divisor, out=result, where=divisor > 0)
+    return _rint(result)
+
+
+def apply_rate(amount_micro: Any, rate_scaled: Any) -> Any:
+    """
+    Przelicza kwotę EUR na PLN kursem w stałym przecinku.
+
+    Args:
+        amount_micro (Any): Kwota EUR w milionowych częściach (int64)
+        rate_scaled (Any): Kurs z rate_to_scaled
+
+    Returns:
+        Any: Kwota PLN w milionowych częściach (int64) zaokrąglona bankiersko
+    """
+    return _div_half_even(amount_micro, rate_scaled, RATE_SCALE)
+
+
+def remove_rate(amount_micro: Any, rate_scaled: Any) -> Any:
+    """Przelicza kwotę PLN na EUR (obie w milionowych częściach) kursem z rate_to_scaled."""
+    return _div_half_even(amount_micro, RATE_SCALE, rate_scaled)
+
+
+def to_output(amount_micro: Any, decimals: int = OUTPUT_DECIMALS) -> Any:
+    """
+    Zaokrągla kwotę do wyświetlanej precyzji (raz, bankiersko).
+
+    Iloraz liczby całkowitej (< 2^53) przez 10^k jest dokładny w połówkach,
+    więc np.rint na wyniku dzielenia daje wynik równy dzieleniu całkowitemu.
+
+    Args:
+        amount_micro (Any): Kwota w milionowych częściach (int64, liczba lub tablica)
+        decimals (int): Miejsca po przecinku (0-6, domyślnie centy)
+
+    Returns:
+        Any: float (dla liczby) lub tablica float64
+    """
+    if not 0 <= decimals <= MICRO_DECIMALS:
+        raise ValueError(f"Precyzja kwoty musi być z zakresu 0-{MICRO_DECIMALS}")
+    amount = np.asarray(amount_micro)
+    if amount.ndim == 0:
+        return float(np.rint(amount / 10 ** (MICRO_DECIMALS - decimals)) / 10 ** decimals)
+    value = np.divide(amount, float(10 ** (MICRO_DECIMALS - decimals)))
+    np.rint(value, out=value)
+    if decimals:
+        value /= 10 ** decimals
+    return value
@@ -0,0 +1,221 @@
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+
+DAYS_IN_MONTH = 30
+HOURS_IN_DAY = 24
+
+# Domyślny rozkład ruchu w ciągu doby (względny udział wyświetleń, godziny 0-23)
+DEFAULT_HOURLY_TRAFFIC = np.array([
+    0.35, 0.25, 0.18, 0.15, 0.15, 0.22, 0.45, 0.75, 0.95, 1.05, 1.10, 1.12,
+    1.15, 1.10, 1.05, 1.05, 1.10, 1.20, 1.35, 1.50, 1.55, 1.40, 1.05, 0.65,
+])
+
+# Domyślny rozkład ruchu w tygodniu (poniedziałek-niedziela)
+DEFAULT_DOW_TRAFFIC = np.array([1.00, 0.97, 0.96, 0.98, 0.95, 1.02, 1.12])
+
+# Domyślny mnożnik CPC w ciągu doby (konkurencja rośnie w godzinach szczytu)
+DEFAULT_CPC_BY_HOUR = np.array([
+    0.80, 0.75, 0.72, 0.70, 0.70, 0.75, 0.85, 0.95, 1.00, 1.02, 1.03, 1.04,
+    1.05, 1.04, 1.03, 1.03, 1.05, 1.08, 1.12, 1.18, 1.20, 1.15, 1.00, 0.88,
+])
+
+
+def _per_campaign(values: Any, campaigns: int) -> np.ndarray:
+    """Rozszerza liczbę lub wektor do kształtu (kampanie,)."""
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (campaigns,))
+
+
+def _profile(values: Any, index: np.ndarray) -> np.ndarray:
+    """Rozkłada profil (24,) / (7,) lub (kampanie, 24/7) na oś godzin symulacji."""
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))[:, index]
+
+
+def simulate_pacing(
+    monthly_budget: Any,
+    monthly_impressions: Any,
+    ctr: Any,
+    cpc: Any,
+    hourly_traffic: Any = DEFAULT_HOURLY_TRAFFIC,
+    dow_traffic: Any = DEFAULT_DOW_TRAFFIC,
+    cpc_by_hour: Any = DEFAULT_CPC_BY_HOUR,
+    days: int = DAYS_IN_MONTH,
+    start_weekday: int = 0,
+    daily_caps: Optional[Any] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Symuluje godzinowe wydatki wielu kampanii w miesiącu (macierz kampanie × godziny).
+
+    Popyt na wydatki w godzinie = wyświetlenia × CTR% × CPC × mnożnik CPC godziny.
+    Wydatki są obcinane limitem dziennym (jeśli podany) i budżetem miesięcznym.
+
+    Args:
+        monthly_budget (Any): Budżet miesięczny w EUR (liczba lub wektor per kampania)
+        monthly_impressions (Any): Potencjalne wyświetlenia w miesiącu bez ograniczeń budżetu
+        ctr (Any): CTR w procentach
+        cpc (Any): Średni CPC w EUR
+        hourly_traffic (Any): Rozkład ruchu w godzinach (24,) lub (kampanie, 24)
+        dow_traffic (Any): Rozkład ruchu w dniach tygodnia (7,) lub (kampanie, 7)
+        cpc_by_hour (Any): Mnożnik CPC w godzinach (24,) lub (kampanie, 24)
+        days (int): Liczba dni miesiąca
+        start_weekday (int): Dzień tygodnia pierwszego dnia miesiąca (0 = poniedziałek)
+        daily_caps (Optional[Any]): Limity dzienne w EUR - liczba, (kampanie,) lub (kampanie, dni)
+
+    Returns:
+        Dict[str, np.ndarray]: Wydatki dzienne, godzina/dzień wyczerpania budżetu, utracone wyświetlenia
+            i rekomendowane limity dzienne
+    """
+    campaigns = int(np.broadcast(
+        np.asarray(monthly_budget), np.asarray(monthly_impressions), np.asarray(ctr), np.asarray(cpc)
+    ).size)
+    budget = _per_campaign(monthly_budget, campaigns)
+    hours = np.arange(days * HOURS_IN_DAY)
+    hour_of_day = hours % HOURS_IN_DAY
+    weekday = (start_weekday + hours // HOURS_IN_DAY) % 7
+
+    # Udział każdej godziny w miesięcznym ruchu
+    weights = _profile(hourly_traffic, hour_of_day) * _profile(dow_traffic, weekday)
+    weights = weights / weights.sum(axis=1, keepdims=True)
+
+    impressions = _per_campaign(monthly_impressions, campaigns)[:, None] * weights
+    hourly_cpc = _per_campaign(cpc, campaigns)[:, None] * _profile(cpc_by_hour, hour_of_day)
+    demand = impressions * (_per_campaign(ctr, campaigns)[:, None] / 100) * hourly_cpc
+
+    capped = demand
+    if daily_caps is not None:
+        caps = np.broadcast_to(np.asarray(daily_caps, dtype=np.float64).reshape(-1, 1) if np.ndim(daily_caps) == 1
+                               else np.asarray(daily_caps, dtype=np.float64), (campaigns, days))
+        by_day = demand.reshape(campaigns, days, HOURS_IN_DAY)
+        spent_before = np.cumsum(by_day, axis=2) - by_day
+        capped = np.clip(caps[:, :, None] - spent_before, 0, by_day).reshape(campaigns, -1)
+
+    cumulative = np.cumsum(capped, axis=1)
+    spend = np.clip(budget[:, None] - (cumulative - capped), 0, capped)
+
+    served = np.divide(spend, demand, out=np.ones_like(spend), where=demand > 0)
+    lost_impressions = (impressions * (1 - served)).sum(axis=1)
+
+    # Pierwsza godzina, w której skumulowany popyt przekracza budżet miesięczny
+    over_budget = cumulative > budget[:, None] * (1 + 1e-9)
+    exhausted = over_budget.any(axis=1)
+    exhaustion_hour = np.where(exhausted, over_budget.argmax(axis=1), -1)
+
+    # Rekomendacja: limity dzienne proporcjonalne do popytu, sumujące się do budżetu
+    daily_demand = demand.reshape(campaigns, days, HOURS_IN_DAY).sum(axis=2)
+    total_demand = daily_demand.sum(axis=1)
+    scale = np.divide(budget, total_demand, out=np.zeros_like(budget), where=total_demand > 0)
+    recommended_caps = daily_demand * np.minimum(scale, 1)[:, None]
+
+    return {
+        "daily_spend": spend.reshape(campaigns, days, HOURS_IN_DAY).sum(axis=2),
+        "total_spend": spend.sum(axis=1),
+        "demand": total_demand,
+        "exhaustion_hour": exhaustion_hour,
+        "exhaustion_day": np.where(exhausted, exhaustion_hour // HOURS_IN_DAY + 1, -1),
+        "impressions": impressions.sum(axis=1),
+        "lost_impressions": lost_impressions,
+        "recommended_daily_caps": recommended_caps,
+    }
+
+
+def pacing_summary(simulation: Dict[str, np.ndarray], index: int) -> Dict[str, Any]:
+    """
+    Podsumowanie symulacji dla jednej kampanii (do odpowiedzi JSON).
+
+    Args:
+        simulation (Dict[str, np.ndarray]): Wynik simulate_pacing
+        index (int): Indeks kampanii
+
+    Returns:
+        Dict[str, Any]: Wskaźniki kampanii zaokrąglone do wyświetlania
+    """
+    impressions = simulation["impressions"][index]
+    lost = simulation["lost_impressions"][index]
+    return {
+        "total_spend": round(float(simulation["total_spend"][index]), 2),
+        "demand": round(float(simulation["demand"][index]), 2),
+        "exhaustion_day": int(simulation["exhaustion_day"][index]),
+        "exhaustion_hour": int(simulation["exhaustion_hour"][index]),
+        "lost_impressions": round(float(lost), 0),
+        "lost_impressions_pct": round(float(lost / impressions * 100), 1) if impressions > 0 else 0,
+        "daily_spend": np.round(simulation["daily_spend"][index], 2).tolist(),
+        "recommended_daily_caps": np.round(simulation["recommended_daily_caps"][index], 2).tolist(),
+    }
+
+
+def run_pacing(
+    campaigns: List[Dict[str, Any]],
+    hourly_traffic: Optional[Sequence[float]] = None,
+    dow_traffic: Optional[Sequence[float]] = None,
+    cpc_by_hour: Optional[Sequence[float]] = None,
+    days: int = DAYS_IN_MONTH,
+    start_weekday: int = 0
+) -> Dict[str, Any]:
+    """
+    Symulacja tempa wydatków dla listy kampanii: bez limitów dziennych oraz z rekomendowanymi limitami.
+
+    Args:
+        campaigns (List[Dict[str, Any]]): Kampanie z kluczami monthly_budget, monthly_impressions, ctr, cpc
+            (opcjonalnie name)
+        hourly_traffic (Optional[Sequence[float]]): Rozkład ruchu w godzinach (domyślnie DEFAULT_HOURLY_TRAFFIC)
+        dow_traffic (Optional[Sequence[float]]): Rozkład ruchu w dniach tygodnia (domyślnie DEFAULT_DOW_TRAFFIC)
+        cpc_by_hour (Optional[Sequence[float]]): Mnożnik CPC w godzinach (domyślnie DEFAULT_CPC_BY_HOUR)
+        days (int): Liczba dni miesiąca
+        start_weekday (int): Dzień tygodnia pierwszego dnia miesiąca (0 = poniedziałek)
+
+    Returns:
+        Dict[str, Any]: Podsumowanie każdej kampanii i całego portfela
+    """
+    if not campaigns:
+        raise ValueError("Brak kampanii do symulacji")
+    if not 1 <= days <= 31:
+        raise ValueError("Liczba dni miesiąca musi być z zakresu 1-31")
+    profiles = {
+        "hourly_traffic": DEFAULT_HOURLY_TRAFFIC if hourly_traffic is None else hourly_traffic,
+        "dow_traffic": DEFAULT_DOW_TRAFFIC if dow_traffic is None else dow_traffic,
+        "cpc_by_hour": DEFAULT_CPC_BY_HOUR if cpc_by_hour is None else cpc_by_hour,
+    }
+    for name, size in (("hourly_traffic", HOURS_IN_DAY), ("dow_traffic", 7), ("cpc_by_hour", HOURS_IN_DAY)):
+        profile = np.asarray(profiles[name], dtype=np.float64)
+        if profile.shape[-1] != size or profile.ndim > 2 or (profile.ndim == 2 and profile.shape[0] not in (1, len(campaigns))):
+            raise ValueError(f"Profil {name} musi mieć {size} wartości (lub po {size} na kampanię)")
+        if (profile < 0).any() or not (profile.sum(axis=-1) > 0).all():
+            raise ValueError(f"Profil {name} musi mieć nieujemne wartości o dodatniej sumie")
+
+    inputs = {
+        name: np.array([float(c[name]) for c in campaigns])
+        for name in ("monthly_budget", "monthly_impressions", "ctr", "cpc")
+    }
+    if any((values < 0).any() for values in inputs.values()):
+        raise ValueError("Wszystkie wartości muszą być dodatnie!")
+
+    uncapped = simulate_pacing(**inputs, **profiles, days=days, start_weekday=start_weekday)
+    capped = simulate_pacing(
+        **inputs, **profiles, days=days, start_weekday=start_weekday,
+        daily_caps=uncapped["recommended_daily_caps"]
+    )
+
+    results = []
+    for i, campaign in enumerate(campaigns):
+        summary = pacing_summary(uncapped, i)
+        with_caps = pacing_summary(capped, i)
+        summary["name"] = campaign.get("name", "")
+        summary["monthly_budget"] = round(float(inputs["monthly_budget"][i]), 2)
+        summary["with_recommended_caps"] = {
+            key: with_caps[key]
+            for key in ("total_spend", "exhaustion_day", "lost_impressions", "lost_impressions_pct", "daily_spend")
+        }
+        results.append(summary)
+
+    return {
+        "days": days,
+        "start_weekday": start_weekday,
+        "campaigns": results,
+        "summary": {
+            "campaigns": len(campaigns),
+            "exhausted_early": int((uncapped["exhaustion_day"] > 0).sum()),
+            "total_budget": round(float(inputs["monthly_budget"].sum()), 2),
+            "total_spend": round(float(uncapped["total_spend"].sum()), 2),
+            "lost_impressions": round(float(uncapped["lost_impressions"].sum()), 0),
+            "lost_impressions_with_caps": round(float(capped["lost_impressions"].sum()), 0),
+        },
+    }
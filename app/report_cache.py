@@ -0,0 +1,255 @@
+from typing import Dict, Any, Optional, List, BinaryIO, Tuple, Union
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+
+# Katalog i limit rozmiaru cache'u raportów (konfigurowalne zmiennymi środowiskowymi)
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "acos_report_cache"))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Kolumny tekstowe i liczbowe zapisywane jako osobne pliki .npy
+TEXT_COLUMNS = ("campaign", "ad_group", "keyword", "match_type", "campaign_id", "ad_group_id", "target_id")
+NUMERIC_COLUMNS = ("impressions", "clicks", "spend", "orders", "sales")
+# Pliki kolumny tekstowej: kody słownika, przesunięcia i bajty UTF-8 wartości słownika
+TEXT_PARTS = ("codes", "offsets", "data")
+# Katalogi tymczasowe (".<id>-...") starsze niż ten wiek (s) to pozostałości po przerwanym zapisie
+STAGING_MAX_AGE = 3600
+# Wersja układu plików - wpisy zapisane w starszym układzie są traktowane jak brak w cache'u
+LAYOUT_VERSION = 3
+
+_META_FILE = "meta.json"
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_report_file(source: BinaryIO) -> str:
+    """
+    Liczy skrót SHA-256 zawartości pliku (czytając go kawałkami) i przewija plik na początek.
+
+    Args:
+        source (BinaryIO): Otwarty plik binarny
+
+    Returns:
+        str: Skrót szesnastkowy zawartości
+    """
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+class TextColumn:
+    """
+    Kolumna tekstowa zakodowana słownikiem.
+
+    Wiersze to kody int32, a każda unikalna wartość jest zapisana raz jako bajty UTF-8
+    (przesunięcia + bajty), więc jedno długie słowo kluczowe nie poszerza wszystkich wierszy,
+    a powtarzające się nazwy kampanii zajmują 4 bajty na wiersz.
+    """
+
+    def __init__(self, codes: np.ndarray, offsets: np.ndarray, data: np.ndarray):
+        self.codes = codes
+        self._offsets = offsets
+        self._data = data
+        self._dictionary: Optional[List[str]] = None
+
+    @classmethod
+    def encode(cls, values: List[str]) -> "TextColumn":
+        """Koduje listę tekstów (kolejność słownika = kolejność pierwszego wystąpienia)."""
+        index: Dict[str, int] = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32, count=len(values))
+        encoded = [value.encode("utf-8") for value in index]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        column = cls(codes, offsets, data)
+        column._dictionary = list(index)
+        return column
+
+    @property
+    def dictionary(self) -> List[str]:
+        """Unikalne wartości kolumny (dekodowane przy pierwszym użyciu)."""
+        if self._dictionary is None:
+            data = self._data.tobytes()
+            offsets = self._offsets.tolist()
+            self._dictionary = [data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+        return self._dictionary
+
+    def parts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tablice zapisywane na dysk w kolejności TEXT_PARTS."""
+        return self.codes, self._offsets, self._data
+
+    def tolist(self) -> List[str]:
+        dictionary = self.dictionary
+        return [dictionary[code] for code in self.codes.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def groups_to_columns(groups: List[Dict[str, Any]]) -> Dict[str, Union[TextColumn, np.ndarray]]:
+    """
+    Zamienia listę agregatów z parse_ads_report na kolumny.
+
+    Args:
+        groups (List[Dict[str, Any]]): Agregaty per kampania/grupa/słowo kluczowe/typ dopasowania (surowe sumy)
+
+    Returns:
+        Dict[str, Union[TextColumn, np.ndarray]]: Kolumny tekstowe (TextColumn) i liczbowe (float64, bez zaokrągleń)
+    """
+    columns: Dict[str, Union[TextColumn, np.ndarray]] = {}
+    for name in TEXT_COLUMNS:
+        columns[name] = TextColumn.encode([group[name] for group in groups])
+    for name in NUMERIC_COLUMNS:
+        columns[name] = np.fromiter((group[name] for group in groups), dtype=np.float64, count=len(groups))
+    return columns
+
+
+class ReportCache:
+    """
+    Kolumnowy cache sparsowanych raportów na dysku.
+
+    Każdy raport to katalog nazwany skrótem zawartości pliku, z plikiem .npy na kolumnę
+    liczbową i trzema (TEXT_PARTS) na kolumnę tekstową. Odczyt używa mmap (np.load(mmap_mode="r")), więc nie kopiuje danych.
+    Po przekroczeniu limitu rozmiaru usuwane są najdawniej używane raporty (LRU po mtime).
+    """
+
+    def __init__(self, directory: str = REPORT_CACHE_DIR, max_bytes: int = REPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_dir(self, report_id: str) -> str:
+        if not report_id or not all(c in "0123456789abcdef" for c in report_id):
+            raise ValueError(f"Nieprawidłowy identyfikator raportu: {report_id}")
+        return os.path.join(self.directory, report_id)
+
+    def contains(self, report_id: str) -> bool:
+        return self._read_meta(self._entry_dir(report_id)) is not None
+
+    @staticmethod
+    def _read_meta(entry: str) -> Optional[Dict[str, Any]]:
+        """Metadane wpisu lub None, gdy wpisu nie ma albo ma starszy układ plików."""
+        try:
+            with open(os.path.join(entry, _META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("layout") == LAYOUT_VERSION else None
+
+    def load(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Wczytuje raport z cache'u bez kopiowania danych (memory-mapped).
+
+        Args:
+            report_id (str): Skrót zawartości pliku raportu
+
+        Returns:
+            Optional[Dict[str, Any]]: {"meta": ..., "columns": {nazwa: TextColumn | np.ndarray}} lub None
+        """
+        entry = self._entry_dir(report_id)
+        meta = self._read_meta(entry)
+        if meta is None:
+            return None
+        try:
+            columns: Dict[str, Any] = {
+                name: TextColumn(*(np.load(os.path.join(entry, f"{name}.{part}.npy"), mmap_mode="r") for part in TEXT_PARTS))
+                for name in TEXT_COLUMNS
+            }
+            for name in NUMERIC_COLUMNS:
+                columns[name] = np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        # Odświeżenie czasu użycia dla LRU
+        os.utime(entry, None)
+        return {"meta": meta, "columns": columns}
+
+    def store(self, report_id: str, columns: Dict[str, Any], meta: Dict[str, Any]) -> None:
+        """
+        Zapisuje kolumny raportu i uruchamia eviction jeśli cache przekracza limit.
+
+        Args:
+            report_id (str): Skrót zawartości pliku raportu
+            columns (Dict[str, Any]): Kolumny z groups_to_columns
+            meta (Dict[str, Any]): Metadane (np. nazwa pliku, liczba wierszy)
+        """
+        entry = self._entry_dir(report_id)
+        # Zapis do katalogu tymczasowego i atomowa zmiana nazwy (bezpieczne przy równoległych uploadach)
+        staging = tempfile.mkdtemp(prefix=f".{report_id}-", dir=self.directory)
+        try:
+            for name in TEXT_COLUMNS:
+                for part, array in zip(TEXT_PARTS, columns[name].parts()):
+                    np.save(os.path.join(staging, f"{name}.{part}.npy"), array, allow_pickle=False)
+            for name in NUMERIC_COLUMNS:
+                np.save(os.path.join(staging, f"{name}.npy"), columns[name], allow_pickle=False)
+            with open(os.path.join(staging, _META_FILE), "w", encoding="utf-8") as f:
+                json.dump({**meta, "layout": LAYOUT_VERSION}, f)
+            with self._lock:
+                if self._read_meta(entry) is not None:
+                    shutil.rmtree(staging, ignore_errors=True)
+                else:
+                    if os.path.exists(entry):
+                        # Wpis w starszym układzie plików - usuwany przed zapisem nowego
+                        stale = tempfile.mkdtemp(prefix=f".{report_id}-stale-", dir=self.directory)
+                        os.rename(entry, os.path.join(stale, "entry"))
+                        shutil.rmtree(stale, ignore_errors=True)
+                    os.rename(staging, entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Usuwa najdawniej używane raporty aż łączny rozmiar zmieści się w limicie.
+
+        Katalogi tymczasowe starsze niż STAGING_MAX_AGE (po awarii w trakcie zapisu) są usuwane,
+        a młodsze (trwające zapisy) wliczają się do rozmiaru cache'u.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            stale_before = time.time() - STAGING_MAX_AGE
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if not os.path.isdir(path):
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime
+                    size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                except OSError:
+                    # Katalog tymczasowy przemianowany lub usunięty w trakcie przeglądania
+                    continue
+                if name.startswith("."):
+                    if mtime < stale_before:
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        total += size
+                    continue
+                entries.append((mtime, size, path))
+                total += size
+            entries.sort()
+            # Zawsze zostawiamy najnowszy raport, nawet jeśli sam przekracza limit
+            for _, size, path in entries[:-1]:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+
+_report_cache: Optional[ReportCache] = None
+
+
+def get_report_cache() -> ReportCache:
+    """Zwraca współdzieloną instancję cache'u raportów (tworzoną przy pierwszym użyciu)."""
+    global _report_cache
+    if _report_cache is None:
+        _report_cache = ReportCache()
+    return _report_cache
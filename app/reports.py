@@ -0,0 +1,388 @@
+from typing import Dict, Any, Optional, List, Tuple, Iterable, BinaryIO, Union
+import re
+import openpyxl
+
+from .utils import calculate_forecast_from_metrics
+from .report_cache import get_report_cache, hash_report_file, groups_to_columns, NUMERIC_COLUMNS
+
+# Nazwy kolumn w raportach Amazon Sponsored Products (różne wersje eksportu)
+REPORT_COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "campaign": ("campaign name", "campaign"),
+    "ad_group": ("ad group name", "ad group"),
+    "keyword": ("targeting", "keyword", "keyword text", "customer search term", "search term"),
+    "match_type": ("match type",),
+    "campaign_id": ("campaign id",),
+    "ad_group_id": ("ad group id",),
+    "keyword_id": ("keyword id",),
+    "targeting_id": ("product targeting id", "targeting id", "target id"),
+    "impressions": ("impressions",),
+    "clicks": ("clicks",),
+    "spend": ("spend", "cost"),
+    "orders": ("7 day total orders (#)", "14 day total orders (#)", "total orders", "orders"),
+    "sales": ("7 day total sales", "14 day total sales", "total sales", "sales"),
+}
+
+# Kolumny identyfikatorów (opcjonalne - są w plikach bulk i części eksportów), potrzebne do bulk upload
+REPORT_ID_COLUMNS: Tuple[str, ...] = ("campaign_id", "ad_group_id", "keyword_id", "targeting_id")
+
+# Pola agregatu słowa kluczowego (kolejność = klucz grupowania w parse_ads_report)
+REPORT_GROUP_FIELDS: Tuple[str, ...] = ("campaign", "ad_group", "keyword", "match_type", "campaign_id", "ad_group_id", "target_id")
+
+# Kolumny numeryczne sumowane w agregacji (kolejność = indeksy w wektorze sum)
+REPORT_METRIC_COLUMNS: Tuple[str, ...] = ("impressions", "clicks", "spend", "orders", "sales")
+
+# Kolumny liczb całkowitych - pojedynczy separator przed trzema cyframi to zawsze separator tysięcy
+REPORT_INTEGER_COLUMNS: Tuple[str, ...] = ("impressions", "clicks", "orders")
+
+# Ile pierwszych wierszy przeszukać w poszukiwaniu nagłówka
+HEADER_SCAN_ROWS = 20
+
+# "1,234" / "1.234" - tysiące (US / PL, DE) albo ułamek z trzema miejscami, zależnie od ustawień regionalnych
+_AMBIGUOUS_NUMBER = re.compile(r"-?[1-9]\d{0,2}[.,]\d{3}")
+
+
+def _normalize_header(value: Any) -> str:
+    """Normalizuje nazwę kolumny (małe litery, bez symboli walut i nadmiarowych spacji)."""
+    if value is None:
+        return ""
+    text = str(value).strip().lower()
+    for symbol in ("€", "$", "£", "zł"):
+        text = text.replace(symbol, "")
+    text = text.replace("()", "")
+    return " ".join(text.split())
+
+
+def _number_text(value: Any) -> str:
+    """Tekst komórki bez symboli walut, procentów i spacji."""
+    text = str(value).strip()
+    for symbol in ("€", "$", "£", "zł", "%", " ", " "):
+        text = text.replace(symbol, "")
+    return text
+
+
+def _decimal_separator(value: Any) -> Optional[str]:
+    """
+    Separator dziesiętny wynikający jednoznacznie z komórki tekstowej (ustawienia regionalne pliku).
+
+    Returns:
+        Optional[str]: "," lub "." albo None, jeśli komórka nie rozstrzyga (np. "1,234", "15")
+    """
+    if value is None or isinstance(value, (int, float)):
+        return None
+    text = _number_text(value)
+    if "," in text and "." in text:
+        return "," if text.rfind(",") > text.rfind(".") else "."
+    for separator, other in ((",", "."), (".", ",")):
+        if text.count(separator) > 1:
+            return other
+        if text.count(separator) == 1 and not _AMBIGUOUS_NUMBER.fullmatch(text):
+            return separator
+    return None
+
+
+def _is_ambiguous_number(value: Any) -> bool:
+    return isinstance(value, str) and _AMBIGUOUS_NUMBER.fullmatch(_number_text(value)) is not None
+
+
+def _to_number(value: Any, decimal: Optional[str] = None, integer: bool = False) -> float:
+    """
+    Zamienia wartość komórki na liczbę (obsługuje tekst z walutą, procentami i przecinkami).
+
+    Args:
+        value (Any): Wartość komórki
+        decimal (Optional[str]): Separator dziesiętny pliku ("," / "."), jeśli znany z innych komórek
+        integer (bool): Kolumna liczb całkowitych (wyświetlenia, kliknięcia, zamówienia)
+
+    Returns:
+        float: Liczba; niejednoznaczne "1,234" / "1.234" to tysiące w kolumnach całkowitych
+            i w plikach bez znanego separatora dziesiętnego
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = _number_text(value)
+    if not text:
+        return 0.0
+    if _AMBIGUOUS_NUMBER.fullmatch(text):
+        separator = "," if "," in text else "."
+        text = text.replace(separator, "." if separator == decimal and not integer else "")
+    elif "," in text and "." in text:
+        # Separatorem dziesiętnym jest ten, który występuje jako ostatni ("1.234,56" / "1,234.56")
+        decimal, thousands = (",", ".") if text.rfind(",") > text.rfind(".") else (".", ",")
+        text = text.replace(thousands, "").replace(decimal, ".")
+    elif text.count(",") > 1 or text.count(".") > 1:
+        # Ten sam separator kilka razy to separator tysięcy ("1.234.567")
+        text = text.replace(",", "").replace(".", "")
+    else:
+        text = text.replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _to_text(value: Any) -> str:
+    """Wartość komórki jako tekst (identyfikatory liczbowe bez części ułamkowej i notacji wykładniczej)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _map_header(row: Iterable[Any]) -> Optional[Dict[str, int]]:
+    """
+    Dopasowuje wiersz nagłówka do kolumn raportu.
+
+    Returns:
+        Optional[Dict[str, int]]: Mapowanie nazwa pola -> indeks kolumny lub None jeśli to nie nagłówek
+    """
+    normalized = [_normalize_header(cell) for cell in row]
+    mapping: Dict[str, int] = {}
+    for field, aliases in REPORT_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized.index(alias)
+                break
+    if "campaign" not in mapping or not all(col in mapping for col in REPORT_METRIC_COLUMNS):
+        return None
+    return mapping
+
+
+def derive_metrics(impressions: float, clicks: float, spend: float, orders: float, sales: float) -> Dict[str, float]:
+    """
+    Wylicza rzeczywiste wskaźniki CTR/CPC/CVR/AOV/ACOS z sum raportu.
+
+    Args:
+        impressions (float): Suma wyświetleń
+        clicks (float): Suma kliknięć
+        spend (float): Suma wydatków
+        orders (float): Suma zamówień
+        sales (float): Suma sprzedaży
+
+    Returns:
+        Dict[str, float]: Słownik z wskaźnikami (procenty jak w formularzu prognozy)
+    """
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "spend": round(spend, 2),
+        "orders": orders,
+        "sales": round(sales, 2),
+        "ctr": round((clicks / impressions) * 100, 4) if impressions > 0 else 0,
+        "cpc": round(spend / clicks, 4) if clicks > 0 else 0,
+        "cvr": round((orders / clicks) * 100, 4) if clicks > 0 else 0,
+        "aov": round(sales / orders, 2) if orders > 0 else 0,
+        "acos": round((spend / sales) * 100, 2) if sales > 0 else 0,
+    }
+
+
+def parse_ads_report(source: Union[str, BinaryIO]) -> Dict[str, Any]:
+    """
+    Wczytuje raport Amazon Sponsored Products (.xlsx) strumieniowo w jednym przejściu.
+
+    Plik otwierany jest w trybie read_only openpyxl, więc w pamięci trzymane są
+    tylko sumy per (kampania, grupa reklam, słowo kluczowe, typ dopasowania), a nie całe arkusze.
+    Ten sam tekst w dopasowaniu EXACT, PHRASE i BROAD to osobne słowa kluczowe.
+    Separator dziesiętny pliku jest ustalany z komórek, które go rozstrzygają ("1.234,56", "5,00");
+    niejednoznaczne kwoty ("1,234") są przeliczane po przeczytaniu całego pliku.
+    Identyfikatory kampanii, grupy i słowa kluczowego / targetu są przenoszone, jeśli raport je zawiera.
+
+    Args:
+        source (Union[str, BinaryIO]): Ścieżka do pliku lub otwarty plik binarny
+
+    Returns:
+        Dict[str, Any]: Sumy całkowite ze wskaźnikami oraz surowe sumy per kampania/grupa/słowo kluczowe/typ dopasowania
+    """
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        if ws is None:
+            raise ValueError("Raport nie zawiera arkusza z danymi")
+
+        rows = ws.iter_rows(values_only=True)
+        mapping: Optional[Dict[str, int]] = None
+        for _ in range(HEADER_SCAN_ROWS):
+            row = next(rows, None)
+            if row is None:
+                break
+            mapping = _map_header(row)
+            if mapping is not None:
+                break
+        if mapping is None:
+            raise ValueError("Nie znaleziono nagłówka raportu Sponsored Products (Campaign Name, Impressions, Clicks, Spend, Orders, Sales)")
+
+        campaign_idx = mapping["campaign"]
+        ad_group_idx = mapping.get("ad_group")
+        keyword_idx = mapping.get("keyword")
+        match_type_idx = mapping.get("match_type")
+        id_idx = [mapping.get(col) for col in REPORT_ID_COLUMNS]
+        metric_idx = [mapping[col] for col in REPORT_METRIC_COLUMNS]
+        integer_columns = [col in REPORT_INTEGER_COLUMNS for col in REPORT_METRIC_COLUMNS]
+
+        groups: Dict[Tuple[str, ...], List[float]] = {}
+        totals = [0.0] * len(REPORT_METRIC_COLUMNS)
+        row_count = 0
+        decimal: Optional[str] = None
+        # Niejednoznaczne kwoty sprzed ustalenia separatora: (sumy grupy, indeks kolumny, wartość)
+        deferred: List[Tuple[List[float], int, Any]] = []
+
+        for row in rows:
+            if row is None or campaign_idx >= len(row) or row[campaign_idx] in (None, ""):
+                continue
+            key = (
+                str(row[campaign_idx]),
+                str(row[ad_group_idx] or "") if ad_group_idx is not None and ad_group_idx < len(row) else "",
+                str(row[keyword_idx] or "") if keyword_idx is not None and keyword_idx < len(row) else "",
+                str(row[match_type_idx] or "").strip().upper() if match_type_idx is not None and match_type_idx < len(row) else "",
+            )
+            campaign_id, ad_group_id, keyword_id, targeting_id = (
+                _to_text(row[idx]) if idx is not None and idx < len(row) else "" for idx in id_idx
+            )
+            key += (campaign_id, ad_group_id, keyword_id or targeting_id)
+            sums = groups.get(key)
+            if sums is None:
+                sums = groups[key] = [0.0] * len(REPORT_METRIC_COLUMNS)
+            for i, idx in enumerate(metric_idx):
+                cell = row[idx] if idx < len(row) else None
+                if decimal is None and not integer_columns[i]:
+                    decimal = _decimal_separator(cell)
+                    if decimal is None and _is_ambiguous_number(cell):
+                        deferred.append((sums, i, cell))
+                        continue
+                value = _to_number(cell, decimal, integer_columns[i])
+                sums[i] += value
+                totals[i] += value
+            row_count += 1
+    finally:
+        wb.close()
+
+    for sums, i, cell in deferred:
+        value = _to_number(cell, decimal)
+        sums[i] += value
+        totals[i] += value
+
+    return {
+        "rows": row_count,
+        "totals": derive_metrics(*totals),
+        # Surowe sumy (bez zaokrągleń) - wskaźniki i zaokrąglenia dopiero przy prezentacji (derive_metrics)
+        "groups": [
+            {**dict(zip(REPORT_GROUP_FIELDS, key)), **dict(zip(REPORT_METRIC_COLUMNS, sums))}
+            for key, sums in groups.items()
+        ],
+    }
+
+
+def aggregate_report_groups(groups: List[Dict[str, Any]], level: str = "campaign") -> List[Dict[str, Any]]:
+    """
+    Zwija agregaty słów kluczowych do poziomu kampanii lub grupy reklam.
+
+    Args:
+        groups (List[Dict[str, Any]]): Agregaty z parse_ads_report
+        level (str): "campaign", "ad_group" lub "keyword"
+
+    Returns:
+        List[Dict[str, Any]]: Agregaty na wybranym poziomie z przeliczonymi wskaźnikami
+    """
+    key_fields = {
+        "campaign": ("campaign",),
+        "ad_group": ("campaign", "ad_group"),
+        "keyword": ("campaign", "ad_group", "keyword", "match_type"),
+    }
+    if level not in key_fields:
+        raise ValueError(f"Nieznany poziom agregacji: {level}")
+    fields = key_fields[level]
+
+    rolled: Dict[Tuple[str, ...], List[float]] = {}
+    for group in groups:
+        key = tuple(group[field] for field in fields)
+        sums = rolled.setdefault(key, [0.0] * len(REPORT_METRIC_COLUMNS))
+        for i, col in enumerate(REPORT_METRIC_COLUMNS):
+            sums[i] += group[col]
+
+    return [
+        {**dict(zip(fields, key)), **derive_metrics(*sums)}
+        for key, sums in rolled.items()
+    ]
+
+
+def load_report(source: BinaryIO, filename: str = "") -> Dict[str, Any]:
+    """
+    Zwraca kolumny raportu z cache'u na dysku, parsując plik tylko przy pierwszym użyciu.
+
+    Kluczem cache'u jest skrót SHA-256 zawartości pliku, więc ponowne przesłanie
+    tego samego raportu (nawet pod inną nazwą) nie wymaga ponownego parsowania.
+
+    Args:
+        source (BinaryIO): Otwarty plik binarny raportu (.xlsx)
+        filename (str): Oryginalna nazwa pliku (zapisywana w metadanych)
+
+    Returns:
+        Dict[str, Any]: Identyfikator raportu, metadane, kolumny (mmap) i sumy całkowite
+    """
+    cache = get_report_cache()
+    report_id = hash_report_file(source)
+    cached = cache.load(report_id)
+    if cached is None:
+        report = parse_ads_report(source)
+        meta = {"filename": filename, "rows": report["rows"], "groups": len(report["groups"])}
+        cache.store(report_id, groups_to_columns(report["groups"]), meta)
+        cached = cache.load(report_id)
+        if cached is None:
+            raise ValueError("Nie udało się zapisać raportu w cache")
+    return build_report_summary(report_id, cached)
+
+
+def load_cached_report(report_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Wczytuje wcześniej przesłany raport po identyfikatorze (bez ponownego parsowania).
+
+    Args:
+        report_id (str): Skrót zawartości pliku raportu
+
+    Returns:
+        Optional[Dict[str, Any]]: Podsumowanie raportu lub None jeśli nie ma go w cache
+    """
+    cached = get_report_cache().load(report_id)
+    if cached is None:
+        return None
+    return build_report_summary(report_id, cached)
+
+
+def build_report_summary(report_id: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+    """Składa podsumowanie raportu z kolumn cache'u (sumy liczone wektorowo)."""
+    columns = cached["columns"]
+    totals = derive_metrics(*(float(columns[name].sum()) for name in NUMERIC_COLUMNS))
+    return {
+        "report_id": report_id,
+        "meta": cached["meta"],
+        "columns": columns,
+        "totals": totals,
+    }
+
+
+def forecast_from_report(
+    report_metrics: Dict[str, Any],
+    gross_margin: float,
+    impressions: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Buduje prognozę na bazie rzeczywistych wskaźników z raportu.
+
+    Args:
+        report_metrics (Dict[str, Any]): Wskaźniki z derive_metrics (np. parse_ads_report(...)["totals"])
+        gross_margin (float): Marża brutto w procentach
+        impressions (Optional[int]): Liczba wyświetleń do prognozy (domyślnie jak w raporcie)
+
+    Returns:
+        Dict[str, Any]: Wynik calculate_forecast_from_metrics
+    """
+    return calculate_forecast_from_metrics(
+        gross_margin,
+        report_metrics["aov"],
+        report_metrics["ctr"],
+        report_metrics["cpc"],
+        report_metrics["cvr"],
+        int(impressions if impressions is not None else report_metrics["impressions"])
+    )
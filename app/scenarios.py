@@ -0,0 +1,246 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from .metrics import BATCH_MODES, evaluate_batch
+
+# Ścieżka bazy scenariuszy (konfigurowalna zmienną środowiskową)
+SCENARIO_DB_PATH = os.environ.get("SCENARIO_DB_PATH", "scenarios.db")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    mode TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scenarios_owner_created ON scenarios (owner, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_scenarios_created ON scenarios (created_at, id);
+CREATE TABLE IF NOT EXISTS scenario_tags (
+    tag TEXT NOT NULL,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios (id) ON DELETE CASCADE,
+    owner TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (tag, scenario_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scenario_tags_scenario ON scenario_tags (scenario_id);
+"""
+
+# owner i created_at są skopiowane do tagów - strona filtrowana po tagu czyta tylko wpisy indeksu
+# z tym tagiem i właścicielem, niezależnie od liczby pozostałych scenariuszy właściciela
+_TAG_INDEX = "CREATE INDEX IF NOT EXISTS idx_scenario_tags_owner ON scenario_tags (tag, owner, created_at, scenario_id)"
+# Bazy sprzed kopiowania owner / created_at do tagów
+_MIGRATE_TAGS = """
+ALTER TABLE scenario_tags ADD COLUMN owner TEXT NOT NULL DEFAULT '';
+ALTER TABLE scenario_tags ADD COLUMN created_at REAL NOT NULL DEFAULT 0;
+UPDATE scenario_tags SET (owner, created_at) = (
+    SELECT s.owner, s.created_at FROM scenarios s WHERE s.id = scenario_tags.scenario_id
+);
+"""
+
+# Zapytania jako stałe - sqlite3 trzyma skompilowane instrukcje w cache'u połączenia
+_INSERT_SCENARIO = "INSERT INTO scenarios (owner, name, mode, inputs, created_at) VALUES (?, ?, ?, ?, ?)"
+_INSERT_TAG = "INSERT OR IGNORE INTO scenario_tags (tag, scenario_id, owner, created_at) VALUES (?, ?, ?, ?)"
+_SELECT_COLUMNS = "SELECT s.id, s.owner, s.name, s.mode, s.inputs, s.created_at FROM scenarios s"
+_LIST_BY_OWNER = _SELECT_COLUMNS + """
+    WHERE s.owner = ? AND (s.created_at, s.id) < (?, ?)
+    ORDER BY s.created_at DESC, s.id DESC LIMIT ?"""
+_LIST_BY_OWNER_TAG = _SELECT_COLUMNS + """
+    JOIN scenario_tags t ON t.scenario_id = s.id
+    WHERE t.tag = ? AND t.owner = ? AND (t.created_at, t.scenario_id) < (?, ?)
+    ORDER BY t.created_at DESC, t.scenario_id DESC LIMIT ?"""
+_SELECT_TAGS = "SELECT scenario_id, tag FROM scenario_tags WHERE scenario_id IN ({placeholders}) ORDER BY tag"
+_SELECT_BY_IDS = _SELECT_COLUMNS + " WHERE s.id IN ({placeholders})"
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+def encode_cursor(created_at: float, scenario_id: int) -> str:
+    """Kursor stronicowania (keyset) wskazujący ostatni element strony."""
+    return f"{created_at!r}:{scenario_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[float, int]:
+    if not cursor:
+        return float("inf"), 0
+    try:
+        created_at, scenario_id = cursor.split(":")
+        return float(created_at), int(scenario_id)
+    except ValueError:
+        raise ValueError(f"Nieprawidłowy kursor: {cursor}")
+
+
+class ScenarioStore:
+    """
+    Trwały magazyn scenariuszy w SQLite (tryb WAL, osobne połączenie na wątek).
+
+    Listy są stronicowane kursorem (created_at, id), więc koszt strony nie rośnie
+    z liczbą zapisanych scenariuszy.
+    """
+
+    def __init__(self, path: str = SCENARIO_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            if "owner" not in [column[1] for column in conn.execute("PRAGMA table_info(scenario_tags)")]:
+                conn.executescript(_MIGRATE_TAGS)
+            conn.execute(_TAG_INDEX)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save_many(self, scenarios: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Zapisuje wiele scenariuszy w jednej transakcji.
+
+        Args:
+            scenarios (Sequence[Dict[str, Any]]): Scenariusze z kluczami owner, mode, inputs oraz opcjonalnie name, tags
+
+        Returns:
+            List[int]: Identyfikatory zapisanych scenariuszy
+        """
+        now = time.time()
+        rows = []
+        for scenario in scenarios:
+            mode = scenario.get("mode", "forecast")
+            if mode not in BATCH_MODES:
+                raise ValueError(f"Nieznany tryb: {mode}")
+            _, input_names, _ = BATCH_MODES[mode]
+            inputs = scenario["inputs"]
+            missing = [name for name in input_names if name not in inputs]
+            if missing:
+                raise ValueError(f"Brak wejść scenariusza: {', '.join(missing)}")
+            values = {name: float(inputs[name]) for name in input_names}
+            # Ta sama walidacja co w kalkulatorach - zapisany scenariusz musi dać się otworzyć
+            if any(not math.isfinite(value) or value < 0 for value in values.values()):
+                raise ValueError("Wszystkie wartości muszą być dodatnie!")
+            rows.append((
+                str(scenario["owner"]),
+                str(scenario.get("name", "")),
+                mode,
+                json.dumps(values),
+                now,
+            ))
+
+        conn = self._connection()
+        ids: List[int] = []
+        with conn:
+            # executemany nie zwraca identyfikatorów, a INTEGER PRIMARY KEY jest nadawany kolejno w transakcji
+            cursor = conn.executemany(_INSERT_SCENARIO, rows)
+            if rows:
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                ids = list(range(last_id - cursor.rowcount + 1, last_id + 1))
+            tag_rows = [
+                (str(tag), scenario_id, row[0], now)
+                for scenario_id, scenario, row in zip(ids, scenarios, rows)
+                for tag in scenario.get("tags", ())
+            ]
+            conn.executemany(_INSERT_TAG, tag_rows)
+        return ids
+
+    def save(self, owner: str, inputs: Dict[str, float], mode: str = "forecast", name: str = "", tags: Sequence[str] = ()) -> int:
+        """Zapisuje pojedynczy scenariusz i zwraca jego identyfikator."""
+        return self.save_many([{"owner": owner, "inputs": inputs, "mode": mode, "name": name, "tags": tags}])[0]
+
+    def _rows_to_dicts(self, rows: List[Tuple]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        tags: Dict[int, List[str]] = {}
+        query = _SELECT_TAGS.format(placeholders=_placeholders(len(ids)))
+        for scenario_id, tag in self._connection().execute(query, ids):
+            tags.setdefault(scenario_id, []).append(tag)
+        return [
+            {
+                "id": scenario_id,
+                "owner": owner,
+                "name": name,
+                "mode": mode,
+                "inputs": json.loads(inputs),
+                "created_at": created_at,
+                "tags": tags.get(scenario_id, []),
+            }
+            for scenario_id, owner, name, mode, inputs, created_at in rows
+        ]
+
+    def list(self, owner: str, tag: Optional[str] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Zwraca stronę scenariuszy właściciela (najnowsze pierwsze).
+
+        Args:
+            owner (str): Właściciel scenariuszy
+            tag (Optional[str]): Filtr po tagu
+            cursor (Optional[str]): Kursor z poprzedniej strony ("next_cursor")
+            limit (int): Rozmiar strony
+
+        Returns:
+            Dict[str, Any]: Scenariusze ("items") i kursor następnej strony ("next_cursor")
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        created_at, scenario_id = decode_cursor(cursor)
+        conn = self._connection()
+        if tag:
+            rows = conn.execute(_LIST_BY_OWNER_TAG, (tag, owner, created_at, scenario_id, limit)).fetchall()
+        else:
+            rows = conn.execute(_LIST_BY_OWNER, (owner, created_at, scenario_id, limit)).fetchall()
+        items = self._rows_to_dicts(rows)
+        next_cursor = encode_cursor(rows[-1][5], rows[-1][0]) if len(rows) == limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def get_many(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Wczytuje scenariusze po identyfikatorach (w kolejności podanych id)."""
+        if not ids:
+            return []
+        query = _SELECT_BY_IDS.format(placeholders=_placeholders(len(ids)))
+        by_id = {item["id"]: item for item in self._rows_to_dicts(self._connection().execute(query, list(ids)).fetchall())}
+        return [by_id[scenario_id] for scenario_id in ids if scenario_id in by_id]
+
+    def compare(self, ids: Sequence[int], eur_rate: float) -> List[Dict[str, Any]]:
+        """
+        Wczytuje scenariusze i przelicza je jednym wsadowym przebiegiem na tryb.
+
+        Args:
+            ids (Sequence[int]): Identyfikatory scenariuszy
+            eur_rate (float): Kurs EUR/PLN
+
+        Returns:
+            List[Dict[str, Any]]: Scenariusze z polem "results"
+        """
+        scenarios = self.get_many(ids)
+        for mode, (_, input_names, _) in BATCH_MODES.items():
+            group = [scenario for scenario in scenarios if scenario["mode"] == mode]
+            if not group:
+                continue
+            columns = evaluate_batch(mode, {name: [s["inputs"][name] for s in group] for name in input_names}, eur_rate)
+            for i, scenario in enumerate(group):
+                scenario["results"] = {name: values[i] for name, values in columns.items()}
+        return scenarios
+
+
+_scenario_store: Optional[ScenarioStore] = None
+
+
+def get_scenario_store() -> ScenarioStore:
+    """Zwraca współdzieloną instancję magazynu scenariuszy (tworzoną przy pierwszym użyciu)."""
+    global _scenario_store
+    if _scenario_store is None:
+        _scenario_store = ScenarioStore()
+    return _scenario_store
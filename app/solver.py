@@ -0,0 +1,250 @@
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import math
+
+from .metrics import MetricGraph, FORECAST_GRAPH, BUDGET_GRAPH
+
+# Zakresy dopuszczalnych wartości wejściowych (używane przez solver numeryczny)
+FORECAST_INPUT_BOUNDS: Dict[str, Tuple[float, float]] = {
+    "gross_margin": (0.0, 100.0),
+    "target_aov": (0.0, 1e6),
+    "target_ctr": (0.0, 100.0),
+    "target_cpc": (0.0, 1e4),
+    "target_cvr": (0.0, 100.0),
+    "impressions": (0.0, 1e12),
+}
+
+BUDGET_INPUT_BOUNDS: Dict[str, Tuple[float, float]] = {
+    "target_sales": (0.0, 1e12),
+    "target_tacos": (0.0, 1e3),
+    "gross_margin": (0.0, 100.0),
+}
+
+# Liczba punktów próbkowania przy szukaniu przedziału ze zmianą znaku
+BRACKET_SAMPLES = 64
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-10
+# Dopuszczalny względny błąd wskaźnika w punkcie rozwiązania wzoru zamkniętego
+SOLUTION_TOLERANCE = 1e-6
+
+# Nazwy wskaźników solvera (klucze wyników kalkulatorów) -> węzły grafu wskaźników
+FORECAST_OUTPUTS: Dict[str, str] = {
+    "clicks": "clicks",
+    "orders": "orders",
+    "projected_spend": "spend",
+    "projected_sales": "sales",
+    "acos": "acos",
+    "roi": "roi",
+    "roas": "roas",
+    "profit": "profit",
+    "profit_per_sale": "profit_per_sale",
+    "cpm": "cpm",
+    "cost_per_conversion": "cost_per_conversion",
+}
+
+BUDGET_OUTPUTS: Dict[str, str] = {
+    "marketing_budget": "spend",
+    "gross_profit": "gross_profit",
+    "net_profit": "profit",
+    "roi": "roi",
+    "profit_margin": "profit_margin",
+}
+
+MODELS: Dict[str, Tuple[MetricGraph, Dict[str, str], Dict[str, Tuple[float, float]]]] = {
+    "forecast": (FORECAST_GRAPH, FORECAST_OUTPUTS, FORECAST_INPUT_BOUNDS),
+    "budget": (BUDGET_GRAPH, BUDGET_OUTPUTS, BUDGET_INPUT_BOUNDS),
+}
+
+# Wyjścia wieloliniowe względem wejść modelu - liniowe w każdym pojedynczym wejściu
+LINEAR_OUTPUTS: Dict[str, Tuple[str, ...]] = {
+    "forecast": ("clicks", "orders", "projected_spend", "projected_sales", "profit"),
+    "budget": ("marketing_budget", "gross_profit", "net_profit"),
+}
+
+
+def _closed_form_rational(model: str, output: str, solve_for: str, target: float, inputs: Dict[str, float]) -> Optional[float]:
+    """
+    Odwrócenie wzorów wymiernych w postaci zamkniętej.
+
+    ACOS = 100 × CPC / (CVR% × AOV), ROAS = CVR% × AOV / CPC, ROI = 100 × (ROAS − 1),
+    ROI budżetu = 100 × (100 / TACOS − 1).
+
+    Returns:
+        Optional[float]: Rozwiązanie lub None jeśli para wyjście/wejście nie ma wzoru zamkniętego
+    """
+    if model == "forecast" and output in ("acos", "roas", "roi"):
+        if output == "acos":
+            if target <= 0:
+                return None
+            roas = 100 / target
+        elif output == "roas":
+            roas = target
+        else:
+            roas = target / 100 + 1
+        if roas <= 0:
+            return None
+        cvr = inputs["target_cvr"] / 100
+        aov = inputs["target_aov"]
+        cpc = inputs["target_cpc"]
+        # ROAS = cvr × aov / cpc; przy zerowym liczniku lub CPC wskaźnik nie zależy od szukanego wejścia
+        if solve_for == "target_cpc":
+            return cvr * aov / roas if cvr * aov > 0 else None
+        if solve_for == "target_cvr":
+            return 100 * roas * cpc / aov if aov > 0 and cpc > 0 else None
+        if solve_for == "target_aov":
+            return roas * cpc / cvr if cvr > 0 and cpc > 0 else None
+        raise ValueError(f"Wskaźnik '{output}' nie zależy od '{solve_for}'")
+
+    if model == "budget" and output == "roi":
+        if solve_for != "target_tacos":
+            raise ValueError(f"Wskaźnik '{output}' nie zależy od '{solve_for}'")
+        ratio = target / 100 + 1
+        return 100 / ratio if ratio > 0 else None
+
+    return None
+
+
+def _find_root(func: Callable[[float], float], lo: float, hi: float) -> Optional[float]:
+    """
+    Szuka miejsca zerowego funkcji na przedziale [lo, hi].
+
+    Najpierw próbkuje przedział (logarytmicznie, bo wartości wejść rozciągają się na wiele rzędów),
+    a po znalezieniu zmiany znaku zawęża go metodą bisekcji.
+
+    Returns:
+        Optional[float]: Miejsce zerowe lub None jeśli nie znaleziono zmiany znaku
+    """
+    start = max(lo, 1e-9)
+    points = [lo] + [start * (hi / start) ** (i / (BRACKET_SAMPLES - 1)) for i in range(BRACKET_SAMPLES)]
+    prev_x, prev_y = points[0], func(points[0])
+    if prev_y == 0:
+        return prev_x
+    for x in points[1:]:
+        y = func(x)
+        if y == 0:
+            return x
+        if (prev_y < 0) != (y < 0):
+            a, b, fa = prev_x, x, prev_y
+            for _ in range(MAX_ITERATIONS):
+                mid = (a + b) / 2
+                fm = func(mid)
+                if fm == 0 or (b - a) <= TOLERANCE * max(1.0, abs(mid)):
+                    return mid
+                if (fa < 0) == (fm < 0):
+                    a, fa = mid, fm
+                else:
+                    b = mid
+            return (a + b) / 2
+        prev_x, prev_y = x, y
+    return None
+
+
+def solve_goal(
+    model: str,
+    output: str,
+    target: float,
+    solve_for: str,
+    inputs: Dict[str, float],
+    bounds: Optional[Tuple[float, float]] = None
+) -> Dict[str, Any]:
+    """
+    Znajduje wartość wybranego wejścia, przy której wskaźnik osiąga zadaną wartość.
+
+    Używa wzorów zamkniętych tam gdzie model jest liniowy lub wymierny,
+    a w pozostałych przypadkach numerycznego solvera z przedziałem.
+
+    Args:
+        model (str): "forecast" (calculate_forecast_from_metrics) lub "budget" (calculate_budget_from_tacos)
+        output (str): Nazwa wskaźnika do ustalenia (np. "profit", "acos", "net_profit")
+        target (float): Docelowa wartość wskaźnika
+        solve_for (str): Nazwa wejścia, którego wartość szukamy (np. "impressions", "target_cvr")
+        inputs (Dict[str, float]): Pozostałe wartości wejściowe modelu
+        bounds (Optional[Tuple[float, float]]): Zakres poszukiwań (domyślnie zakres wejścia)
+
+    Returns:
+        Dict[str, Any]: Znaleziona wartość, zastosowana metoda i wskaźniki w punkcie rozwiązania
+    """
+    if model not in MODELS:
+        raise ValueError(f"Nieznany model: {model}")
+    graph, output_nodes, input_bounds = MODELS[model]
+    if solve_for not in input_bounds:
+        raise ValueError(f"Nieznane wejście modelu '{model}': {solve_for}")
+    if output not in output_nodes:
+        raise ValueError(f"Nieznany wskaźnik modelu '{model}': {output}")
+
+    params = {name: float(inputs.get(name, 0)) for name in input_bounds}
+    lo, hi = bounds if bounds is not None else input_bounds[solve_for]
+    node = output_nodes[output]
+
+    # Jedna ewaluacja grafu - zmiana szukanego wejścia przelicza tylko zależne wskaźniki
+    evaluation = graph.evaluate(**params)
+
+    def evaluate(x: float) -> float:
+        return evaluation.update(**{solve_for: x})[node]
+
+    if output in LINEAR_OUTPUTS[model]:
+        # Wskaźnik wieloliniowy: f(x) = a + b·x
+        a = evaluate(0.0)
+        b = evaluate(1.0) - a
+        if b == 0:
+            raise ValueError(f"Wskaźnik '{output}' nie zależy od '{solve_for}' przy podanych danych")
+        value = (target - a) / b
+        method = "closed_form"
+    else:
+        value = _closed_form_rational(model, output, solve_for, target, params)
+        method = "closed_form"
+        if value is None:
+            value = _find_root(lambda x: evaluate(x) - target, lo, hi)
+            method = "root_finder"
+
+    # Wzór zamknięty zakłada niezerowe współczynniki - rozwiązanie musi dawać zadany wskaźnik
+    if (
+        value is None or math.isnan(value) or not (lo <= value <= hi)
+        or (method == "closed_form" and abs(evaluate(value) - target) > SOLUTION_TOLERANCE * max(1.0, abs(target)))
+    ):
+        raise ValueError(f"Brak rozwiązania: '{output}' = {target} nie jest osiągalne przez zmianę '{solve_for}' w zakresie [{lo}, {hi}]")
+
+    if solve_for == "impressions":
+        value = float(math.ceil(value - TOLERANCE))
+
+    solution = {**params, solve_for: value}
+    evaluation.update(**{solve_for: value})
+    return {
+        "model": model,
+        "output": output,
+        "target": target,
+        "solve_for": solve_for,
+        "value": round(value, 6),
+        "method": method,
+        "inputs": solution,
+        "outputs": {name: round(evaluation[node_name], 6) for name, node_name in output_nodes.items()},
+    }
+
+
+def solve_goals(goals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rozwiązuje listę celów w jednym wywołaniu (np. tabela punktów rentowności).
+
+    Błąd pojedynczego celu nie przerywa całej partii - trafia do pola "error".
+
+    Args:
+        goals (List[Dict[str, Any]]): Cele z kluczami jak argumenty solve_goal
+
+    Returns:
+        List[Dict[str, Any]]: Wyniki w kolejności celów
+    """
+    results = []
+    for goal in goals:
+        try:
+            results.append(solve_goal(
+                goal.get("model", "forecast"),
+                goal["output"],
+                float(goal["target"]),
+                goal["solve_for"],
+                goal.get("inputs", {}),
+                tuple(goal["bounds"]) if goal.get("bounds") else None
+            ))
+        except KeyError as e:
+            results.append({**goal, "error": f"Brak wymaganego pola: {e}"})
+        except (TypeError, ValueError) as e:
+            results.append({**goal, "error": str(e)})
+    return results
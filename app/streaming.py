@@ -0,0 +1,212 @@
+"""
+Strumieniowe API prognoz wsadowych w formacie NDJSON (jeden scenariusz JSON na linię).
+
+Ciało żądania jest czytane przyrostowo, scenariusze są liczone paczkami po
+STREAM_CHUNK_SIZE, a wyniki wysyłane od razu po policzeniu paczki. Kolejna paczka
+jest czytana dopiero po wysłaniu poprzedniej, więc wolny klient spowalnia przetwarzanie
+zamiast powodować buforowanie wyników po stronie serwera.
+"""
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+from datetime import date
+import json
+import math
+import os
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from .metrics import FORECAST_GRAPH, FORECAST_INPUTS, round_output
+from .utils import resolve_eur_rates
+
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "1000"))
+# Limit długości pojedynczej linii - chroni przed buforowaniem ciała bez znaków nowej linii
+MAX_LINE_BYTES = 64 * 1024
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Pola "input_parameters" z generate_export_data -> wejścia grafu prognozy
+EXPORT_INPUT_FIELDS: Dict[str, str] = {
+    "gross_margin_percent": "gross_margin",
+    "target_aov_eur": "target_aov",
+    "target_ctr_percent": "target_ctr",
+    "target_cpc_eur": "target_cpc",
+    "target_cvr_percent": "target_cvr",
+    "impressions": "impressions",
+}
+
+# Pola "forecast_results" z generate_export_data: (węzeł grafu, miejsca po przecinku)
+EXPORT_RESULT_FIELDS: Dict[str, Tuple[str, int]] = {
+    "projected_sales_eur": ("sales_micro", 0),
+    "projected_spend_eur": ("spend_micro", 0),
+    "expected_acos_percent": ("acos", 0),
+    "roi_percent": ("roi", 0),
+    "profit_per_sale_eur": ("profit_per_sale_micro", 0),
+    "total_profit_eur": ("profit_micro", 0),
+    "break_even_acos_percent": ("break_even_acos", 0),
+    "projected_clicks": ("clicks", 0),
+    "projected_orders": ("orders", 0),
+    "roas": ("roas", 2),
+    "cpm_eur": ("cpm_micro", 2),
+    "cost_per_conversion_eur": ("cost_per_conversion_micro", 2),
+}
+
+_forecast_batch = FORECAST_GRAPH.compile(
+    [node for node, _ in EXPORT_RESULT_FIELDS.values()] + ["is_profitable", "profitability_status", "profitability_message"],
+    FORECAST_INPUTS + ("eur_rate",)
+)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Odpowiedź strumieniowa wysyłana w trakcie czytania ciała żądania.
+
+    StreamingResponse nasłuchuje rozłączenia klienta przez receive(), co zabierałoby
+    komunikaty z ciałem żądania. Tutaj receive() należy do generatora czytającego ciało,
+    a rozłączenie kończy go wyjątkiem ClientDisconnect.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+def parse_record(line: bytes) -> Dict[str, Any]:
+    """
+    Odczytuje scenariusz z linii NDJSON.
+
+    Przyjmuje dokument z generate_export_data (pole "input_parameters")
+    albo płaski obiekt z polami input_parameters; opcjonalnie "id" i "as_of".
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Linia musi zawierać obiekt JSON")
+    params = record.get("input_parameters", record)
+    missing = [field for field in EXPORT_INPUT_FIELDS if params.get(field) is None]
+    if missing:
+        raise ValueError(f"Brak pól: {', '.join(missing)}")
+    values = {name: float(params[field]) for field, name in EXPORT_INPUT_FIELDS.items()}
+    if any(not math.isfinite(value) or value < 0 for value in values.values()):
+        raise ValueError("Wszystkie wartości muszą być dodatnie!")
+    as_of = record.get("as_of") or (record.get("currency_info") or {}).get("eur_pln_rate_date")
+    if as_of:
+        as_of = date.fromisoformat(str(as_of)[:10]).isoformat()
+    return {"id": record.get("id"), "as_of": as_of, "inputs": values}
+
+
+def forecast_records(records: List[Tuple[int, Dict[str, Any]]], current_rate: Dict[str, Any]) -> List[bytes]:
+    """
+    Liczy paczkę scenariuszy jednym przebiegiem grafu i zwraca wyniki jako linie NDJSON.
+
+    Args:
+        records (List[Tuple[int, Dict[str, Any]]]): Numer linii i scenariusz z parse_record
+        current_rate (Dict[str, Any]): Bieżący kurs z get_eur_rate_info (dla scenariuszy bez as_of)
+
+    Returns:
+        List[bytes]: Linie NDJSON (zakończone znakiem nowej linii) w kolejności scenariuszy
+    """
+    rates = resolve_eur_rates([record for _, record in records], current_rate["rate"])
+    columns = {name: np.array([record["inputs"][name] for _, record in records]) for name in FORECAST_INPUTS}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = _forecast_batch(**columns, eur_rate=rates)
+    size = len(records)
+    result_fields = list(EXPORT_RESULT_FIELDS)
+    result_rows = zip(*(
+        round_output(node, np.broadcast_to(values[node], (size,)), decimals).tolist()
+        for node, decimals in EXPORT_RESULT_FIELDS.values()
+    ))
+    is_profitable = np.broadcast_to(values["is_profitable"], (size,)).tolist()
+    status = np.broadcast_to(values["profitability_status"], (size,)).tolist()
+    messages = np.broadcast_to(values["profitability_message"], (size,)).tolist()
+    rates = np.round(rates, 4).tolist()
+
+    lines = []
+    for (line_number, record), result_row, profitable, profitability_status, message, rate in zip(
+        records, result_rows, is_profitable, status, messages, rates
+    ):
+        inputs = record["inputs"]
+        lines.append(json.dumps({
+            "line": line_number,
+            "id": record["id"],
+            "forecast_results": dict(zip(result_fields, result_row)),
+            "input_parameters": {
+                field: int(inputs[name]) if name == "impressions" else inputs[name]
+                for field, name in EXPORT_INPUT_FIELDS.items()
+            },
+            "profitability_analysis": {
+                "is_profitable": profitable,
+                "profitability_status": profitability_status,
+                "profitability_message": message,
+            },
+            "currency_info": {
+                "primary_currency": "EUR",
+                "eur_pln_rate": rate,
+                "eur_pln_rate_date": record["as_of"] or current_rate["effective_date"],
+                "currency_source": "NBP API",
+            },
+        }, ensure_ascii=False).encode("utf-8") + b"\n")
+    return lines
+
+
+def _error_line(line_number: Optional[int], message: str) -> bytes:
+    return (json.dumps({"line": line_number, "error": message}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def stream_forecasts(body: AsyncIterator[bytes], current_rate: Dict[str, Any], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Zamienia strumień linii NDJSON ze scenariuszami na strumień linii z wynikami.
+
+    Błędne linie nie przerywają strumienia - w ich miejscu pojawia się rekord z polem "error".
+    Odpowiedź zachowuje kolejność wejścia, a błędy liczą się do rozmiaru paczki,
+    więc bufor nie rośnie ponad chunk_size linii.
+
+    Args:
+        body (AsyncIterator[bytes]): Ciało żądania (np. request.stream())
+        current_rate (Dict[str, Any]): Bieżący kurs z get_eur_rate_info
+        chunk_size (int): Liczba linii w paczce
+
+    Returns:
+        AsyncIterator[bytes]: Kolejne fragmenty odpowiedzi NDJSON
+    """
+    buffer = b""
+    line_number = 0
+    # Linie paczki w kolejności wejścia: (numer linii, scenariusz) albo gotowa linia błędu
+    chunk: List[Union[Tuple[int, Dict[str, Any]], bytes]] = []
+
+    async def flush() -> bytes:
+        records = [item for item in chunk if not isinstance(item, bytes)]
+        # Obliczenia poza pętlą zdarzeń - inne żądania nie czekają na paczkę
+        results = iter(await run_in_threadpool(forecast_records, records, current_rate) if records else ())
+        output = b"".join(item if isinstance(item, bytes) else next(results) for item in chunk)
+        chunk.clear()
+        return output
+
+    def take(line: bytes) -> None:
+        nonlocal line_number
+        line_number += 1
+        if not line.strip():
+            return
+        try:
+            chunk.append((line_number, parse_record(line)))
+        except (ValueError, TypeError, AttributeError) as e:
+            chunk.append(_error_line(line_number, str(e)))
+
+    try:
+        async for data in body:
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                take(line)
+                if len(chunk) >= chunk_size:
+                    yield await flush()
+            if len(buffer) > MAX_LINE_BYTES:
+                if chunk:
+                    yield await flush()
+                yield _error_line(line_number + 1, f"Linia dłuższa niż {MAX_LINE_BYTES} bajtów")
+                return
+    except ClientDisconnect:
+        return
+
+    if buffer:
+        take(buffer)
+    if chunk:
+        yield await flush()
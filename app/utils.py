@@ -1,7 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import requests
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from io import BytesIO
 import openpyxl
 from openpyxl import Workbook
@@ -11,53 +11,223 @@ from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.chart import LineChart, Reference
 import os
+import numpy as np
 
-# Cache dla kursu EUR (ważny przez 1 dzień)
-_eur_rate_cache: Dict[str, Any] = {"rate": None, "timestamp": None}
+from .metrics import ACOS_GRAPH, FORECAST_GRAPH, BUDGET_GRAPH, round_output, round_value
+from .money import to_micro, rate_to_scaled, apply_rate, remove_rate, to_output
+from .charts import CHART_KINDS, CHART_HEIGHT, chart_params, render_chart
+from .cache import get_cache
 
-def get_eur_rate_from_nbp() -> float:
+# Adres API NBP dla kursów EUR (tabela A)
+NBP_EUR_RATES_URL = "https://api.nbp.pl/api/exchangerates/rates/a/eur/"
+# Przybliżony kurs EUR/PLN gdy API nie działa
+FALLBACK_EUR_RATE = 4.30
+# NBP zwraca maksymalnie 93 dni w jednym zapytaniu o zakres dat
+NBP_MAX_RANGE_DAYS = 93
+# Ile dni wstecz szukać ostatniego dnia roboczego (weekendy + najdłuższe święta)
+NBP_LOOKBACK_DAYS = 10
+# Czas życia kursów we wspólnym cache'u (sekundy)
+EUR_RATE_TTL = 24 * 3600
+# Kurs awaryjny jest trzymany krótko - po chwili ponawiamy zapytanie do NBP
+EUR_RATE_FALLBACK_TTL = 300
+
+def _fetch_current_eur_rate() -> Dict[str, Any]:
     """
     Pobiera aktualny kurs EUR/PLN z API Narodowego Banku Polskiego.
-    Używa cache'u aby ograniczyć liczbę zapytań do API.
     
     Returns:
-        float: Kurs EUR/PLN
+        Dict[str, Any]: Kurs ("rate") i data tabeli NBP ("effective_date", None dla kursu awaryjnego)
     """
-    global _eur_rate_cache
-    
-    # Sprawdź czy mamy świeży kurs w cache (max 1 dzień)
-    if (_eur_rate_cache["rate"] is not None and 
-        _eur_rate_cache["timestamp"] is not None):
-        
-        time_diff = datetime.now() - _eur_rate_cache["timestamp"]
-        if time_diff.total_seconds() < 24 * 3600:  # 24 godziny
-            return _eur_rate_cache["rate"]
-    
     try:
         # Pobierz aktualny kurs EUR z NBP API
         response = requests.get(
-            "https://api.nbp.pl/api/exchangerates/rates/a/eur/",
+            NBP_EUR_RATES_URL,
             headers={"Accept": "application/json"},
             timeout=10
         )
         
         if response.status_code == 200:
             data = response.json()
-            rate = data["rates"][0]["mid"]
-            
-            # Zapisz w cache
-            _eur_rate_cache["rate"] = rate
-            _eur_rate_cache["timestamp"] = datetime.now()
-            
-            return rate
+            return {"rate": data["rates"][0]["mid"], "effective_date": data["rates"][0].get("effectiveDate")}
         else:
             # Fallback rate jeśli API nie działa
-            return 4.30  # Przybliżony kurs EUR/PLN
+            return {"rate": FALLBACK_EUR_RATE, "effective_date": None}
             
     except Exception as e:
         print(f"Błąd przy pobieraniu kursu EUR: {e}")
         # Fallback rate
-        return 4.30
+        return {"rate": FALLBACK_EUR_RATE, "effective_date": None}
+
+def _current_eur_rate() -> Dict[str, Any]:
+    """Aktualny kurs z wspólnego cache'u - przy wielu instancjach NBP odpytuje tylko jedna."""
+    return get_cache().get_or_compute(
+        "fx:eur:current",
+        _fetch_current_eur_rate,
+        ttl=lambda value: EUR_RATE_TTL if value["effective_date"] else EUR_RATE_FALLBACK_TTL
+    )
+
+def get_eur_rate_from_nbp() -> float:
+    """
+    Pobiera aktualny kurs EUR/PLN z API Narodowego Banku Polskiego.
+    Używa cache'u aby ograniczyć liczbę zapytań do API.
+    
+    Returns:
+        float: Kurs EUR/PLN
+    """
+    return _current_eur_rate()["rate"]
+
+def _fetch_eur_rate_range(start: date, end: date) -> List[Tuple[date, float]]:
+    """
+    Pobiera kursy EUR z NBP dla zakresu dat (jedno zapytanie na każde 93 dni).
+    
+    Args:
+        start (date): Pierwszy dzień zakresu
+        end (date): Ostatni dzień zakresu
+    
+    Returns:
+        List[Tuple[date, float]]: Pary (data tabeli, kurs) tylko dla dni roboczych
+    """
+    rates: List[Tuple[date, float]] = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(end, chunk_start + timedelta(days=NBP_MAX_RANGE_DAYS - 1))
+        response = requests.get(
+            f"{NBP_EUR_RATES_URL}{chunk_start.isoformat()}/{chunk_end.isoformat()}/",
+            headers={"Accept": "application/json"},
+            timeout=10
+        )
+        if response.status_code == 200:
+            for item in response.json()["rates"]:
+                rates.append((date.fromisoformat(item["effectiveDate"]), item["mid"]))
+        elif response.status_code != 404:  # 404 = brak tabel w zakresie (np. same święta)
+            raise RuntimeError(f"NBP API zwróciło status {response.status_code}")
+        chunk_start = chunk_end + timedelta(days=1)
+    return rates
+
+def get_eur_rates_for_range(start: date, end: date) -> Dict[date, Tuple[float, Optional[date]]]:
+    """
+    Zwraca kurs EUR/PLN dla każdego dnia zakresu, pobierając brakujące dni jednym zapytaniem o zakres.
+    
+    Weekendy i święta dostają kurs z poprzedniego dnia roboczego.
+    Kursy są trzymane we wspólnym cache'u per dzień; dni od dzisiaj wzwyż nie są cache'owane,
+    bo tabela NBP z danego dnia może jeszcze nie być opublikowana.
+    
+    Args:
+        start (date): Pierwszy dzień zakresu
+        end (date): Ostatni dzień zakresu
+    
+    Returns:
+        Dict[date, Tuple[float, Optional[date]]]: Dzień -> (kurs, data tabeli NBP lub None dla kursu awaryjnego)
+    """
+    today = date.today()
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    cache = get_cache()
+    
+    def lookup(wanted: List[date]) -> Dict[date, Tuple[float, Optional[date]]]:
+        cached = cache.get_many([f"fx:eur:{day.isoformat()}" for day in wanted])
+        return {
+            day: (value[0], date.fromisoformat(value[1]))
+            for day, value in zip(wanted, cached) if value is not None
+        }
+    
+    result = lookup(days)
+    missing = [day for day in days if day not in result]
+    if not missing:
+        return result
+    
+    # Jedna instancja pobiera brakujący zakres, pozostałe czekają i czytają wynik z cache'u
+    with cache.lock("fx:eur:range"):
+        result.update(lookup(missing))
+        missing = [day for day in days if day not in result]
+        if not missing:
+            return result
+        
+        # Dni z przyszłości dostają najnowszy znany kurs
+        fetch_end = min(missing[-1], today)
+        fetch_start = min(missing[0], fetch_end) - timedelta(days=NBP_LOOKBACK_DAYS)
+        try:
+            fetched = sorted(_fetch_eur_rate_range(fetch_start, fetch_end))
+        except Exception as e:
+            print(f"Błąd przy pobieraniu historycznych kursów EUR: {e}")
+            fetched = []
+        
+        # Uzupełnienie dni bez tabeli kursem z poprzedniego dnia roboczego
+        position = 0
+        last: Optional[Tuple[float, date]] = None
+        # Dni robocze z pobranego zakresu też trafiają do cache'u
+        to_cache = {day: (rate, day) for day, rate in fetched if day < today}
+        for day in missing:
+            while position < len(fetched) and fetched[position][0] <= day:
+                last = (fetched[position][1], fetched[position][0])
+                position += 1
+            if last is None:
+                result[day] = (FALLBACK_EUR_RATE, None)
+                continue
+            result[day] = last
+            if day < today:
+                to_cache[day] = last
+        # Opublikowane kursy historyczne nie zmieniają się - zapis bez wygasania
+        cache.set_many(
+            {f"fx:eur:{day.isoformat()}": [rate, table_day.isoformat()] for day, (rate, table_day) in to_cache.items()}
+        )
+    
+    return result
+
+def _parse_date(value: Any) -> Optional[date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+def resolve_eur_rates(rows: List[Dict[str, Any]], current_rate: float) -> np.ndarray:
+    """
+    Kurs EUR/PLN dla każdego wiersza paczki (pole as_of lub kurs bieżący).
+    
+    Kursy historyczne są pobierane jednym zapytaniem o zakres dat paczki.
+    
+    Args:
+        rows (List[Dict[str, Any]]): Wiersze / scenariusze z opcjonalnym polem as_of
+        current_rate (float): Kurs dla wierszy bez as_of
+    
+    Returns:
+        np.ndarray: Kurs per wiersz
+    """
+    days = [_parse_date(row.get("as_of")) for row in rows]
+    known = [day for day in days if day is not None]
+    if not known:
+        return np.full(len(rows), current_rate)
+    rates = get_eur_rates_for_range(min(known), max(known))
+    return np.array([rates[day][0] if day is not None else current_rate for day in days], dtype=np.float64)
+
+def get_eur_rate_info(as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Zwraca kurs EUR/PLN wraz z datą tabeli NBP.
+    
+    Args:
+        as_of (Optional[date]): Dzień kursu (domyślnie kurs bieżący)
+    
+    Returns:
+        Dict[str, Any]: Kurs ("rate") i data tabeli NBP ("effective_date", ISO lub None)
+    """
+    if as_of is None:
+        return dict(_current_eur_rate())
+    rate, effective_date = get_eur_rates_for_range(as_of, as_of)[as_of]
+    return {"rate": rate, "effective_date": effective_date.isoformat() if effective_date else None}
+
+def get_eur_rate_for_date(as_of: Optional[date] = None) -> float:
+    """
+    Zwraca kurs EUR/PLN z podanego dnia (lub bieżący gdy as_of nie jest podane).
+    
+    Args:
+        as_of (Optional[date]): Dzień kursu
+    
+    Returns:
+        float: Kurs EUR/PLN
+    """
+    return get_eur_rate_info(as_of)["rate"]
 
 def convert_pln_to_eur(amount_pln: float) -> float:
     """
@@ -70,7 +240,7 @@ def convert_pln_to_eur(amount_pln: float) -> float:
         float: Kwota w EUR
     """
     eur_rate = get_eur_rate_from_nbp()
-    return round(amount_pln / eur_rate, 2)
+    return to_output(remove_rate(to_micro(amount_pln), rate_to_scaled(eur_rate)))
 
 def convert_eur_to_pln(amount_eur: float) -> float:
     """
@@ -83,7 +253,7 @@ def convert_eur_to_pln(amount_eur: float) -> float:
         float: Kwota w PLN
     """
     eur_rate = get_eur_rate_from_nbp()
-    return round(amount_eur * eur_rate, 2)
+    return to_output(apply_rate(to_micro(amount_eur), rate_to_scaled(eur_rate)))
 
 def calculate_acos(sales: float, spend: float, margin: float) -> Dict[str, Any]:
     """
@@ -97,46 +267,18 @@ def calculate_acos(sales: float, spend: float, margin: float) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Słownik z obliczonymi wskaźnikami
     """
-    
-    # Obliczenie ACOS (Advertising Cost of Sales)
-    acos = (spend / sales) * 100 if sales > 0 else 0
-    
-    # Obliczenie ROI (Return on Investment)
-    roi = ((sales - spend) / spend) * 100 if spend > 0 else 0
-    
-    # Poprawione obliczenie zysku
-    # Zysk brutto ze sprzedaży
-    gross_profit = sales * (margin / 100)
-    # Zysk całkowity po odjęciu kosztów reklamy
-    total_profit = gross_profit - spend
-    # Profit per sale - zakładając że każda sprzedaż to jedno zamówienie
-    profit_per_sale = total_profit  # Dla podstawowego kalkulatora
-    
-    # Break-even ACOS (punkt rentowności)
-    break_even_acos = margin
-    
-    # Sprawdzenie rentowności
-    is_profitable = acos <= margin if margin > 0 else False
-    
-    # Przygotowanie komunikatów
-    profitability_message = ""
-    if not is_profitable and acos > 0:
-        profitability_message = f"⚠️ UWAGA: Kampania jest nierentowna! ACOS ({acos:.2f}%) przekracza marżę ({margin:.2f}%)"
-    elif is_profitable and acos > 0:
-        profitability_message = f"✅ Kampania jest rentowna! ACOS ({acos:.2f}%) mieści się w marży ({margin:.2f}%)"
-    
-    # Określenie statusu rentowności
-    profitability_status = "profitable" if is_profitable else "unprofitable"
+    m = ACOS_GRAPH.evaluate(sales=sales, spend=spend, gross_margin=margin)
     
     return {
-        "acos": round(acos, 2),
-        "roi": round(roi, 2),
-        "profit": round(total_profit, 2),
-        "profit_per_sale": round(profit_per_sale, 2),
-        "break_even_acos": round(break_even_acos, 2),
-        "is_profitable": is_profitable,
-        "profitability_message": profitability_message,
-        "profitability_status": profitability_status,
+        "acos": round_output("acos", m["acos"], 2),
+        "roi": round_output("roi", m["roi"], 2),
+        "profit": to_output(m["profit_micro"]),
+        # Profit per sale - zakładając że każda sprzedaż to jedno zamówienie
+        "profit_per_sale": to_output(m["profit_micro"]),
+        "break_even_acos": round_output("break_even_acos", m["break_even_acos"], 2),
+        "is_profitable": m["is_profitable"],
+        "profitability_message": m["profitability_message"],
+        "profitability_status": m["profitability_status"],
         "sales": sales,
         "spend": spend,
         "margin": margin
@@ -149,7 +291,8 @@ def calculate_forecast_from_metrics(
     target_cpc: float,
     target_cvr: float,
     impressions: int,
-    currency: str = "EUR"
+    currency: str = "EUR",
+    as_of: Optional[date] = None
 ) -> Dict[str, Any]:
     """
     Oblicza prognozę kampanii na podstawie zaawansowanych metryk w EUR.
@@ -163,87 +306,48 @@ def calculate_forecast_from_metrics(
         target_cvr (float): Docelowy współczynnik konwersji w procentach
         impressions (int): Liczba wyświetleń
         currency (str): Waluta do wyświetlania (EUR)
+        as_of (Optional[date]): Dzień kursu EUR/PLN (domyślnie kurs bieżący)
     
     Returns:
         Dict[str, Any]: Słownik z prognozami i wskaźnikami
     """
-    
-    # Obliczenia podstawowe zgodnie z formułą ACOS
-    clicks = impressions * (target_ctr / 100)
-    orders = clicks * (target_cvr / 100)  # Zmiana nazwy z conversions na orders
-    ad_spend = clicks * target_cpc  # Ad Spend = Bid × Clicks
-    ad_sales = orders * target_aov  # Ad Sales = Orders × AOV
-    
-    # Obliczenie ACOS według wzoru: ACOS = Ad Spend / Ad Sales
-    acos = (ad_spend / ad_sales) * 100 if ad_sales > 0 else 0
-    
-    # ROI = (Revenue - Cost) / Cost
-    roi = ((ad_sales - ad_spend) / ad_spend) * 100 if ad_spend > 0 else 0
-    
-    # ROAS = Revenue / Ad Spend
-    roas = ad_sales / ad_spend if ad_spend > 0 else 0
-    
-    # Poprawione obliczenie zysku
-    gross_profit = ad_sales * (gross_margin / 100)  # Zysk brutto ze sprzedaży
-    total_profit = gross_profit - ad_spend  # Zysk całkowity po odjęciu kosztów reklamy
-    profit_per_sale = total_profit / orders if orders > 0 else 0  # Zysk na sprzedaż
-    
-    # Break-even ACOS = marża brutto
-    break_even_acos = gross_margin
-    
-    # Sprawdzenie rentowności
-    is_profitable = acos <= gross_margin if gross_margin > 0 and acos > 0 else False
-    
-    # Przygotowanie komunikatów rentowności
-    profitability_message = ""
-    if acos > 0:
-        if not is_profitable:
-            profitability_message = (
-                f"⚠️ Nierentowna kampania: ACOS {acos:.0f}% przekracza marżę {gross_margin:.0f}%. "
-                f"Rozważ poprawę współczynnika konwersji, obniżenie CPC lub zwiększenie marży produktu."
-            )
-        else:
-            profitability_message = f"✅ Rentowna kampania: ACOS {acos:.0f}% mieści się w marży {gross_margin:.0f}%"
-    
-    # Określenie statusu rentowności
-    profitability_status = "profitable" if is_profitable else "unprofitable"
-    
-    # Pobierz aktualny kurs EUR/PLN dla informacji
-    eur_rate = get_eur_rate_from_nbp()
-    
-    # Przeliczenia na PLN dla wyświetlania
-    projected_sales_pln = round(ad_sales * eur_rate, 0)
-    projected_spend_pln = round(ad_spend * eur_rate, 0)
-    profit_pln = round(total_profit * eur_rate, 0)
-    profit_per_sale_pln = round(profit_per_sale * eur_rate, 0)
-    target_aov_pln = round(target_aov * eur_rate, 0)
-    target_cpc_pln = round(target_cpc * eur_rate, 2)
+    eur_rate_info = get_eur_rate_info(as_of)
+    m = FORECAST_GRAPH.evaluate(
+        gross_margin=gross_margin,
+        target_aov=target_aov,
+        target_ctr=target_ctr,
+        target_cpc=target_cpc,
+        target_cvr=target_cvr,
+        impressions=impressions,
+        eur_rate=eur_rate_info["rate"],
+        eur_rate_date=eur_rate_info["effective_date"]
+    )
     
     return {
         # Wskaźniki podstawowe
-        "acos": round(acos, 0),  # Zaokrąglenie do całości jak na screenshocie
-        "roi": round(roi, 0),
-        "profit": round(total_profit, 0),
-        "profit_per_sale": round(profit_per_sale, 0),
-        "break_even_acos": round(break_even_acos, 0),
-        "is_profitable": is_profitable,
-        "profitability_message": profitability_message,
-        "profitability_status": profitability_status,
+        "acos": round_output("acos", m["acos"], 0),  # Zaokrąglenie do całości jak na screenshocie
+        "roi": round_output("roi", m["roi"], 0),
+        "profit": to_output(m["profit_micro"], 0),
+        "profit_per_sale": to_output(m["profit_per_sale_micro"], 0),
+        "break_even_acos": round_output("break_even_acos", m["break_even_acos"], 0),
+        "is_profitable": m["is_profitable"],
+        "profitability_message": m["profitability_message"],
+        "profitability_status": m["profitability_status"],
         
         # Prognozowane wyniki (Forecast Results)
         "impressions": impressions,
-        "clicks": round(clicks, 0),  # Projected Clicks
-        "orders": round(orders, 0),  # Projected Orders (zamiast conversions)
-        "projected_sales": round(ad_sales, 0),  # Projected Sales
-        "projected_spend": round(ad_spend, 0),  # Projected Spend
+        "clicks": round_output("clicks", m["clicks"], 0),  # Projected Clicks
+        "orders": round_output("orders", m["orders"], 0),  # Projected Orders (zamiast conversions)
+        "projected_sales": to_output(m["sales_micro"], 0),  # Projected Sales
+        "projected_spend": to_output(m["spend_micro"], 0),  # Projected Spend
         
         # Wartości w PLN dla wyświetlania
-        "projected_sales_pln": projected_sales_pln,
-        "projected_spend_pln": projected_spend_pln,
-        "profit_pln": profit_pln,
-        "profit_per_sale_pln": profit_per_sale_pln,
-        "target_aov_pln": target_aov_pln,
-        "target_cpc_pln": target_cpc_pln,
+        "projected_sales_pln": to_output(m["sales_pln_micro"], 0),
+        "projected_spend_pln": to_output(m["spend_pln_micro"], 0),
+        "profit_pln": to_output(m["profit_pln_micro"], 0),
+        "profit_per_sale_pln": to_output(m["profit_per_sale_pln_micro"], 0),
+        "target_aov_pln": to_output(m["target_aov_pln_micro"], 0),
+        "target_cpc_pln": to_output(m["target_cpc_pln_micro"]),
         
         # Parametry wejściowe
         "gross_margin": gross_margin,
@@ -253,21 +357,23 @@ def calculate_forecast_from_metrics(
         "target_cvr": target_cvr,
         
         # Dodatkowe wskaźniki
-        "cpm": round((ad_spend / impressions) * 1000, 2) if impressions > 0 else 0,
-        "cost_per_conversion": round(ad_spend / orders, 2) if orders > 0 else 0,
-        "roas": round(roas, 2),
+        "cpm": to_output(m["cpm_micro"]),
+        "cost_per_conversion": to_output(m["cost_per_conversion_micro"]),
+        "roas": round_output("roas", m["roas"], 2),
         
         # Informacje o walucie
         "currency": currency,
-        "eur_rate": round(eur_rate, 4),
-        "currency_info": f"Kurs EUR/PLN: {eur_rate:.4f} (NBP)"
+        "eur_rate": round_output("eur_rate", m["eur_rate"], 4),
+        "eur_rate_date": m["eur_rate_date"],
+        "currency_info": m["currency_info"]
     }
 
 def calculate_budget_from_tacos(
     target_sales: float,
     target_tacos: float,
     gross_margin: float,
-    currency: str = "EUR"
+    currency: str = "EUR",
+    as_of: Optional[date] = None
 ) -> Dict[str, Any]:
     """
     Oblicza budżet marketingowy na podstawie zakładanego TACOS (Total Advertising Cost of Sales).
@@ -278,86 +384,57 @@ def calculate_budget_from_tacos(
         target_tacos (float): Zakładany TACOS w procentach
         gross_margin (float): Marża brutto w procentach
         currency (str): Waluta do wyświetlania (EUR)
+        as_of (Optional[date]): Dzień kursu EUR/PLN (domyślnie kurs bieżący)
     
     Returns:
         Dict[str, Any]: Słownik z obliczonymi wskaźnikami budżetu
     """
-    
-    # Obliczenie budżetu marketingowego na podstawie TACOS
-    # TACOS = (Marketing Spend / Sales) * 100
-    # Marketing Spend = (TACOS * Sales) / 100
-    marketing_budget = (target_tacos * target_sales) / 100
-    
-    # Obliczenie zysku brutto ze sprzedaży
-    gross_profit = target_sales * (gross_margin / 100)
-    
-    # Obliczenie zysku netto po odjęciu kosztów marketingowych
-    net_profit = gross_profit - marketing_budget
-    
-    # Obliczenie ROI
-    roi = ((target_sales - marketing_budget) / marketing_budget) * 100 if marketing_budget > 0 else 0
-    
-    # Sprawdzenie rentowności
-    is_profitable = target_tacos <= gross_margin if gross_margin > 0 else False
-    
-    # Przygotowanie komunikatów rentowności
-    profitability_message = ""
-    if target_tacos > 0:
-        if not is_profitable:
-            profitability_message = (
-                f"⚠️ UWAGA: Zakładany TACOS {target_tacos:.1f}% przekracza marżę {gross_margin:.1f}%. "
-                f"Kampania może być nierentowna przy takim poziomie wydatków marketingowych."
-            )
-        else:
-            profitability_message = f"✅ Rentowna kampania: TACOS {target_tacos:.1f}% mieści się w marży {gross_margin:.1f}%"
-    
-    # Określenie statusu rentowności
-    profitability_status = "profitable" if is_profitable else "unprofitable"
-    
-    # Pobierz aktualny kurs EUR/PLN dla informacji
-    eur_rate = get_eur_rate_from_nbp()
-    
-    # Przeliczenia na PLN dla wyświetlania
-    target_sales_pln = round(target_sales * eur_rate, 0)
-    marketing_budget_pln = round(marketing_budget * eur_rate, 0)
-    gross_profit_pln = round(gross_profit * eur_rate, 0)
-    net_profit_pln = round(net_profit * eur_rate, 0)
+    eur_rate_info = get_eur_rate_info(as_of)
+    m = BUDGET_GRAPH.evaluate(
+        target_sales=target_sales,
+        target_tacos=target_tacos,
+        gross_margin=gross_margin,
+        eur_rate=eur_rate_info["rate"],
+        eur_rate_date=eur_rate_info["effective_date"]
+    )
     
     return {
         # Wskaźniki podstawowe
-        "target_sales": round(target_sales, 0),
-        "target_tacos": round(target_tacos, 1),
-        "marketing_budget": round(marketing_budget, 0),
-        "gross_profit": round(gross_profit, 0),
-        "net_profit": round(net_profit, 0),
-        "roi": round(roi, 1),
+        "target_sales": to_output(m["sales_micro"], 0),
+        "target_tacos": round_value(target_tacos, 1),
+        "marketing_budget": to_output(m["spend_micro"], 0),
+        "gross_profit": to_output(m["gross_profit_micro"], 0),
+        "net_profit": to_output(m["profit_micro"], 0),
+        "roi": round_output("roi", m["roi"], 1),
         "gross_margin": gross_margin,
-        "is_profitable": is_profitable,
-        "profitability_message": profitability_message,
-        "profitability_status": profitability_status,
+        "is_profitable": m["is_profitable"],
+        "profitability_message": m["profitability_message"],
+        "profitability_status": m["profitability_status"],
         
         # Wartości w PLN dla wyświetlania
-        "target_sales_pln": target_sales_pln,
-        "marketing_budget_pln": marketing_budget_pln,
-        "gross_profit_pln": gross_profit_pln,
-        "net_profit_pln": net_profit_pln,
+        "target_sales_pln": to_output(m["sales_pln_micro"], 0),
+        "marketing_budget_pln": to_output(m["spend_pln_micro"], 0),
+        "gross_profit_pln": to_output(m["gross_profit_pln_micro"], 0),
+        "net_profit_pln": to_output(m["profit_pln_micro"], 0),
         
         # Dodatkowe wskaźniki
-        "profit_margin": round((net_profit / target_sales) * 100, 1) if target_sales > 0 else 0,
-        "marketing_to_profit_ratio": round((marketing_budget / net_profit) * 100, 1) if net_profit > 0 else 0,
+        "profit_margin": round_output("profit_margin", m["profit_margin"], 1),
+        "marketing_to_profit_ratio": round_output("marketing_to_profit_ratio", m["marketing_to_profit_ratio"], 1),
         
         # Informacje o walucie
         "currency": currency,
-        "eur_rate": round(eur_rate, 4),
-        "currency_info": f"Kurs EUR/PLN: {eur_rate:.4f} (NBP)"
+        "eur_rate": round_output("eur_rate", m["eur_rate"], 4),
+        "eur_rate_date": m["eur_rate_date"],
+        "currency_info": m["currency_info"]
     }
 
-def create_excel_report(results: Dict[str, Any]) -> BytesIO:
+def create_excel_report(results: Dict[str, Any], as_of: Optional[date] = None) -> BytesIO:
     """
     Tworzy profesjonalny raport Excel z wynikami prognoz ACOS.
     
     Args:
         results (Dict[str, Any]): Wyniki obliczeń
+        as_of (Optional[date]): Dzień, na który przygotowano raport (przypięty kurs NBP)
     
     Returns:
         BytesIO: Bufor z plikiem Excel
@@ -405,7 +482,10 @@ def create_excel_report(results: Dict[str, Any]) -> BytesIO:
     
     # Informacje o raporcie
     ws.merge_cells("A2:J2")
-    ws["A2"] = f"Wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')} | AmzTeam.pro"
+    if as_of is not None:
+        ws["A2"] = f"Stan na: {as_of.strftime('%d.%m.%Y')} | Wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')} | AmzTeam.pro"
+    else:
+        ws["A2"] = f"Wygenerowano: {datetime.now().strftime('%d.%m.%Y %H:%M')} | AmzTeam.pro"
     ws["A2"].font = Font(name="Arial", size=10, italic=True, color="7f8c8d")
     ws["A2"].alignment = center_alignment
     
@@ -577,6 +657,18 @@ def create_excel_report(results: Dict[str, Any]) -> BytesIO:
     ws.column_dimensions['B'].width = 15
     ws.column_dimensions['C'].width = 15
     
+    # Arkusz z wykresami (te same obrazy co na stronie wyników, z cache wykresów)
+    try:
+        params = chart_params(results)
+    except ValueError:
+        params = None
+    if params is not None:
+        charts_ws = wb.create_sheet("Wykresy")
+        rows_per_chart = CHART_HEIGHT // 20 + 2
+        for i, kind in enumerate(CHART_KINDS):
+            _, png = render_chart(kind, "png", params)
+            charts_ws.add_image(Image(BytesIO(png)), f"A{1 + i * rows_per_chart}")
+    
     # Zapisanie do bufora
     excel_buffer = BytesIO()
     wb.save(excel_buffer)
@@ -689,7 +781,8 @@ def generate_export_data(results: Dict[str, Any]) -> Dict[str, Any]:
         },
         "currency_info": {
             "primary_currency": "EUR",
-            "eur_pln_rate": results.get("eur_rate", 4.30),
+            "eur_pln_rate": results.get("eur_rate", FALLBACK_EUR_RATE),
+            "eur_pln_rate_date": results.get("eur_rate_date"),
             "currency_source": "NBP API"
         },
         "acos_formula": "ACOS = Ad Spend / Ad Sales = (Bid × Clicks) / (Orders × AOV)",
@@ -0,0 +1,11 @@
+import pytest
+
+import app.utils
+
+
+@pytest.fixture
+def fixed_rate(monkeypatch):
+    """Stały kurs EUR/PLN zamiast zapytań do NBP."""
+    info = {"rate": 4.3127, "effective_date": "2024-05-06"}
+    monkeypatch.setattr(app.utils, "get_eur_rate_info", lambda as_of=None: dict(info))
+    return info
@@ -0,0 +1,108 @@
+import csv
+from io import StringIO
+
+import numpy as np
+import openpyxl
+import pytest
+
+from app.bids import BULK_HEADER, MIN_BID, bulk_entity, bids_to_bulk_csv, recommend_bids, recommend_bids_for_report
+from app.report_cache import groups_to_columns
+from app.reports import parse_ads_report
+
+
+def read_csv(content):
+    return list(csv.DictReader(StringIO(content)))
+
+
+@pytest.mark.parametrize("keyword, match_type, entity", [
+    ("running shoes", "EXACT", "Keyword"),
+    ("running shoes", "phrase", "Keyword"),
+    ('asin="B0123456789"', "TARGETING_EXPRESSION", "Product Targeting"),
+    ("close-match", "TARGETING_EXPRESSION_PREDEFINED", "Product Targeting"),
+    ('category="123"', "", "Product Targeting"),
+    ("", "EXACT", None),
+    ("*", "BROAD", None),
+    ("running shoes", "", None),
+])
+def test_bulk_entity(keyword, match_type, entity):
+    assert bulk_entity(keyword, match_type) == entity
+
+
+def test_shrinks_low_data_keywords_toward_group():
+    result = recommend_bids(
+        np.array(["C", "C"]), np.array(["A", "A"]),
+        clicks=np.array([1000.0, 2.0]), orders=np.array([100.0, 2.0]), sales=np.array([3000.0, 60.0]),
+        target_acos=20
+    )
+    # Słowo z 2 kliknięciami i 2 zamówieniami (CVR 100%) zostaje ściągnięte blisko CVR grupy (~10%)
+    assert result["cvr"][0] == pytest.approx(10.0, abs=0.2)
+    assert result["cvr"][1] < 20
+    assert result["bid"][0] == pytest.approx(0.2 * 0.1 * 30, abs=0.01)
+
+
+def test_groups_without_data_use_campaign_and_account_priors():
+    result = recommend_bids(
+        np.array(["C", "C", "C", "D"]), np.array(["A", "A", "B", "E"]),
+        clicks=np.array([500.0, 500.0, 0.0, 0.0]), orders=np.array([50.0, 0.0, 0.0, 0.0]), sales=np.array([2000.0, 0.0, 0.0, 0.0]),
+        target_acos=25
+    )
+    # Grupa B bez danych - CVR i AOV kampanii C; kampania D bez danych - średnie konta
+    assert result["aov"].tolist() == [40.0, 40.0, 40.0, 40.0]
+    assert result["cvr"][2:].tolist() == [5.0, 5.0]
+    assert result["bid"][2:].tolist() == [0.5, 0.5]
+
+
+def test_ad_group_with_clicks_but_no_orders_keeps_aov_prior():
+    result = recommend_bids(
+        np.array(["C", "C"]), np.array(["A", "B"]),
+        clicks=np.array([1000.0, 20.0]), orders=np.array([100.0, 0.0]), sales=np.array([3000.0, 0.0]),
+        target_acos=25
+    )
+    # Grupa B ma kliknięcia, ale nie ma zamówień - AOV z kampanii zamiast 0 (stawka nie spada do minimum)
+    assert result["aov"][1] == pytest.approx(30.0, abs=0.01)
+    assert result["bid"][1] > MIN_BID
+
+
+def test_profit_target_and_validation():
+    result = recommend_bids(
+        np.array(["C"]), np.array(["A"]), np.array([100.0]), np.array([10.0]), np.array([500.0]),
+        target_profit_per_order=5, gross_margin=40
+    )
+    assert result["bid"][0] == pytest.approx(0.1 * (50 * 0.4 - 5), abs=0.01)
+    with pytest.raises(ValueError):
+        recommend_bids(np.array(["C"]), np.array(["A"]), [1.0], [1.0], [1.0])
+    with pytest.raises(ValueError):
+        recommend_bids(np.array(["C"]), np.array(["A"]), [1.0], [1.0], [1.0], target_profit_per_order=1)
+
+
+def test_bulk_csv_rows():
+    content = bids_to_bulk_csv(
+        ["C", "C", "C"], ["A", "A", "A"], ["shoes", 'asin="B012"', ""], ["EXACT", "TARGETING_EXPRESSION", "BROAD"],
+        np.array([0.5, 0.75, 1.0]), ["11", "11", "11"], ["22", "22", "22"], ["33", "44", "55"]
+    )
+    header = content.splitlines()[0].split(",")
+    assert tuple(header) == BULK_HEADER
+    keyword, target = read_csv(content)
+    assert keyword["Entity"] == "Keyword"
+    assert (keyword["Keyword ID"], keyword["Match Type"], keyword["Keyword Text"], keyword["Bid"]) == ("33", "exact", "shoes", "0.50")
+    assert target["Entity"] == "Product Targeting"
+    assert (target["Product Targeting ID"], target["Product Targeting Expression"], target["Keyword ID"]) == ("44", 'asin="B012"', "")
+
+
+def test_report_ids_flow_into_bulk_file(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Campaign ID", "Ad Group ID", "Keyword ID", "Campaign Name", "Ad Group Name", "Targeting", "Match Type",
+               "Impressions", "Clicks", "Spend", "7 Day Total Orders (#)", "7 Day Total Sales"])
+    ws.append([123456789012345, 222, 333, "C", "A", "shoes", "EXACT", 1000, 100, 50, 10, 300])
+    ws.append([123456789012345, 222, 333, "C", "A", "shoes", "EXACT", 1000, 100, 50, 10, 300])
+    ws.append([123456789012345, 222, 444, "C", "A", "shoes", "PHRASE", 1000, 100, 50, 5, 150])
+    path = tmp_path / "report.xlsx"
+    wb.save(path)
+
+    report = parse_ads_report(str(path))
+    assert len(report["groups"]) == 2
+    rows = read_csv(recommend_bids_for_report(groups_to_columns(report["groups"]), target_acos=30))
+    assert [(row["Campaign ID"], row["Keyword ID"], row["Match Type"]) for row in rows] == [
+        ("123456789012345", "333", "exact"), ("123456789012345", "444", "phrase")
+    ]
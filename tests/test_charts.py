@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.cache
+import app.charts
+import app.main
+from app.cache import Cache, MemoryBackend
+from app.charts import CHART_KINDS, chart_params, chart_key, chart_url, render_chart, get_chart_cache
+
+INPUTS = {"gross_margin": 30, "target_aov": 40, "target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 10000}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = Cache(MemoryBackend())
+    monkeypatch.setattr(app.charts, "_chart_cache", cache)
+    return cache
+
+
+def test_params_ignore_other_fields_and_parse_strings():
+    params = chart_params({**INPUTS, "acos": 20.0, "owner": "ala"})
+    assert list(params) == list(INPUTS)
+    assert chart_params({name: str(value) for name, value in INPUTS.items()}) == params
+
+
+@pytest.mark.parametrize("change", [{"impressions": ""}, {"target_cpc": None}, {"target_cvr": -1}, {"target_aov": "nan"}])
+def test_params_validation(change):
+    with pytest.raises(ValueError):
+        chart_params({**INPUTS, **change})
+
+
+def test_params_are_normalised():
+    params = chart_params({**INPUTS, "target_cpc": "0.8000001", "impressions": "10000.4", "gross_margin": 30.004})
+    assert params == chart_params(INPUTS)
+    assert chart_params({**INPUTS, "target_ctr": -0.0001})["target_ctr"] == 0.0
+    assert str(chart_params({**INPUTS, "target_ctr": -0.0001})["target_ctr"]) == "0.0"
+
+
+def test_key_depends_on_kind_format_and_inputs():
+    params = chart_params(INPUTS)
+    key = chart_key("acos_cpc", "svg", params)
+    assert key == chart_key("acos_cpc", "svg", chart_params({**INPUTS, "target_cpc": "0.80"}))
+    assert len({
+        key,
+        chart_key("acos_cpc", "png", params),
+        chart_key("sensitivity", "svg", params),
+        chart_key("acos_cpc", "svg", chart_params({**INPUTS, "target_cpc": 0.81})),
+    }) == 4
+
+
+@pytest.mark.parametrize("kind", sorted(CHART_KINDS))
+def test_render_formats(kind):
+    _, png = render_chart(kind, "png", chart_params(INPUTS))
+    _, svg = render_chart(kind, "svg", chart_params(INPUTS))
+    assert png.startswith(b"\x89PNG")
+    assert svg.startswith(b"<svg")
+
+
+def test_render_is_cached(monkeypatch):
+    calls = []
+    original = CHART_KINDS["sensitivity"]
+    monkeypatch.setitem(CHART_KINDS, "sensitivity", lambda canvas, params: (calls.append(1), original(canvas, params)))
+    first = render_chart("sensitivity", "svg", chart_params(INPUTS))
+    second = render_chart("sensitivity", "svg", chart_params(INPUTS))
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_render_rejects_unknown_kind_and_format():
+    with pytest.raises(ValueError):
+        render_chart("pie", "svg", chart_params(INPUTS))
+    with pytest.raises(ValueError):
+        render_chart("acos_cpc", "gif", chart_params(INPUTS))
+
+
+def test_endpoint_etag_and_not_modified():
+    client = TestClient(app.main.app)
+    url = chart_url("profit_waterfall", INPUTS)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("image/svg+xml")
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert etag == f'"{chart_key("profit_waterfall", "svg", chart_params(INPUTS))}"'
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url.replace("profit_waterfall", "pie")).status_code == 404
+    assert client.get(url.replace(".svg", ".gif")).status_code == 400
+    assert client.get("/charts/acos_cpc.svg?gross_margin=30").status_code == 400
+
+
+def test_charts_use_a_separate_bounded_store(monkeypatch):
+    monkeypatch.setattr(app.charts, "_chart_cache", None)
+    monkeypatch.setattr(app.cache, "_cache", Cache(MemoryBackend()))
+    monkeypatch.setattr(app.charts, "CHART_CACHE_URL", "memory://")
+    monkeypatch.setattr(app.charts, "CHART_CACHE_MAX_MB", 0.0625)
+    store = get_chart_cache()
+    assert store is not app.cache.get_cache()
+    assert store.backend.max_bytes == 64 * 1024
+
+
+def test_concurrent_first_calls_share_one_store(monkeypatch):
+    monkeypatch.setattr(app.charts, "_chart_cache", None)
+    created = []
+
+    def slow_backend(*args):
+        created.append(1)
+        time.sleep(0.05)
+        return MemoryBackend()
+
+    monkeypatch.setattr(app.charts, "create_backend", slow_backend)
+    stores = []
+    threads = [threading.Thread(target=lambda: stores.append(get_chart_cache())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(store is stores[0] for store in stores)
@@ -0,0 +1,145 @@
+import csv
+import json
+import os
+from datetime import date
+
+import openpyxl
+import pytest
+
+import app.cli
+import app.utils
+from app.cli import main, run_batch, _part_path
+from app.metrics import evaluate_batch, FORECAST_INPUTS
+
+ROWS = [
+    {"gross_margin": 30, "target_aov": 30 + i, "target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 1000 * (i + 1)}
+    for i in range(7)
+]
+
+
+@pytest.fixture(autouse=True)
+def current_rate(monkeypatch):
+    monkeypatch.setattr(app.cli, "get_eur_rate_from_nbp", lambda: 4.3)
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_results_match_batch_evaluator(tmp_path):
+    source = write_csv(tmp_path / "in.csv", ROWS)
+    output = str(tmp_path / "out.csv")
+
+    assert run_batch(source, output, chunk_size=3, workers=1) == len(ROWS)
+    rows = read_csv(output)
+    expected = evaluate_batch("forecast", {name: [row[name] for row in ROWS] for name in FORECAST_INPUTS}, 4.3)
+    assert [float(row["profit"]) for row in rows] == expected["profit"]
+    assert [float(row["acos"]) for row in rows] == expected["acos"]
+    assert not os.path.exists(output + ".parts")
+
+
+def test_resume_skips_finished_chunks(tmp_path, monkeypatch):
+    source = write_csv(tmp_path / "in.csv", ROWS)
+    output = str(tmp_path / "out.csv")
+    parts_dir = output + ".parts"
+
+    def interrupted(*args):
+        raise KeyboardInterrupt()
+
+    # Przerwane uruchomienie: wszystkie paczki policzone, ale bez scalenia wyniku
+    with monkeypatch.context() as patch:
+        patch.setattr(app.cli, "merge_parts", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run_batch(source, output, chunk_size=3, workers=1)
+
+    # Paczka 0 oznaczona jako gotowa (znacznik w pierwszej kolumnie), paczka 2 do policzenia ponownie
+    first_part = _part_path(parts_dir, 0)
+    with open(first_part, newline="", encoding="utf-8") as f:
+        rows = [["SENTINEL"] + row[1:] for row in csv.reader(f)]
+    with open(first_part, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    os.remove(_part_path(parts_dir, 2))
+
+    assert run_batch(source, output, chunk_size=3, workers=1) == len(ROWS)
+    rows = read_csv(output)
+    assert len(rows) == len(ROWS)
+    assert [row["gross_margin"] for row in rows[:3]] == ["SENTINEL"] * 3
+    assert rows[6]["target_aov"] == "36"
+
+
+def test_resume_with_different_settings_is_rejected(tmp_path):
+    source = write_csv(tmp_path / "in.csv", ROWS)
+    output = str(tmp_path / "out.csv")
+    os.makedirs(output + ".parts")
+    with open(os.path.join(output + ".parts", "manifest.json"), "w") as f:
+        json.dump({"input": "other"}, f)
+
+    with pytest.raises(ValueError):
+        run_batch(source, output, chunk_size=3, workers=1)
+    assert run_batch(source, output, chunk_size=3, workers=1, restart=True) == len(ROWS)
+
+
+def test_jsonl_input_and_xlsx_output(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text("\n".join(json.dumps({"target_sales": 1000 * (i + 1), "target_tacos": 10, "gross_margin": 30}) for i in range(3)))
+    output = str(tmp_path / "out.xlsx")
+
+    assert main([str(source), "-o", output, "--mode", "budget", "--workers", "1"]) == 0
+    sheet = openpyxl.load_workbook(output).active
+    header = [cell.value for cell in sheet[1]]
+    assert header[:4] == ["target_sales", "target_tacos", "gross_margin", "as_of"]
+    assert sheet.cell(row=4, column=header.index("marketing_budget") + 1).value == 300
+
+
+def test_missing_columns_fail_cleanly(tmp_path, capsys):
+    source = write_csv(tmp_path / "in.csv", [{"gross_margin": 30}])
+    assert main([source, "-o", str(tmp_path / "out.csv"), "--workers", "1"]) == 1
+    assert "Brak kolumn" in capsys.readouterr().err
+
+
+def test_progress_is_reported_for_every_chunk(tmp_path, capsys):
+    source = write_csv(tmp_path / "in.csv", ROWS)
+    # Jeden proces: kolejka pełna po dwóch paczkach, kolejne są odbierane przez collect
+    assert run_batch(source, str(tmp_path / "out.csv"), chunk_size=1, workers=1) == len(ROWS)
+    progress = capsys.readouterr().err.split("\r")[1:]
+    assert len(progress) == len(ROWS)
+    assert progress[-1].startswith("Przetworzono 7 wierszy")
+
+
+def test_historical_rates_are_resolved_in_workers(tmp_path, monkeypatch):
+    parent, resolve = os.getpid(), app.cli.resolve_eur_rates
+
+    def resolve_in_worker(*args):
+        assert os.getpid() != parent, "kursy ustalane w procesie głównym"
+        return resolve(*args)
+
+    monkeypatch.setattr(app.cli, "resolve_eur_rates", resolve_in_worker)
+    monkeypatch.setattr(
+        app.utils, "get_eur_rates_for_range",
+        lambda start, end: {date.fromordinal(day): (4.25, date.fromordinal(day)) for day in range(start.toordinal(), end.toordinal() + 1)}
+    )
+    source = write_csv(tmp_path / "in.csv", [{**row, "as_of": "2024-01-0%d" % (i + 1) if i % 2 else ""} for i, row in enumerate(ROWS)])
+    output = str(tmp_path / "out.csv")
+    assert run_batch(source, output, chunk_size=3, workers=2) == len(ROWS)
+    rows = read_csv(output)
+    assert [float(row["eur_rate"]) for row in rows] == [4.3, 4.25] * 3 + [4.3]
+
+
+def test_xlsx_row_limit_is_checked_while_reading(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.cli, "XLSX_MAX_ROWS", 5)
+    source = write_csv(tmp_path / "in.csv", ROWS)
+    output = str(tmp_path / "out.xlsx")
+    with pytest.raises(ValueError, match="XLSX"):
+        run_batch(source, output, chunk_size=3, workers=1)
+    # Druga paczka przekracza limit - nie jest liczona
+    assert not os.path.exists(_part_path(output + ".parts", 1))
+    assert not os.path.exists(output)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+from app.fees import MAX_PRICE, TIER_NAMES, FeeTable, get_fee_table, compute_gross_margins, asin_margin_report
+from app.utils import calculate_forecast_from_metrics
+from app.money import to_micro, to_output
+
+ITEM = {"asin": "B01", "price": 29.99, "length_cm": 30, "width_cm": 20, "height_cm": 10, "weight_g": 800, "category": "home", "unit_cost": 8}
+
+
+@pytest.mark.parametrize("category, price, fee", [
+    ("electronics_accessories", 150, 19.00),
+    ("electronics_accessories", 80, 12.00),
+    ("furniture", 300, 40.00),
+    ("beauty", 5, 0.40),
+    ("beauty", 20, 3.00),
+    ("default", 1, 0.30),
+    ("books", 1, 0.15),
+])
+def test_referral_fee_tiers(category, price, fee):
+    table = get_fee_table("de")
+    result = table.referral_fees(np.atleast_1d(to_micro(price)), table.category_indices([category]))
+    assert to_output(result).tolist() == [fee]
+
+
+def test_size_tiers_and_fba_fee():
+    table = get_fee_table("de")
+    tiers = table.size_tiers([15, 30, 10, 200], [10, 20, 35, 100], [0.5, 10, 20, 100], [50, 800, 800, 1000])
+    assert [TIER_NAMES[tier] if tier >= 0 else None for tier in tiers] == ["small_envelope", "small_parcel", "small_parcel", None]
+    # Koperta: 50 g + 20 g opakowania -> pasmo do 80 g
+    fee = table.fulfilment_fees(tiers[:1], table.shipping_weights(tiers[:1], [15], [10], [0.5], [50]))
+    assert to_output(fee).tolist() == [1.95]
+
+
+def test_large_batch_matches_single_lookups():
+    rng = np.random.default_rng(3)
+    size = 20000
+    items = {
+        "price": rng.integers(100, 50000, size) / 100,
+        "length": rng.uniform(1, 150, size),
+        "width": rng.uniform(1, 100, size),
+        "height": rng.uniform(0.5, 80, size),
+        "weight": rng.uniform(10, 25000, size),
+        "category": rng.choice(sorted(["home", "furniture", "beauty", "electronics_accessories", "books"]), size),
+        "unit_cost": rng.integers(0, 2000, size) / 100,
+    }
+    batch = compute_gross_margins(items)
+    for i in rng.choice(size, 25, replace=False):
+        single = compute_gross_margins({name: values[i:i + 1] for name, values in items.items()})
+        for name, values in single.items():
+            np.testing.assert_array_equal(batch[name][i:i + 1], values)
+
+
+def test_unknown_category_and_marketplace():
+    with pytest.raises(ValueError):
+        compute_gross_margins({**{name: [1.0] for name in ("price", "length", "width", "height", "weight", "unit_cost")}, "category": ["cars"]})
+    with pytest.raises(ValueError):
+        FeeTable("us")
+
+
+@pytest.mark.parametrize("price", [0.0, -5.0])
+def test_compute_rejects_non_positive_price(price):
+    with pytest.raises(ValueError):
+        get_fee_table("de").compute([price], 30, 20, 10, 800, ["home"], 8)
+
+
+def test_report_returns_per_asin_price_error(fixed_rate):
+    report = asin_margin_report(
+        [ITEM, {**ITEM, "asin": "B02", "price": 0}, {**ITEM, "asin": "B03", "length_cm": 300}],
+        forecast={"target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 10000},
+        eur_rate=fixed_rate["rate"],
+    )
+    priced, free, oversize = report["items"]
+    assert "error" not in priced and priced["gross_margin"] is not None
+    assert free["id"] == "B02" and free["error"] and free["gross_margin"] is None and "forecast" not in free
+    assert oversize["size_tier"] == "unsupported" and "forecast" not in oversize
+    expected = calculate_forecast_from_metrics(priced["gross_margin"], ITEM["price"], 0.5, 0.8, 10, 10000)
+    assert {name: priced["forecast"][name] for name in ("profit", "profit_pln", "acos", "roi")} == {
+        name: expected[name] for name in ("profit", "profit_pln", "acos", "roi")
+    }
+    assert asin_margin_report([{**ITEM, "price": -1}])["items"][0]["error"]
+
+
+@pytest.mark.parametrize("change", [{"price": MAX_PRICE}, {"length_cm": 0}, {"width_cm": -1}, {"height_cm": 0}, {"weight_g": 0}])
+def test_report_returns_per_asin_input_errors(change):
+    rows = asin_margin_report([{**ITEM, **change, "asin": "bad"}, ITEM])["items"]
+    assert rows[0]["id"] == "bad" and rows[0]["error"] and rows[0]["gross_margin"] is None
+    assert "error" not in rows[1] and rows[1]["gross_margin"] is not None
+
+
+def test_compute_rejects_prices_overlapping_next_category():
+    table = get_fee_table("de")
+    with pytest.raises(ValueError):
+        table.compute([MAX_PRICE], 30, 20, 10, 800, ["beauty"], 8)
+    # Cena tuż pod limitem zostaje w swojej kategorii (prowizja "beauty", nie następnej)
+    result = table.compute([MAX_PRICE - 0.01], 30, 20, 10, 800, ["beauty"], 8)
+    assert to_output(result["referral_fee_micro"]).tolist() == [round((MAX_PRICE - 0.01) * 0.15, 2)]
+
+
+def test_endpoint(monkeypatch):
+    monkeypatch.setattr(app.main, "get_eur_rate_info", lambda as_of=None: {"rate": 4.3127, "effective_date": "2024-05-06"})
+    client = TestClient(app.main.app)
+    response = client.post("/asin-margins", json={"items": [ITEM, {**ITEM, "asin": "B02", "price": 0}]})
+    assert response.status_code == 200
+    rows = response.json()["items"]
+    assert rows[0]["size_tier"] == "small_parcel" and rows[0]["referral_fee"] == 4.50
+    assert rows[1]["error"]
+    assert client.post("/asin-margins", json={"items": [ITEM], "marketplace": "us"}).status_code == 400
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.metrics import FORECAST_GRAPH, FORECAST_INPUTS, BUDGET_INPUTS, evaluate_batch, round_value, round_output
+from app.utils import calculate_forecast_from_metrics, calculate_budget_from_tacos
+
+# Wejścia, dla których ROAS wypada dokładnie na połówce (176.185, 0.935, 9.315) - kiedyś różnie zaokrąglane
+HALFWAY_FORECASTS = [
+    (30.0, 105.5, 1.0, 0.09, 15.03, 1000),
+    (30.0, 90.75, 1.0, 2.64, 2.72, 1000),
+    (30.0, 170.1, 1.0, 0.42, 2.3, 1000),
+]
+
+
+def random_forecasts(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        (rng.integers(0, 10000) / 100, rng.integers(100, 20000) / 100, rng.integers(1, 500) / 100,
+         rng.integers(5, 300) / 100, rng.integers(1, 3000) / 100, int(rng.integers(0, 10 ** 6)))
+        for _ in range(size)
+    ]
+
+
+@pytest.mark.parametrize("value, decimals, expected", [
+    (0.085, 2, 0.08),
+    (0.095, 2, 0.1),
+    (176.185, 2, 176.18),
+    (2.675, 2, 2.68),
+    (12.5, 0, 12.0),
+    (13.5, 0, 14.0),
+    (-1.25, 1, -1.2),
+])
+def test_round_value_scalar_and_array(value, decimals, expected):
+    assert round_value(value, decimals) == expected
+    assert isinstance(round_value(value, decimals), float)
+    assert round_value(np.array([value]), decimals).tolist() == [expected]
+
+
+def test_round_output_amounts_use_micro_units():
+    assert round_output("profit_micro", np.int64(123_450_000), 0) == 123.0
+    assert round_output("profit_micro", np.int64(123_500_000), 0) == 124.0
+    assert round_output("profit_micro", np.int64(123_455_001), None) == 123.46
+    assert round_output("is_profitable", True, None) is True
+
+
+def test_graph_update_recomputes_dependents():
+    evaluation = FORECAST_GRAPH.evaluate(gross_margin=30, target_aov=30, target_ctr=0.5, target_cpc=0.8, target_cvr=10, impressions=100000, eur_rate=4.3)
+    assert evaluation["clicks"] == pytest.approx(500)
+    assert evaluation.update(impressions=200000)["clicks"] == pytest.approx(1000)
+    assert evaluation["acos"] == pytest.approx(100 * 0.8 / (0.1 * 30))
+
+
+@pytest.mark.parametrize("rows", [HALFWAY_FORECASTS, random_forecasts(300)])
+def test_forecast_scalar_equals_batch(fixed_rate, rows):
+    columns = {name: [float(row[i]) for row in rows] for i, name in enumerate(FORECAST_INPUTS)}
+    batch = evaluate_batch("forecast", columns, fixed_rate["rate"])
+    for i, row in enumerate(rows):
+        scalar = calculate_forecast_from_metrics(*(float(value) for value in row[:5]), int(row[5]))
+        assert {name: scalar[name] for name in batch} == {name: values[i] for name, values in batch.items()}
+
+
+def test_budget_scalar_equals_batch(fixed_rate):
+    rng = np.random.default_rng(1)
+    rows = [(rng.integers(0, 10 ** 7) / 100, rng.integers(1, 5000) / 100, rng.integers(0, 10000) / 100) for _ in range(300)]
+    rows.append((1234.5, 12.35, 30.0))
+    columns = {name: [float(row[i]) for row in rows] for i, name in enumerate(BUDGET_INPUTS)}
+    batch = evaluate_batch("budget", columns, fixed_rate["rate"])
+    for i, row in enumerate(rows):
+        scalar = calculate_budget_from_tacos(*(float(value) for value in row))
+        assert {name: scalar[name] for name in batch} == {name: values[i] for name, values in batch.items()}
+
+
+def test_unknown_batch_mode():
+    with pytest.raises(ValueError):
+        evaluate_batch("nope", {}, 4.3)
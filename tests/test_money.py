@@ -0,0 +1,83 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+import pytest
+
+from app.metrics import FORECAST_GRAPH
+from app.money import (
+    RATE_SCALE, to_micro, rate_to_scaled, money_mul, percent_of, money_div,
+    apply_rate, remove_rate, to_output, _div_half_even,
+)
+
+
+@pytest.mark.parametrize("amount, expected", [(0.29, 290_000), (2.675, 2_675_000), (0.000_000_5, 0), (0.000_001_5, 2), (-1.1, -1_100_000)])
+def test_to_micro_removes_representation_error(amount, expected):
+    assert to_micro(amount) == expected
+    assert to_micro(np.array([amount])).tolist() == [expected]
+
+
+def test_intermediates_keep_sub_cent_precision():
+    # 0.3 cent nie znika po pomnożeniu - zaokrąglenie do centa dopiero na wyjściu
+    assert money_mul(to_micro(0.01), 0.3) == 3_000
+    assert percent_of(to_micro(0.01), 50) == 5_000
+    assert money_div(to_micro(1.00), 3) == 333_333
+    assert money_div(to_micro(1.00), 0) == 0
+    assert apply_rate(to_micro(0.01), rate_to_scaled(4.3127)) == 43_127
+
+
+@pytest.mark.parametrize("micro, decimals, expected", [
+    (2_500_000, 0, 2.0),
+    (3_500_000, 0, 4.0),
+    (125_000, 2, 0.12),
+    (135_000, 2, 0.14),
+    (2_495_001, 2, 2.5),
+    (-2_500_000, 0, -2.0),
+])
+def test_to_output_rounds_half_even_once(micro, decimals, expected):
+    assert to_output(np.int64(micro), decimals) == expected
+    assert to_output(np.array([micro]), decimals).tolist() == [expected]
+
+
+def test_to_output_rejects_unsupported_precision():
+    with pytest.raises(ValueError):
+        to_output(1, 7)
+
+
+def test_rate_division_without_int64_overflow():
+    amounts = np.array([10 ** 15 + 7, -(10 ** 15) - 3, 123], dtype=np.int64)
+    rate = int(rate_to_scaled(4.3127))
+    expected = [
+        int((Decimal(int(a)) * rate / RATE_SCALE).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)) for a in amounts
+    ]
+    assert apply_rate(amounts, rate).tolist() == expected
+    assert _div_half_even(np.array([5, 15, 25]), 1, 10).tolist() == [0, 2, 2]
+    assert remove_rate(apply_rate(to_micro(100.0), rate), rate) == to_micro(100.0)
+
+
+def _exact_profit(margin, aov, ctr, cpc, cvr, impressions, rate):
+    margin, aov, ctr, cpc, cvr, rate = (Decimal(repr(float(v))) for v in (margin, aov, ctr, cpc, cvr, rate))
+    clicks = impressions * ctr / 100
+    spend = cpc * clicks
+    sales = aov * clicks * cvr / 100
+    profit = sales * margin / 100 - spend
+    return profit, profit * rate
+
+
+def test_forecast_profit_is_rounded_once():
+    rng = np.random.default_rng(7)
+    checked = 0
+    for _ in range(2000):
+        inputs = (
+            rng.integers(0, 10000) / 100, rng.integers(100, 20000) / 100, rng.integers(1, 500) / 100,
+            rng.integers(5, 300) / 100, rng.integers(1, 3000) / 100, int(rng.integers(0, 10 ** 5)),
+        )
+        m = FORECAST_GRAPH.evaluate(**dict(zip(
+            ("gross_margin", "target_aov", "target_ctr", "target_cpc", "target_cvr", "impressions"), inputs
+        )), eur_rate=4.3127)
+        for micro, exact in zip((m["profit_micro"], m["profit_pln_micro"]), _exact_profit(*inputs, 4.3127)):
+            # Remisy z dokładnością do mikrojednostek zależą od zaokrąglenia pośredniego - pomijane
+            if abs(abs(exact) % 1 - Decimal("0.5")) < Decimal("0.00001"):
+                continue
+            assert to_output(micro, 0) == float(exact.quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+            checked += 1
+    assert checked > 3900
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.pacing import simulate_pacing, run_pacing, HOURS_IN_DAY
+
+# Płaskie profile: 1000 wyświetleń/h × CTR 1% × CPC 1 EUR = 10 EUR/h, 240 EUR/dzień, 7200 EUR/miesiąc
+FLAT = {"hourly_traffic": np.ones(24), "dow_traffic": np.ones(7), "cpc_by_hour": np.ones(24)}
+MONTHLY_IMPRESSIONS = 30 * 24 * 1000
+
+
+def test_budget_above_demand_is_never_exhausted():
+    result = simulate_pacing(10000, MONTHLY_IMPRESSIONS, 1, 1, **FLAT)
+    assert result["total_spend"][0] == pytest.approx(7200)
+    assert result["exhaustion_day"][0] == -1
+    assert result["lost_impressions"][0] == pytest.approx(0)
+    np.testing.assert_allclose(result["daily_spend"][0], 240)
+    np.testing.assert_allclose(result["recommended_daily_caps"][0], 240)
+
+
+def test_budget_exhausted_mid_month():
+    result = simulate_pacing(3600, MONTHLY_IMPRESSIONS, 1, 1, **FLAT)
+    assert result["total_spend"][0] == pytest.approx(3600)
+    assert result["exhaustion_hour"][0] == 15 * HOURS_IN_DAY
+    assert result["exhaustion_day"][0] == 16
+    assert result["lost_impressions"][0] == pytest.approx(MONTHLY_IMPRESSIONS / 2)
+    assert result["daily_spend"][0][:15] == pytest.approx([240] * 15)
+    assert result["daily_spend"][0][15:] == pytest.approx([0] * 15)
+    # Rekomendowane limity rozkładają budżet proporcjonalnie do popytu
+    np.testing.assert_allclose(result["recommended_daily_caps"][0], 120)
+
+
+def test_daily_caps_spread_spend():
+    result = simulate_pacing(3600, MONTHLY_IMPRESSIONS, 1, 1, **FLAT, daily_caps=120)
+    np.testing.assert_allclose(result["daily_spend"][0], 120)
+    assert result["exhaustion_day"][0] == -1
+
+
+def test_campaign_matrix_matches_single_runs():
+    budgets = np.array([3600, 500, 20000])
+    impressions = np.array([MONTHLY_IMPRESSIONS, 100000, 2000000])
+    ctr = np.array([1, 0.4, 0.6])
+    cpc = np.array([1, 0.8, 1.3])
+    together = simulate_pacing(budgets, impressions, ctr, cpc, start_weekday=3)
+    for i in range(3):
+        alone = simulate_pacing(budgets[i], impressions[i], ctr[i], cpc[i], start_weekday=3)
+        for key, values in alone.items():
+            np.testing.assert_allclose(together[key][i], values[0])
+
+
+def test_run_pacing_with_recommended_caps():
+    result = run_pacing(
+        [{"name": "A", "monthly_budget": 3600, "monthly_impressions": MONTHLY_IMPRESSIONS, "ctr": 1, "cpc": 1}],
+        **{name: list(values) for name, values in FLAT.items()}
+    )
+    campaign = result["campaigns"][0]
+    assert campaign["name"] == "A"
+    assert campaign["exhaustion_day"] == 16
+    assert campaign["lost_impressions_pct"] == 50.0
+    assert campaign["with_recommended_caps"]["exhaustion_day"] == -1
+    assert campaign["with_recommended_caps"]["daily_spend"] == [120.0] * 30
+    assert result["summary"] == {
+        "campaigns": 1,
+        "exhausted_early": 1,
+        "total_budget": 3600.0,
+        "total_spend": 3600.0,
+        "lost_impressions": 360000.0,
+        "lost_impressions_with_caps": 360000.0,
+    }
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"campaigns": []},
+    {"days": 0},
+    {"hourly_traffic": [1] * 23},
+    {"dow_traffic": [0] * 7},
+    {"cpc_by_hour": [[1] * 24] * 2},
+])
+def test_run_pacing_validation(kwargs):
+    params = {"campaigns": [{"monthly_budget": 100, "monthly_impressions": 1000, "ctr": 1, "cpc": 1}], **kwargs}
+    with pytest.raises(ValueError):
+        run_pacing(**params)
+
+
+def test_negative_inputs_rejected():
+    with pytest.raises(ValueError):
+        run_pacing([{"monthly_budget": -1, "monthly_impressions": 1000, "ctr": 1, "cpc": 1}])
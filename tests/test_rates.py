@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import pytest
+
+import app.cache
+import app.utils
+from app.cache import Cache, MemoryBackend
+from app.utils import FALLBACK_EUR_RATE, get_eur_rates_for_range, get_eur_rate_info
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeNBP:
+    """Tabela A dla dni roboczych: kurs 4 + numer dnia roku / 1000."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, headers=None, timeout=None):
+        start, end = (date.fromisoformat(part) for part in url.rstrip("/").split("/")[-2:])
+        self.calls.append((start, end))
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        rates = [{"effectiveDate": day.isoformat(), "mid": 4 + day.timetuple().tm_yday / 1000} for day in days if day.weekday() < 5]
+        return FakeResponse(200, {"rates": rates}) if rates else FakeResponse(404)
+
+
+@pytest.fixture
+def nbp(monkeypatch):
+    monkeypatch.setattr(app.cache, "_cache", Cache(MemoryBackend()))
+    fake = FakeNBP()
+    monkeypatch.setattr(app.utils.requests, "get", fake)
+    return fake
+
+
+def test_weekend_uses_previous_business_day(nbp):
+    rates = get_eur_rates_for_range(date(2024, 5, 3), date(2024, 5, 6))
+    friday = (4 + date(2024, 5, 3).timetuple().tm_yday / 1000, date(2024, 5, 3))
+    assert rates[date(2024, 5, 4)] == friday
+    assert rates[date(2024, 5, 5)] == friday
+    assert rates[date(2024, 5, 6)][1] == date(2024, 5, 6)
+
+
+def test_range_is_cached_without_refetching(nbp):
+    get_eur_rates_for_range(date(2024, 1, 1), date(2024, 3, 31))
+    calls = len(nbp.calls)
+    assert get_eur_rate_info(date(2024, 2, 10))["effective_date"] == "2024-02-09"
+    get_eur_rates_for_range(date(2024, 1, 15), date(2024, 3, 1))
+    assert len(nbp.calls) == calls
+
+
+def test_historical_rates_are_stored_without_expiry(nbp, monkeypatch):
+    stored = []
+    cache = app.cache._cache
+    original = cache.set_many
+    monkeypatch.setattr(cache, "set_many", lambda items, ttl=None, **kwargs: (stored.append(ttl), original(items, ttl, **kwargs)))
+    get_eur_rates_for_range(date(2024, 5, 1), date(2024, 5, 10))
+    assert stored == [None]
+
+
+def test_long_range_is_split_into_93_day_requests(nbp):
+    get_eur_rates_for_range(date(2023, 1, 1), date(2023, 12, 31))
+    # 365 dni + 10 dni wstecz (ostatni dzień roboczy przed 1 stycznia) = 375 dni -> 5 zapytań
+    assert len(nbp.calls) == 5
+    assert all((end - start).days < 93 for start, end in nbp.calls)
+
+
+def test_fallback_rate_when_nbp_is_down(nbp, monkeypatch):
+    def down(*args, **kwargs):
+        raise ConnectionError("offline")
+    monkeypatch.setattr(app.utils.requests, "get", down)
+    rates = get_eur_rates_for_range(date(2024, 5, 1), date(2024, 5, 2))
+    assert rates[date(2024, 5, 1)] == (FALLBACK_EUR_RATE, None)
+    # Kurs awaryjny nie trafia do cache'u - kolejne wywołanie ponawia zapytanie
+    monkeypatch.setattr(app.utils.requests, "get", nbp)
+    assert get_eur_rates_for_range(date(2024, 5, 1), date(2024, 5, 1))[date(2024, 5, 1)][1] == date(2024, 5, 1)
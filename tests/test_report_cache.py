@@ -0,0 +1,137 @@
+import json
+import os
+import time
+
+import numpy as np
+import openpyxl
+import pytest
+
+from app import report_cache
+from app.report_cache import ReportCache, TextColumn, groups_to_columns, LAYOUT_VERSION
+from app.reports import load_report, parse_ads_report
+
+IDS = {"campaign_id": "", "ad_group_id": "", "target_id": ""}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    instance = ReportCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(report_cache, "_report_cache", instance)
+    return instance
+
+
+def write_report(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Campaign Name", "Ad Group Name", "Targeting", "Match Type", "Impressions", "Clicks", "Spend", "7 Day Total Orders (#)", "7 Day Total Sales"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def test_text_column_round_trip():
+    values = ["buty", "zażółć gęślą jaźń", "", "buty", "x" * 5000]
+    column = TextColumn.encode(values)
+
+    assert column.codes.dtype == np.int32
+    assert column.codes.tolist() == [0, 1, 2, 0, 3]
+    assert column.tolist() == values
+    # Odczyt z samych tablic (jak z dysku) daje ten sam słownik
+    assert TextColumn(*column.parts()).tolist() == values
+    assert TextColumn.encode([]).tolist() == []
+
+
+def test_store_and_load_memory_mapped(cache):
+    groups = [
+        {"campaign": "C", "ad_group": "A", "keyword": "k" * 1000, "match_type": "EXACT", **IDS, "impressions": 10, "clicks": 2, "spend": 0.333, "orders": 1, "sales": 9.995},
+        {"campaign": "C", "ad_group": "A", "keyword": "short", "match_type": "BROAD", **IDS, "impressions": 5, "clicks": 1, "spend": 0.111, "orders": 0, "sales": 0.0},
+    ]
+    cache.store("ab12", groups_to_columns(groups), {"rows": 2})
+    loaded = cache.load("ab12")
+
+    assert loaded["meta"]["rows"] == 2
+    assert isinstance(loaded["columns"]["spend"], np.memmap)
+    assert loaded["columns"]["spend"].tolist() == [0.333, 0.111]
+    assert loaded["columns"]["keyword"].tolist() == ["k" * 1000, "short"]
+    assert loaded["columns"]["campaign"].dictionary == ["C"]
+    # Długie słowo kluczowe nie poszerza wiersza - kody mają stałe 4 bajty
+    assert os.path.getsize(os.path.join(cache.directory, "ab12", "keyword.codes.npy")) < 200
+
+
+def test_cached_totals_match_parse_totals(cache, tmp_path):
+    # Każda grupa ma sumy z 3 miejscami po przecinku - zaokrąglanie per grupa przesuwałoby sumę całkowitą
+    rows = [["C", f"A{i % 7}", f"kw{i}", "EXACT", 100, 3, 0.335, 1, 10.005] for i in range(400)]
+    path = write_report(tmp_path / "report.xlsx", rows)
+    parsed = parse_ads_report(str(path))
+
+    with open(path, "rb") as f:
+        first = load_report(f, "report.xlsx")
+    with open(path, "rb") as f:
+        second = load_report(f, "report.xlsx")
+
+    assert first["totals"] == parsed["totals"]
+    assert second["totals"] == parsed["totals"]
+    assert first["totals"]["sales"] == 4002.0
+    assert first["totals"]["spend"] == 134.0
+
+
+def test_stale_layout_is_replaced(cache):
+    entry = os.path.join(cache.directory, "cd34")
+    os.makedirs(entry)
+    with open(os.path.join(entry, "meta.json"), "w") as f:
+        json.dump({"rows": 1}, f)
+    assert cache.load("cd34") is None
+
+    cache.store("cd34", groups_to_columns([]), {"rows": 0})
+    loaded = cache.load("cd34")
+    assert loaded["meta"] == {"rows": 0, "layout": LAYOUT_VERSION}
+
+
+def test_invalid_report_id(cache):
+    with pytest.raises(ValueError):
+        cache.load("../etc")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache"), max_bytes=1)
+    groups = [{"campaign": "C", "ad_group": "A", "keyword": "k", "match_type": "", **IDS, "impressions": 1, "clicks": 1, "spend": 1, "orders": 1, "sales": 1}]
+    cache.store("aa", groups_to_columns(groups), {})
+    cache.store("bb", groups_to_columns(groups), {})
+
+    assert cache.load("aa") is None
+    assert cache.load("bb") is not None
+
+
+def test_evict_removes_stale_staging_dirs(tmp_path):
+    directory = tmp_path / "cache"
+    cache = ReportCache(str(directory), max_bytes=10 ** 9)
+    groups = [{"campaign": "C", "ad_group": "A", "keyword": "k", "match_type": "", **IDS, "impressions": 1, "clicks": 1, "spend": 1, "orders": 1, "sales": 1}]
+    # Pozostałość po awarii w trakcie zapisu i zapis trwający w innym procesie
+    stale = directory / ".cc-crashed"
+    fresh = directory / ".dd-writing"
+    for path in (stale, fresh):
+        path.mkdir()
+        (path / "impressions.npy").write_bytes(b"x" * 100)
+    old = time.time() - report_cache.STAGING_MAX_AGE - 10
+    os.utime(stale, (old, old))
+
+    cache.store("aa", groups_to_columns(groups), {})
+    assert not stale.exists()
+    assert fresh.exists()
+    assert cache.load("aa") is not None
+
+
+def test_recent_staging_dirs_count_towards_limit(tmp_path):
+    directory = tmp_path / "cache"
+    cache = ReportCache(str(directory), max_bytes=10 ** 9)
+    groups = [{"campaign": "C", "ad_group": "A", "keyword": "k", "match_type": "", **IDS, "impressions": 1, "clicks": 1, "spend": 1, "orders": 1, "sales": 1}]
+    cache.store("aa", groups_to_columns(groups), {})
+    # Dwa raporty mieszczą się w limicie, ale nie razem z trwającym zapisem
+    entry_size = sum(path.stat().st_size for path in (directory / "aa").iterdir())
+    cache.max_bytes = 2 * entry_size + 50
+    (directory / ".bb-writing").mkdir()
+    (directory / ".bb-writing" / "impressions.npy").write_bytes(b"x" * 100)
+    cache.store("cc", groups_to_columns(groups), {})
+    assert cache.load("aa") is None
+    assert cache.load("cc") is not None
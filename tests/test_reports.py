@@ -0,0 +1,110 @@
+import openpyxl
+import pytest
+
+from app.reports import _to_number, parse_ads_report, aggregate_report_groups
+
+HEADER = ["Campaign Name", "Ad Group Name", "Targeting", "Match Type", "Impressions", "Clicks", "Spend", "7 Day Total Orders (#)", "7 Day Total Sales"]
+
+
+def write_report(path, rows, header=HEADER):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Sponsored Products Targeting report"])
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("€1.234.567,89", 1234567.89),
+    ("1.234.567", 1234567.0),
+    ("12,5%", 12.5),
+    ("3.75", 3.75),
+    ("", 0.0),
+    ("n/a", 0.0),
+    (None, 0.0),
+    (7, 7.0),
+])
+def test_to_number_locales(text, expected):
+    assert _to_number(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, decimal, integer, expected", [
+    ("1,234", None, False, 1234.0),
+    ("1.234", None, False, 1234.0),
+    ("1,234", ".", False, 1234.0),
+    ("1.234", ",", False, 1234.0),
+    ("1,234", ",", False, 1.234),
+    ("1.234", ".", False, 1.234),
+    ("1,234", ",", True, 1234.0),
+    ("1.234", ".", True, 1234.0),
+    ("0,125", None, False, 0.125),
+])
+def test_to_number_ambiguous_thousands(text, decimal, integer, expected):
+    assert _to_number(text, decimal, integer) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("rows, spend, sales", [
+    # US: "1,234" to tysiące, separator dziesiętny "." wynika z innych komórek
+    ([["Camp", "AG", "a", "EXACT", "1,234", 10, "1,234", 2, "5.50"],
+      ["Camp", "AG", "b", "EXACT", "2,000", 5, "12.25", 1, "2,000"]], 1246.25, 2005.5),
+    # PL / DE: "1.234" to tysiące, "1,234" w kolumnie kwot to ułamek
+    ([["Camp", "AG", "a", "EXACT", "1.234", 10, "1,234", 2, "5,50"],
+      ["Camp", "AG", "b", "EXACT", "2.000", 5, "12,25", 1, "2.000"]], 13.484, 2005.5),
+])
+def test_report_locale_is_detected_per_file(tmp_path, rows, spend, sales):
+    report = parse_ads_report(write_report(tmp_path / "report.xlsx", rows))
+    assert report["totals"]["impressions"] == 3234
+    assert sum(group["spend"] for group in report["groups"]) == pytest.approx(spend)
+    assert sum(group["sales"] for group in report["groups"]) == pytest.approx(sales)
+
+
+def test_match_types_are_separate_groups(tmp_path):
+    path = write_report(tmp_path / "report.xlsx", [
+        ["Camp", "AG", "shoes", "EXACT", 1000, 10, "5,00", 2, "40,00"],
+        ["Camp", "AG", "shoes", "PHRASE", 500, 5, "2,50", 1, "20,00"],
+        ["Camp", "AG", "shoes", "broad", 200, 2, "1,00", 0, "0"],
+        ["Camp", "AG", "shoes", "BROAD", 300, 3, "1,50", 1, "1.020,00"],
+    ])
+    report = parse_ads_report(path)
+
+    assert report["rows"] == 4
+    by_match = {group["match_type"]: group for group in report["groups"]}
+    assert set(by_match) == {"EXACT", "PHRASE", "BROAD"}
+    assert by_match["BROAD"]["clicks"] == 5
+    assert by_match["BROAD"]["sales"] == 1020.0
+    assert report["totals"]["sales"] == 1080.0
+    assert report["totals"]["spend"] == 10.0
+
+
+def test_report_without_match_type_column(tmp_path):
+    header = [column for column in HEADER if column != "Match Type"]
+    path = write_report(tmp_path / "report.xlsx", [["Camp", "AG", "shoes", 100, 1, 1, 0, 0]], header)
+    report = parse_ads_report(path)
+    assert report["groups"][0]["match_type"] == ""
+
+
+def test_aggregate_keyword_level_keeps_match_type(tmp_path):
+    path = write_report(tmp_path / "report.xlsx", [
+        ["Camp", "AG", "shoes", "EXACT", 1000, 10, 5, 2, 40],
+        ["Camp", "AG", "shoes", "PHRASE", 500, 5, 2.5, 1, 20],
+        ["Camp", "AG2", "boots", "EXACT", 100, 1, 1, 0, 0],
+    ])
+    groups = parse_ads_report(path)["groups"]
+
+    assert len(aggregate_report_groups(groups, "keyword")) == 3
+    ad_groups = aggregate_report_groups(groups, "ad_group")
+    assert len(ad_groups) == 2
+    campaign, = aggregate_report_groups(groups, "campaign")
+    assert campaign["clicks"] == 16
+    assert campaign["aov"] == 20.0
+
+
+def test_missing_header_is_rejected(tmp_path):
+    path = write_report(tmp_path / "report.xlsx", [["a", "b"]], header=["Foo", "Bar"])
+    with pytest.raises(ValueError):
+        parse_ads_report(path)
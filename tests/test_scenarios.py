@@ -0,0 +1,141 @@
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+import app.scenarios
+from app.metrics import evaluate_batch
+from app.scenarios import ScenarioStore, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+
+FORECAST = {"gross_margin": 30, "target_aov": 40, "target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 10000}
+BUDGET = {"target_sales": 10000, "target_tacos": 8, "gross_margin": 30}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScenarioStore(str(tmp_path / "scenarios.db"))
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(1715000000.125, 42)) == (1715000000.125, 42)
+    assert decode_cursor(None) == (float("inf"), 0)
+    with pytest.raises(ValueError):
+        decode_cursor("nie-kursor")
+
+
+def test_save_many_returns_sequential_ids_and_tags(store):
+    ids = store.save_many([
+        {"owner": "ala", "inputs": FORECAST, "tags": ["q3", "de"]},
+        {"owner": "ala", "mode": "budget", "inputs": BUDGET},
+    ])
+    assert ids == [ids[0], ids[0] + 1]
+    first, second = store.get_many(ids)
+    assert first["tags"] == ["de", "q3"]
+    assert first["inputs"]["impressions"] == 10000.0
+    assert second["mode"] == "budget" and second["tags"] == []
+
+
+def test_save_many_validates_inputs(store):
+    with pytest.raises(ValueError):
+        store.save_many([{"owner": "ala", "mode": "nieznany", "inputs": FORECAST}])
+    with pytest.raises(ValueError):
+        store.save_many([{"owner": "ala", "inputs": {"gross_margin": 30}}])
+
+
+@pytest.mark.parametrize("value", [-1, float("nan"), float("inf")])
+def test_save_many_rejects_negative_and_non_finite_inputs(store, value):
+    with pytest.raises(ValueError, match="dodatnie"):
+        store.save_many([{"owner": "ala", "inputs": FORECAST}, {"owner": "ala", "inputs": {**FORECAST, "target_cpc": value}}])
+    # Cała partia odrzucona - nic nie zapisano
+    assert store.list("ala")["items"] == []
+
+
+def test_tag_page_uses_tag_owner_index(store):
+    plan = " ".join(row[3] for row in store._connection().execute(
+        "EXPLAIN QUERY PLAN " + app.scenarios._LIST_BY_OWNER_TAG, ("q3", "ala", float("inf"), 0, 10)
+    ))
+    assert "idx_scenario_tags_owner" in plan
+    assert "idx_scenarios_owner_created" not in plan
+
+
+def test_existing_tag_table_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE scenarios (id INTEGER PRIMARY KEY, owner TEXT NOT NULL, name TEXT NOT NULL DEFAULT '',
+            mode TEXT NOT NULL, inputs TEXT NOT NULL, created_at REAL NOT NULL);
+        CREATE TABLE scenario_tags (tag TEXT NOT NULL, scenario_id INTEGER NOT NULL, PRIMARY KEY (tag, scenario_id)) WITHOUT ROWID;
+    """)
+    conn.execute("INSERT INTO scenarios VALUES (1, 'ala', '', 'forecast', ?, 100.0)", (json.dumps(FORECAST),))
+    conn.execute("INSERT INTO scenario_tags VALUES ('q3', 1)")
+    conn.commit()
+    conn.close()
+    assert [item["id"] for item in ScenarioStore(path).list("ala", tag="q3")["items"]] == [1]
+
+
+def test_list_pages_with_keyset_cursor(store):
+    ids = [store.save("ala", FORECAST, name=f"s{i}", tags=["q3"] if i % 2 else []) for i in range(7)]
+    store.save("ola", FORECAST)
+
+    seen = []
+    cursor = None
+    while True:
+        page = store.list("ala", cursor=cursor, limit=3)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # Najnowsze pierwsze, bez duplikatów i scenariuszy innych właścicieli
+    assert seen == ids[::-1]
+
+    tagged = store.list("ala", tag="q3", limit=2)
+    assert [item["id"] for item in tagged["items"]] == [ids[5], ids[3]]
+    rest = store.list("ala", tag="q3", cursor=tagged["next_cursor"], limit=2)
+    assert [item["id"] for item in rest["items"]] == [ids[1]]
+    assert rest["next_cursor"] is None
+
+
+def test_list_limit_is_capped(store):
+    store.save_many([{"owner": "ala", "inputs": FORECAST}] * (MAX_PAGE_SIZE + 1))
+    assert len(store.list("ala", limit=10 ** 6)["items"]) == MAX_PAGE_SIZE
+    assert len(store.list("ala", limit=0)["items"]) == 1
+
+
+def test_compare_matches_batch_evaluation(store):
+    ids = store.save_many([
+        {"owner": "ala", "mode": "budget", "inputs": BUDGET},
+        {"owner": "ala", "inputs": FORECAST},
+    ])
+    budget, forecast = store.compare(ids, 4.3)
+    expected = evaluate_batch("forecast", {name: [value] for name, value in FORECAST.items()}, 4.3)
+    assert forecast["results"] == {name: values[0] for name, values in expected.items()}
+    assert "results" in budget and budget["mode"] == "budget"
+
+
+def test_endpoints(store, monkeypatch, fixed_rate):
+    monkeypatch.setattr(app.scenarios, "_scenario_store", store)
+    monkeypatch.setattr(app.main, "get_eur_rate_info", lambda as_of=None: {"rate": 4.3, "effective_date": "2024-05-06"})
+    client = TestClient(app.main.app)
+
+    ids = client.post("/scenarios", json={"scenarios": [{"owner": "ala", "inputs": FORECAST, "tags": ["q3"]}]}).json()["ids"]
+    page = client.get("/scenarios", params={"owner": "ala", "tag": "q3"}).json()
+    assert [item["id"] for item in page["items"]] == ids
+
+    compared = client.post("/scenarios/compare", json={"ids": ids}).json()["scenarios"]
+    assert compared[0]["results"]["orders"] == 5
+
+    assert client.get("/scenarios", params={"owner": "ala", "cursor": "zly"}).status_code == 400
+    assert client.post("/scenarios", json={"scenarios": [{"owner": "ala", "inputs": {}}]}).status_code == 400
+    assert client.get(f"/scenarios/{ids[0]}").status_code == 200
+    assert client.get("/scenarios/999999").status_code == 404
+
+
+def test_save_scenario_form_rejects_negative_inputs(store, monkeypatch):
+    monkeypatch.setattr(app.scenarios, "_scenario_store", store)
+    client = TestClient(app.main.app)
+    response = client.post("/save-scenario", data={"owner": "ala", **FORECAST, "target_cpc": -0.8})
+    assert response.status_code == 200
+    assert "Wszystkie wartości muszą być dodatnie!" in response.text
+    assert store.list("ala")["items"] == []
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+from app.solver import solve_goal, solve_goals, _find_root
+
+BASE = {"gross_margin": 40, "target_aov": 30, "target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 100000}
+
+
+@pytest.mark.parametrize("solve_for", ["target_cpc", "target_cvr", "target_aov"])
+def test_acos_closed_form(solve_for):
+    result = solve_goal("forecast", "acos", 20, solve_for, BASE)
+    assert result["method"] == "closed_form"
+    assert result["outputs"]["acos"] == pytest.approx(20)
+
+
+def test_acos_cpc_value():
+    # ACOS = CPC / (CVR × AOV) -> CPC = 0.2 × 0.1 × 30
+    assert solve_goal("forecast", "acos", 20, "target_cpc", BASE)["value"] == pytest.approx(0.6)
+
+
+def test_roas_and_roi_closed_forms():
+    assert solve_goal("forecast", "roas", 5, "target_cpc", BASE)["value"] == pytest.approx(0.6)
+    assert solve_goal("forecast", "roi", 400, "target_cpc", BASE)["value"] == pytest.approx(0.6)
+    budget = solve_goal("budget", "roi", 300, "target_tacos", {"target_sales": 10000, "gross_margin": 40})
+    assert budget["value"] == pytest.approx(25)
+    assert budget["outputs"]["roi"] == pytest.approx(300)
+
+
+def test_linear_output_rounds_impressions_up():
+    result = solve_goal("forecast", "clicks", 1001, "impressions", BASE)
+    assert result["method"] == "closed_form"
+    assert result["value"] == 200200
+    assert result["outputs"]["clicks"] >= 1001
+
+
+def test_profit_break_even_cpc():
+    # Zysk = sprzedaż × marża − wydatki = 0 przy CPC = CVR × AOV × marża
+    result = solve_goal("forecast", "profit", 0, "target_cpc", BASE)
+    assert result["value"] == pytest.approx(0.1 * 30 * 0.4)
+
+
+def test_root_finder_for_nonlinear_output():
+    result = solve_goal("forecast", "profit_per_sale", 5, "target_cvr", BASE)
+    assert result["method"] == "root_finder"
+    assert result["outputs"]["profit_per_sale"] == pytest.approx(5, abs=1e-4)
+
+
+def test_unreachable_target_and_validation():
+    with pytest.raises(ValueError):
+        solve_goal("forecast", "acos", 20, "target_ctr", BASE)
+    with pytest.raises(ValueError):
+        solve_goal("forecast", "roas", 5, "target_cpc", BASE, bounds=(0, 0.1))
+    with pytest.raises(ValueError):
+        solve_goal("nope", "acos", 20, "target_cpc", BASE)
+
+
+@pytest.mark.parametrize("output, solve_for, change", [
+    ("acos", "target_cpc", {"target_cvr": 0}),
+    ("acos", "target_cpc", {"target_aov": 0}),
+    ("roas", "target_cvr", {"target_cpc": 0}),
+    ("roi", "target_aov", {"target_cpc": 0}),
+    ("clicks", "target_cpc", {}),
+])
+def test_degenerate_inputs_have_no_solution(output, solve_for, change):
+    with pytest.raises(ValueError, match="Brak rozwiązania|nie zależy"):
+        solve_goal("forecast", output, 25, solve_for, {**BASE, **change})
+
+
+def test_find_root_bisection():
+    assert _find_root(lambda x: x * x - 2, 0, 10) == pytest.approx(2 ** 0.5)
+    assert _find_root(lambda x: x + 1, 0, 10) is None
+
+
+def test_solve_goals_reports_errors_per_goal():
+    results = solve_goals([
+        {"output": "acos", "target": 20, "solve_for": "target_cpc", "inputs": BASE},
+        {"output": "acos", "target": 20},
+        {"output": "unknown", "target": 1, "solve_for": "target_cpc"},
+    ])
+    assert results[0]["value"] == pytest.approx(0.6)
+    assert "error" in results[1] and "error" in results[2]
+
+
+def test_endpoint():
+    response = TestClient(app.main.app).post("/solve", json={"goals": [
+        {"output": "acos", "target": 20, "solve_for": "target_cpc", "inputs": BASE},
+        {"output": "acos", "target": 25, "solve_for": "target_cpc", "inputs": {**BASE, "target_cvr": 0}},
+    ]})
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["value"] == pytest.approx(0.6)
+    assert "Brak rozwiązania" in second["error"]
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+import app.utils
+from app.streaming import MAX_LINE_BYTES, stream_forecasts
+from app.utils import calculate_forecast_from_metrics, generate_export_data
+
+CURRENT = {"rate": 4.3127, "effective_date": "2024-05-06"}
+INPUTS = {"gross_margin": 30, "target_aov": 40, "target_ctr": 0.5, "target_cpc": 0.8, "target_cvr": 10, "impressions": 10000}
+
+
+@pytest.fixture(autouse=True)
+def historical_rates(monkeypatch):
+    monkeypatch.setattr(
+        app.utils, "get_eur_rates_for_range",
+        lambda start, end: {date.fromordinal(day): (4.25, date.fromordinal(day)) for day in range(start.toordinal(), end.toordinal() + 1)}
+    )
+
+
+def export_line(**overrides):
+    results = calculate_forecast_from_metrics(**{**INPUTS, **overrides})
+    return json.dumps(generate_export_data(results)).encode()
+
+
+async def _body(parts):
+    for part in parts:
+        yield part
+
+
+def run(parts, chunk_size=1000):
+    async def collect():
+        return [chunk async for chunk in stream_forecasts(_body(parts), CURRENT, chunk_size)]
+    return asyncio.run(collect())
+
+
+def lines(chunks):
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_results_match_export_schema(fixed_rate):
+    source = export_line()
+    expected = json.loads(source)
+    (result,) = lines(run([source + b"\n"]))
+    assert result["line"] == 1
+    assert result["forecast_results"] == expected["forecast_results"]
+    assert result["input_parameters"] == expected["input_parameters"]
+    assert result["profitability_analysis"] == expected["profitability_analysis"]
+    # Dokument eksportu niesie datę kursu - scenariusz jest liczony kursem z tego dnia
+    assert result["currency_info"]["eur_pln_rate_date"] == "2024-05-06"
+    assert result["currency_info"]["eur_pln_rate"] == 4.25
+
+
+def test_split_lines_and_historical_rate(fixed_rate):
+    flat = json.dumps({"id": "a", "as_of": "2023-01-07", **{
+        "gross_margin_percent": 30, "target_aov_eur": 40, "target_ctr_percent": 0.5,
+        "target_cpc_eur": 0.8, "target_cvr_percent": 10, "impressions": 10000,
+    }}).encode()
+    (result,) = lines(run([flat[:10], flat[10:] + b"\n", b"\n"]))
+    assert result["id"] == "a"
+    assert result["currency_info"] == {
+        "primary_currency": "EUR", "eur_pln_rate": 4.25, "eur_pln_rate_date": "2023-01-07", "currency_source": "NBP API",
+    }
+
+
+def test_output_keeps_input_order(fixed_rate):
+    valid = export_line()
+    body = b"\n".join([valid, b"{}", valid, b"nie json", b"[1]", valid, valid]) + b"\n"
+    results = lines(run([body], chunk_size=3))
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 6, 7]
+    assert ["error" in result for result in results] == [False, True, False, True, True, False, False]
+
+
+def test_errors_count_towards_chunk_size():
+    chunks = run([b"{}\n" * 10], chunk_size=2)
+    assert [len(chunk.splitlines()) for chunk in chunks] == [2] * 5
+
+
+def test_overlong_line_flushes_pending_results(fixed_rate):
+    chunks = run([export_line() + b"\n", b"x" * (MAX_LINE_BYTES + 1)])
+    results = lines(chunks)
+    assert [result["line"] for result in results] == [1, 2]
+    assert "forecast_results" in results[0] and "error" in results[1]
+
+
+def test_endpoint(fixed_rate, monkeypatch):
+    monkeypatch.setattr(app.main, "get_eur_rate_info", lambda as_of=None: dict(CURRENT))
+    client = TestClient(app.main.app)
+    response = client.post("/forecast/stream", content=export_line() + b"\n{}\n")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.content.splitlines()]
+    assert [result["line"] for result in results] == [1, 2]
+    assert "error" in results[1]